@@ -0,0 +1,106 @@
+# admission.py
+# Concurrency limits with a bounded, time-limited wait queue in front of the
+# embedding and completion calls. Overloaded callers fail fast with `Overloaded`,
+# which the API turns into 429/503 responses carrying `Retry-After`.
+
+import threading
+from contextlib import contextmanager
+
+from config import (
+    ADMISSION_CHAT_CONCURRENCY,
+    ADMISSION_EMBED_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_S,
+    ADMISSION_RETRY_AFTER_S,
+)
+from metrics import Counter, Gauge
+
+QUEUE_DEPTH = Gauge("rag_admission_queue_depth", "Calls waiting for a slot, by gate.", ("gate",))
+IN_FLIGHT = Gauge("rag_admission_in_flight", "Calls holding a slot, by gate.", ("gate",))
+SHED = Counter(
+    "rag_admission_shed_total", "Calls rejected by admission control, by gate and reason.", ("gate", "reason")
+)
+
+
+class Overloaded(Exception):
+    """Raised when a call cannot be admitted; carries the HTTP status to return."""
+
+    def __init__(self, gate: str, reason: str, status_code: int, retry_after: int = ADMISSION_RETRY_AFTER_S):
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    At most `max_concurrency` callers run at once, at most `max_queue` wait.
+    A full queue rejects immediately (429); a wait longer than `queue_timeout`
+    seconds is rejected too (503).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_S,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.in_flight = 0
+        self._slots = threading.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    def resize(self, max_concurrency: int, max_queue: int | None = None):
+        """Change the limits of an idle gate."""
+        with self._lock:
+            if self.in_flight or self.waiting:
+                raise RuntimeError(f"Cannot resize gate {self.name} while it is in use")
+            self.max_concurrency = max_concurrency
+            self.max_queue = self.max_queue if max_queue is None else max_queue
+            self._slots = threading.Semaphore(max_concurrency)
+
+    def _update_gauges(self):
+        QUEUE_DEPTH.set(self.waiting, gate=self.name)
+        IN_FLIGHT.set(self.in_flight, gate=self.name)
+
+    def _shed(self, reason: str, status_code: int):
+        SHED.inc(gate=self.name, reason=reason)
+        raise Overloaded(self.name, reason, status_code)
+
+    @contextmanager
+    def slot(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    self._shed("queue_full", 429)
+                self.waiting += 1
+                self._update_gauges()
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+                    self._update_gauges()
+            if not admitted:
+                self._shed("queue_timeout", 503)
+
+        with self._lock:
+            self.in_flight += 1
+            self._update_gauges()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._update_gauges()
+            self._slots.release()
+
+
+EMBED_GATE = AdmissionGate("embed", ADMISSION_EMBED_CONCURRENCY)
+CHAT_GATE = AdmissionGate("completion", ADMISSION_CHAT_CONCURRENCY)
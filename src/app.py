@@ -1,37 +1,79 @@
 # app.py
 # poetry run uvicorn app:app --reload
 
+import hmac
 import os
-import json
-import random
-from typing import List
-from fastapi import FastAPI, Request
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from dotenv import load_dotenv
-from openai import OpenAI
-import numpy as np
-import faiss
 
-# === Yüklemeler ve ayarlar ===
-load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
-
-CHUNKS_PATH = "src/data/merged_chunks.jsonl"
-INDEX_PATH = "src/data/faiss_index.faiss"
+from admission import SHED, Overloaded
+from config import ADMISSION_MAX_REQUESTS, DEFAULT_CORPUS, INGEST_API_TOKEN, INGEST_MAX_UPLOAD_MB, INGEST_WATCH
+from corpus_registry import CorpusRegistry, UnknownCorpus
+from ingest_service import IngestService, UnknownLayout
+from metrics import Gauge, RequestTimings, render_prometheus
+from profiling import maybe_profile, new_request_id
+from qa_log import log_qa_record
+
+# === Ingestion workers: başlat / durdur ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INGEST_WATCH:
+        ingestion.start(watch=True)
+    yield
+    ingestion.stop()
 
 # === FastAPI nesnesi ===
-app = FastAPI(title="NTT RAG Pipeline API")
+app = FastAPI(title="NTT RAG Pipeline API", lifespan=lifespan)
+
+ASK_IN_FLIGHT = Gauge("rag_ask_in_flight", "/ask requests being processed.")
+_ask_in_flight = 0
+
+# === Admission control ===
+@app.middleware("http")
+async def limit_ask_requests(request: Request, call_next):
+    """Reject ask requests beyond ADMISSION_MAX_REQUESTS before they take a worker thread."""
+    global _ask_in_flight
+    if not request.url.path.endswith("/ask"):
+        return await call_next(request)
+    if _ask_in_flight >= ADMISSION_MAX_REQUESTS:
+        SHED.inc(gate="request", reason="too_many_requests")
+        return overloaded_response(Overloaded("request", "too_many_requests", 503))
+    _ask_in_flight += 1
+    ASK_IN_FLIGHT.set(_ask_in_flight)
+    try:
+        return await call_next(request)
+    finally:
+        _ask_in_flight -= 1
+        ASK_IN_FLIGHT.set(_ask_in_flight)
+
+
+def overloaded_response(exc: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        {"detail": f"Service overloaded ({exc.gate}: {exc.reason}), retry later."},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
-# === Chunk ve Index yükle ===
-with open(CHUNKS_PATH, "r", encoding="utf-8") as f:
-    chunks = [json.loads(line) for line in f]
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return overloaded_response(exc)
 
-index = faiss.read_index(INDEX_PATH)
+# === Corpus registry (chunk + index yüklemesi ilk kullanımda) ===
+registry = CorpusRegistry()
+
+# === Ingestion (arka planda, ayrı worker process'lerde) ===
+ingestion = IngestService(registry)
 
 # === Request-Response modelleri ===
 class AskRequest(BaseModel):
     question: str
+    corpus: Optional[str] = None
 
 class AskResponse(BaseModel):
     answer: str
@@ -42,62 +84,130 @@ class AskResponse(BaseModel):
 def health_check():
     return {"status": "ok"}
 
+# === Prometheus metrikleri ===
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# === Yüklü corpus'lar ===
+@app.get("/corpora")
+def list_corpora():
+    return {"budget_bytes": registry.budget_bytes, "corpora": registry.status()}
+
+# === PDF ingestion ===
+class IngestRequest(BaseModel):
+    path: str
+    layout: Optional[str] = None
+    corpus: Optional[str] = None
+    pages: Optional[List[int]] = None
+
+def require_ingest_token(authorization: Optional[str] = Header(None)):
+    """/ingest is opt-in: disabled without INGEST_API_TOKEN, and callers must send that token."""
+    if not INGEST_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Ingestion API is disabled (set INGEST_API_TOKEN)")
+    expected = f"Bearer {INGEST_API_TOKEN}".encode("utf-8")
+    if not hmac.compare_digest((authorization or "").encode("utf-8"), expected):
+        raise HTTPException(status_code=401, detail="Invalid ingestion token")
+
+async def receive_upload(http_request: Request, tmp: str):
+    """Stream the request body to `tmp` off the event loop, refusing more than INGEST_MAX_UPLOAD_MB (413)."""
+    limit = int(INGEST_MAX_UPLOAD_MB * 1024 * 1024)
+    too_large = HTTPException(status_code=413, detail=f"Upload larger than {INGEST_MAX_UPLOAD_MB:g} MB")
+    if int(http_request.headers.get("content-length") or 0) > limit:
+        raise too_large
+    size = 0
+    f = await run_in_threadpool(open, tmp, "wb")
+    try:
+        async for block in http_request.stream():
+            size += len(block)
+            if size > limit:
+                raise too_large
+            await run_in_threadpool(f.write, block)
+    finally:
+        await run_in_threadpool(f.close)
+
+@app.post("/ingest", status_code=202, dependencies=[Depends(require_ingest_token)])
+async def ingest_pdf(
+    http_request: Request,
+    filename: Optional[str] = None,
+    layout: Optional[str] = None,
+    corpus: Optional[str] = None,
+    replace: bool = False,
+):
+    """
+    Queue a PDF for ingestion. Either upload it as the raw request body
+    (`Content-Type: application/pdf`, `?filename=sr_2025_cb_v.pdf`) or send JSON
+    `{"path": ...}` for a file already in the watched folder. Returns the job.
+    `?replace=true` lets an upload correct a report stored under the same name.
+    """
+    pages = None
+    try:
+        if http_request.headers.get("content-type", "").startswith("application/json"):
+            body = IngestRequest(**await http_request.json())
+            path, layout, corpus, pages = body.path, body.layout or layout, body.corpus or corpus, body.pages
+            path = ingestion.server_path(path)
+        else:
+            path = ingestion.upload_path(filename or "")
+            tmp = f"{path}.{uuid.uuid4().hex}.upload.tmp"
+            try:
+                await receive_upload(http_request, tmp)
+                path = await run_in_threadpool(ingestion.store_upload, tmp, filename, replace)
+            finally:
+                if os.path.exists(tmp):  # refused, cut short or failed
+                    os.remove(tmp)
+        return await run_in_threadpool(ingestion.submit, path, layout, corpus or DEFAULT_CORPUS, pages)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No such file: {path}")
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (UnknownLayout, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/ingest/jobs", dependencies=[Depends(require_ingest_token)])
+def list_ingest_jobs():
+    return {"jobs": ingestion.queue.jobs()}
+
+@app.get("/ingest/jobs/{job_id}", dependencies=[Depends(require_ingest_token)])
+def get_ingest_job(job_id: str):
+    job = ingestion.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job: {job_id}")
+    return job
+
 # === Ana soru-cevap endpoint’i ===
 @app.post("/ask", response_model=AskResponse)
-def ask_question(request: AskRequest):
-    question = request.question.strip()
+def ask_question(request: AskRequest, response: Response, http_request: Request):
+    return _ask(request.corpus or DEFAULT_CORPUS, request, response, http_request)
 
-    # 🔹 Embed soruyu
-    resp = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=question,
-    )
-    qvec = np.array(resp.data[0].embedding, dtype="float32").reshape(1, -1)
-
-    # 🔹 FAISS araması
-    distances, indices_ = index.search(qvec, k=5)
-    max_sim = distances[0][0]
-
-    # 🔹 Düşük benzerlik fallback
-    if max_sim < 0.5:
-        user_lang = "tr" if any(ch in question for ch in "üğşıçö") else "en"
-        fallback = {
-            "en": [
-                "Sorry, I couldn't find any relevant information in the available documents.",
-                "I'm not confident enough to answer that based on the provided sources.",
-                "This question seems to be outside the scope of the documents I'm trained on.",
-            ],
-            "tr": [
-                "Üzgünüm, elimdeki belgelerde bu soruya dair güvenilir bir bilgi bulamadım.",
-                "Bu soruya mevcut kaynaklara dayanarak sağlıklı bir yanıt veremem.",
-                "Bu soru, elimdeki belgelerin kapsamının dışında görünüyor.",
-            ],
-        }
-        return AskResponse(answer=random.choice(fallback[user_lang]), sources=[])
-
-    # 🔹 Bağlam oluştur
-    retrieved = [chunks[i] for i in indices_[0]]
-    context = "\n\n".join(
-        f"[{c['main_title_of_page']} > {c['main_subtitle_of_page']} > {c['header']}] (Page {c['page']})\n{c['content']}"
-        for c in retrieved
-    )
+@app.post("/corpora/{corpus}/ask", response_model=AskResponse)
+def ask_corpus_question(corpus: str, request: AskRequest, response: Response, http_request: Request):
+    return _ask(corpus, request, response, http_request)
 
-    # 🔹 LLM'e gönder
-    messages = [
-        {"role": "system", "content": "You are a helpful assistant answering questions based on company reports."},
-        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
-    ]
-    chat = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0.3,
-    )
-    answer = chat.choices[0].message.content.strip()
 
-    # 🔹 Kaynakları toparla
-    sources = [
-        f"{c['source']} | Page {c['page']} | {c['header']} | Similarity: {distances[0][i]:.2f}"
-        for i, c in enumerate(retrieved)
-    ]
+def _ask(corpus_name: str, request: AskRequest, response: Response, http_request: Request):
+    from qa import answer_question, format_sources  # numpy loads with the first question, not at startup
 
-    return AskResponse(answer=answer, sources=sources)
+    question = request.question.strip()
+    timings = RequestTimings()
+    request_id = http_request.headers.get("x-request-id") or new_request_id()
+
+    try:
+        with timings.stage("corpus"):
+            corpus = registry.get(corpus_name)
+    except UnknownCorpus:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus: {corpus_name}")
+
+    with maybe_profile("ask", request_id, http_request.headers) as profile_path:
+        result = answer_question(question, corpus.chunks, corpus.index, timings, lexical=corpus.lexical)
+    log_qa_record(question, result, timings.stages, channel="api", request_id=request_id)
+    response.headers["Server-Timing"] = timings.server_timing()
+    response.headers["X-Request-ID"] = request_id
+    if profile_path:
+        response.headers["X-Profile"] = os.path.basename(profile_path)
+
+    return AskResponse(
+        answer=result["answer"],
+        sources=format_sources(result["retrieved"], result["similarities"]),
+    )
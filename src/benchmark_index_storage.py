@@ -0,0 +1,84 @@
+# benchmark_index_storage.py
+# Recall / latency / size of reduced-dimension and quantized indexes on QTEST.md questions.
+# python src/benchmark_index_storage.py
+
+import time
+
+import faiss
+import numpy as np
+
+from llm_backend import get_backend
+from retriever import (
+    EMBEDDINGS_PATH,
+    TOP_K,
+    build_faiss_index,
+    load_embeddings,
+    normalize_embeddings,
+    truncate_embeddings,
+)
+from utils import load_qtest_questions
+
+QTEST_PATH = "QTEST.md"
+DIMENSIONS = [256, 512, 1536]
+STORAGES = ["float32", "float16", "int8"]
+REPEATS = 50
+
+
+def embed_questions(questions: list[str]) -> np.ndarray:
+    """Embed the questions once at full size; smaller sizes are truncated from it."""
+    vectors = np.array(get_backend().embed(questions, dimensions=max(DIMENSIONS)), dtype="float32")
+    return normalize_embeddings(vectors)
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def run_benchmark(embeddings: np.ndarray, queries: np.ndarray, k: int = TOP_K) -> list[dict]:
+    baseline = build_faiss_index(embeddings, "float32")
+    _, expected = baseline.search(queries, k)
+
+    results = []
+    for dimensions in DIMENSIONS:
+        corpus = truncate_embeddings(embeddings, dimensions)
+        qvecs = truncate_embeddings(queries, dimensions)
+        for storage in STORAGES:
+            index = build_faiss_index(corpus, storage)
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                for q in qvecs:
+                    index.search(q.reshape(1, -1), k)
+            latency_ms = (time.perf_counter() - start) * 1000 / (REPEATS * len(qvecs))
+            _, found = index.search(qvecs, k)
+            results.append(
+                {
+                    "dimensions": dimensions,
+                    "storage": storage,
+                    "index_bytes": int(faiss.serialize_index(index).size),
+                    "recall_at_k": recall_at_k(found, expected),
+                    "latency_ms": latency_ms,
+                }
+            )
+    return results
+
+
+def main():
+    embeddings, _ = load_embeddings(EMBEDDINGS_PATH)
+    embeddings = normalize_embeddings(embeddings)
+    queries = embed_questions(load_qtest_questions(QTEST_PATH))
+
+    results = run_benchmark(embeddings, queries)
+    base = next(r for r in results if r["dimensions"] == max(DIMENSIONS) and r["storage"] == "float32")
+    print(f"\n📊 {len(queries)} QTEST questions, {len(embeddings)} vectors, top-{TOP_K}\n")
+    print(f"{'dims':>5} {'storage':>8} {'size KB':>9} {'size x':>7} {'recall':>7} {'ms/query':>9} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['dimensions']:>5} {r['storage']:>8} {r['index_bytes'] / 1024:>9.1f} "
+            f"{base['index_bytes'] / r['index_bytes']:>6.1f}x {r['recall_at_k']:>7.3f} "
+            f"{r['latency_ms']:>9.4f} {base['latency_ms'] / r['latency_ms']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
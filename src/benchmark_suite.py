@@ -0,0 +1,298 @@
+# benchmark_suite.py
+# Micro-benchmarks of the ingestion and retrieval hot paths, on the offline backend
+# (always, whatever LLM_BACKEND says) and synthetic corpora. Results are written as
+# JSON and compared to the baseline committed in benchmarks/baseline.json.
+#
+# python src/benchmark_suite.py --scales 360 10000
+# python src/benchmark_suite.py --update-baseline
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from config import SECTION_COORDINATES_DICT_PDF_2023
+from lexical import BM25Index
+from llm_backend import get_backend
+from logger import logger as chunk_logger
+from retriever import TOP_K, build_faiss_index, load_embeddings, normalize_embeddings
+from utils import build_context
+
+SCALES = [360, 10_000, 100_000, 1_000_000]
+DIMENSIONS = 256  # Keeps the 1M-vector corpus around 1 GB
+STORE_LOAD_MAX = 100_000  # Larger JSONL stores are not realistic, skip them
+N_QUERIES = 200
+BATCH_SIZE = 32
+N_PAGES = 30
+BACKEND = "offline"  # No API calls, and numbers comparable to the baseline
+RESULTS_PATH = "benchmarks/results.json"
+BASELINE_PATH = "benchmarks/baseline.json"
+REGRESSION_THRESHOLD = 0.20  # 20% worse than baseline fails the run
+REPEATS = 3  # One-shot timings (builds, loads, chunking) report the median of this many runs
+# Differences below these are noise, whatever the relative change (sub-millisecond timings)
+NOISE_FLOOR = {"ms": 0.05, "s": 0.005, "mb": 5.0}
+
+
+def _timed(fn, *args, repeats: int = 1, **kwargs):
+    """Result of the last run and the median duration of `repeats` runs."""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        durations.append(time.perf_counter() - start)
+    return result, statistics.median(durations)
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size (psutil if installed, else /proc), None where neither is available."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def synthetic_embeddings(n: int, dimensions: int = DIMENSIONS, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return normalize_embeddings(rng.standard_normal((n, dimensions), dtype=np.float32))
+
+
+def synthetic_chunks(n: int) -> list[dict]:
+    words = "NTT DATA reduced workload emissions by 50% with digital trade platforms".split()
+    return [
+        {
+            "main_title_of_page": f"Title {i // 6}",
+            "main_subtitle_of_page": f"Subtitle {i // 6}",
+            "header": ["Social Issues", "Substance", "Key Metrics"][i % 3],
+            "content": " ".join(words[(i + j) % len(words)] for j in range(120)),
+            "page": i // 6,
+            "source": "synthetic.pdf",
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_pdf(path: str, n_pages: int = N_PAGES):
+    """Pages with text in every template region and in several font sizes/colors."""
+    doc = fitz.open()
+    body = "NTT DATA supports customers with digital solutions for social issues. " * 4
+    for _ in range(n_pages):
+        page = doc.new_page(width=842, height=595)
+        for (x0, y0), (x1, y1) in SECTION_COORDINATES_DICT_PDF_2023.values():
+            rect = fitz.Rect(x0 * 72 / 150, y0 * 72 / 150, x1 * 72 / 150, y1 * 72 / 150)
+            page.insert_textbox(rect, body, fontsize=9, color=(0.14, 0.12, 0.63))
+        page.insert_text((40, 60), "Main title of the page", fontsize=18)
+        page.insert_text((40, 100), "Subtitle of the page", fontsize=14)
+        page.insert_text((600, 300), "50%", fontsize=24, color=(0.42, 0.74, 0.81))
+    doc.save(path)
+    doc.close()
+
+
+def bench_chunking(tmpdir: str) -> dict:
+    import pdf_2020_chunker_by_span_analysis as span_2020
+    import pdf_2024_chunker_by_span_analysis as span_2024
+    from pdf_chunker_by_template import extract_chunks_by_template, px2pt
+
+    pdf_path = os.path.join(tmpdir, "synthetic.pdf")
+    synthetic_pdf(pdf_path)
+    pages = list(range(1, N_PAGES + 1))
+    coords_pt = {
+        key: (px2pt(tl), px2pt(br)) for key, (tl, br) in SECTION_COORDINATES_DICT_PDF_2023.items()
+    }
+    out = os.path.join(tmpdir, "chunks.jsonl")
+    chunkers = {
+        "template": lambda: extract_chunks_by_template(pdf_path, pages, coords_pt),
+        "span_2020": lambda: span_2020.extract_chunks(pdf_path, pages, out),
+        "span_2024": lambda: span_2024.extract_chunks(pdf_path, pages, out),
+    }
+    results = {}
+    for name, run in chunkers.items():
+        _, seconds = _timed(run, repeats=REPEATS)
+        results[f"chunking.{name}.pages_per_sec"] = N_PAGES / seconds
+    return results
+
+
+def bench_store_load(n: int, tmpdir: str) -> dict:
+    path = os.path.join(tmpdir, f"embeddings_{n}.jsonl")
+    vectors = synthetic_embeddings(n)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, vec in enumerate(vectors):
+            json.dump({"embedding": vec.tolist(), "metadata": {"page": i}}, f)
+            f.write("\n")
+    _, seconds = _timed(load_embeddings, path, repeats=REPEATS)
+    os.remove(path)
+    return {f"store_load.s@{n}": seconds}
+
+
+def bench_index(n: int) -> dict:
+    embeddings = synthetic_embeddings(n)
+    rss_before = _rss_mb()
+    index, build_seconds = _timed(build_faiss_index, embeddings, repeats=REPEATS)
+    # Current, not peak, RSS: a larger earlier step must not hide this one's growth
+    rss_after = _rss_mb()
+    queries = synthetic_embeddings(N_QUERIES, seed=1)
+
+    single = []
+    for q in queries:
+        _, seconds = _timed(index.search, q.reshape(1, -1), TOP_K)
+        single.append(seconds * 1000)
+    _, batch_seconds = _timed(
+        lambda: [index.search(queries[i : i + BATCH_SIZE], TOP_K) for i in range(0, N_QUERIES, BATCH_SIZE)]
+    )
+    results = {
+        f"index.build_s@{n}": build_seconds,
+        f"index.size_mb@{n}": index.ntotal * index.d * 4 / (1024 * 1024),
+        f"search.single_p50_ms@{n}": statistics.median(single),
+        f"search.single_p95_ms@{n}": float(np.percentile(single, 95)),
+        f"search.batched_ms_per_query@{n}": batch_seconds * 1000 / N_QUERIES,
+    }
+    if rss_before is not None and rss_after is not None:
+        results[f"index.rss_growth_mb@{n}"] = max(0.0, rss_after - rss_before)
+    return results
+
+
+def bench_lexical(n: int, tmpdir: str) -> dict:
+    chunks = synthetic_chunks(n)
+    index, build_seconds = _timed(BM25Index.build, chunks, repeats=REPEATS)
+    path = os.path.join(tmpdir, f"bm25_{n}.bin")
+    index.save(path)
+    _, load_seconds = _timed(BM25Index.load, path, repeats=REPEATS)
+    queries = [f"{chunks[i]['main_title_of_page']} workload emissions 50%" for i in range(0, n, max(1, n // N_QUERIES))]
+
+    single = []
+    for q in queries:
+        _, seconds = _timed(index.search, q, TOP_K)
+        single.append(seconds * 1000)
+    results = {
+        f"lexical.build_s@{n}": build_seconds,
+        f"lexical.load_s@{n}": load_seconds,
+        f"lexical.size_mb@{n}": os.path.getsize(path) / (1024 * 1024),
+        f"lexical.search_p50_ms@{n}": statistics.median(single),
+        f"lexical.search_p95_ms@{n}": float(np.percentile(single, 95)),
+    }
+    os.remove(path)
+    return results
+
+
+def bench_query_path() -> dict:
+    backend = get_backend(BACKEND)
+    chunks = synthetic_chunks(360)
+    _, embed_seconds = _timed(lambda: [backend.embed([f"question {i}"], dimensions=DIMENSIONS) for i in range(50)])
+    _, context_seconds = _timed(lambda: [build_context(chunks[i : i + TOP_K]) for i in range(0, 300)])
+    return {
+        "query.embed_ms": embed_seconds * 1000 / 50,
+        "query.context_assembly_ms": context_seconds * 1000 / 300,
+    }
+
+
+def run_suite(scales: list[int]) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results.update(bench_chunking(tmpdir))
+        for n in scales:
+            if n <= STORE_LOAD_MAX:
+                results.update(bench_store_load(n, tmpdir))
+                results.update(bench_lexical(n, tmpdir))
+            results.update(bench_index(n))
+    results.update(bench_query_path())
+    return results
+
+
+def higher_is_better(metric: str) -> bool:
+    return "_per_sec" in metric
+
+
+def noise_floor(metric: str) -> float:
+    """Smallest absolute difference that counts, by the unit in the metric name (e.g. `_ms@360`)."""
+    name = metric.split("@")[0]
+    for unit, floor in NOISE_FLOOR.items():
+        if name.endswith((f"_{unit}", f".{unit}")):
+            return floor
+    return 0.0
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """
+    Return a description of every metric that regressed by more than `threshold`
+    and by more than its noise floor.
+    """
+    regressions = []
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if base is None or "size_mb" in metric:  # sizes follow from the scale alone
+            continue
+        worse = base - value if higher_is_better(metric) else value - base
+        if worse <= noise_floor(metric):
+            continue
+        change = worse / base if base else float("inf")
+        if change > threshold:
+            regressions.append(f"{metric}: {base:.4g} → {value:.4g} ({change:+.0%} worse)")
+    return regressions
+
+
+def _write_json(data: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Retrieval and ingestion micro-benchmarks")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Per-page INFO logs of the chunkers would dominate the console
+    chunk_logger.setLevel(logging.WARNING)
+
+    results = run_suite(args.scales)
+    report = {
+        "backend": get_backend(BACKEND).name,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    _write_json(report, args.output)
+    for metric, value in results.items():
+        print(f"{metric:<45} {value:>12.4f}")
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.update_baseline:
+        _write_json(report, args.baseline)
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}, skipping comparison")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"\n✅ No regression over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# chunk_sizing.py
+# Token-aware splitting of oversized chunks and packing of tiny ones.
+
+import logging
+from functools import lru_cache
+from itertools import groupby
+
+import tiktoken
+
+from utils import chunk_id
+
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL = "text-embedding-3-small"
+MAX_TOKENS = 512  # Larger chunks are split with overlap
+MIN_TOKENS = 48  # Smaller chunks are packed with their page/section neighbours
+OVERLAP_TOKENS = 64
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = EMBED_MODEL):
+    """tiktoken encoding used by the embedding model."""
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text: str, encoding=None) -> int:
+    encoding = encoding or get_encoding()
+    return len(encoding.encode(text))
+
+
+def _char_boundaries(tokens: list, encoding) -> list[bool]:
+    """
+    safe[i]: tokens[:i] ends on a UTF-8 character boundary. Byte-level BPE tokens can
+    cut a multibyte character; encodings without token bytes are taken as always safe.
+    """
+    if not hasattr(encoding, "decode_single_token_bytes"):
+        return [True] * (len(tokens) + 1)
+    first_bytes = [encoding.decode_single_token_bytes(t)[0] for t in tokens]
+    return [True] + [b & 0xC0 != 0x80 for b in first_bytes[1:]] + [True]  # 0b10xxxxxx: continuation
+
+
+def split_chunk(
+    chunk: dict,
+    max_tokens: int = MAX_TOKENS,
+    overlap: int = OVERLAP_TOKENS,
+    encoding=None,
+) -> list[dict]:
+    """
+    Split a chunk into windows of at most `max_tokens` tokens, `overlap` tokens apart.
+    Every piece keeps the chunk's metadata plus `parent_id`, `part` and `parts`.
+    """
+    encoding = encoding or get_encoding()
+    tokens = encoding.encode(chunk.get("content", ""))
+    if len(tokens) <= max_tokens:
+        return [chunk]
+
+    step = max_tokens - overlap
+    starts = list(range(0, len(tokens) - overlap, step))
+    safe = _char_boundaries(tokens, encoding)
+    parent = chunk_id(chunk)
+    pieces = []
+    for part, start in enumerate(starts):
+        end = min(start + max_tokens, len(tokens))
+        # Windows overlap, so a character cut at a window edge is whole in the neighbour
+        while not safe[start] and start < end - 1:
+            start += 1
+        while not safe[end] and end > start + 1:
+            end -= 1
+        piece = dict(chunk)
+        piece["content"] = encoding.decode(tokens[start:end]).strip()
+        piece.update(parent_id=parent, part=part, parts=len(starts))
+        pieces.append(piece)
+    return pieces
+
+
+def _section_key(chunk: dict) -> tuple:
+    return (
+        chunk.get("source"),
+        chunk.get("page"),
+        chunk.get("main_title_of_page", ""),
+        chunk.get("main_subtitle_of_page", ""),
+        chunk.get("header", ""),
+    )
+
+
+def pack_chunks(
+    chunks: list[dict],
+    min_tokens: int = MIN_TOKENS,
+    max_tokens: int = MAX_TOKENS,
+    encoding=None,
+) -> list[dict]:
+    """
+    Pack consecutive tiny chunks of the same page, section and header into one chunk
+    of at most `max_tokens` tokens. Packed chunks list their members in `packed_from`.
+    Chunk order is kept.
+    """
+    encoding = encoding or get_encoding()
+    packed = []
+    for _, group in groupby(chunks, key=_section_key):
+        buffer, buffer_tokens = [], 0
+
+        def _flush():
+            if len(buffer) == 1:
+                packed.append(buffer[0])
+            elif buffer:
+                merged = dict(buffer[0])
+                merged["content"] = "\n".join(c["content"] for c in buffer)
+                merged["packed_from"] = [
+                    {"chunk_id": chunk_id(c), "header": c.get("header", "")} for c in buffer
+                ]
+                packed.append(merged)
+
+        for chunk in group:
+            n_tokens = count_tokens(chunk.get("content", ""), encoding)
+            if n_tokens >= min_tokens:
+                _flush()  # tiny chunks before it stay before it
+                buffer, buffer_tokens = [], 0
+                packed.append(chunk)
+                continue
+            if buffer and buffer_tokens + n_tokens > max_tokens:
+                _flush()
+                buffer, buffer_tokens = [], 0
+            buffer.append(chunk)
+            buffer_tokens += n_tokens
+        _flush()
+    return packed
+
+
+def resize_chunks(
+    chunks: list[dict],
+    max_tokens: int = MAX_TOKENS,
+    min_tokens: int = MIN_TOKENS,
+    overlap: int = OVERLAP_TOKENS,
+    encoding=None,
+) -> list[dict]:
+    """Split oversized chunks, then pack tiny ones, so embedding inputs are uniform."""
+    encoding = encoding or get_encoding()
+    non_empty = [c for c in chunks if c.get("content")]
+    split = [
+        piece
+        for chunk in non_empty
+        for piece in split_chunk(chunk, max_tokens, overlap, encoding)
+    ]
+    resized = pack_chunks(split, min_tokens, max_tokens, encoding)
+    logger.info(
+        f"📏 Resized {len(non_empty)} chunks → {len(split)} after split → "
+        f"{len(resized)} after packing (max {max_tokens}, min {min_tokens} tokens)"
+    )
+    return resized
@@ -1,3 +1,103 @@
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables (like OPENAI_API_KEY, LLM_BACKEND)
+load_dotenv()
+
+# === LLM / embedding backend ===
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")  # "openai" | "offline"
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "1536"))  # e.g. 256 / 512 / 1536
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+CHAT_TEMPERATURE = 0.3
+# Artificial latency of the offline backend, per call
+OFFLINE_EMBED_LATENCY_MS = float(os.getenv("OFFLINE_EMBED_LATENCY_MS", "0"))
+OFFLINE_CHAT_LATENCY_MS = float(os.getenv("OFFLINE_CHAT_LATENCY_MS", "0"))
+
+# === JSONL stores ===
+JSONL_CODEC = os.getenv("JSONL_CODEC", "orjson")  # "orjson" (if installed) | "json"
+
+# === Journaled embedding jobs ===
+EMBED_JOB_DIR = os.getenv("EMBED_JOB_DIR", "src/data/embedding_job")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_ATTEMPTS = int(os.getenv("EMBED_MAX_ATTEMPTS", "3"))
+
+# === Served corpora ===
+# "default" is the main report corpus; every sub-directory of CORPORA_DIR holding a
+# merged_chunks.jsonl + faiss_index.faiss pair is served under its directory name.
+DEFAULT_CORPUS = "default"
+DEFAULT_CORPUS_CHUNKS_PATH = "src/data/merged_chunks.jsonl"
+DEFAULT_CORPUS_INDEX_PATH = "src/data/faiss_index.faiss"
+DEFAULT_CORPUS_LEXICAL_PATH = "src/data/bm25_index.bin"
+CORPORA_DIR = os.getenv("CORPORA_DIR", "src/data/corpora")
+CORPUS_MEMORY_BUDGET_MB = float(os.getenv("CORPUS_MEMORY_BUDGET_MB", "2048"))
+
+# === FAISS index (built by retriever.py) ===
+INDEX_DIMENSIONS = int(os.getenv("INDEX_DIMENSIONS", "0"))  # 0 = full size; fewer = truncated + renormalized
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "float32")  # "float32" | "float16" | "int8"
+# Serve the two-stage index (binary coarse search + float rerank) built with
+# `retriever.py --binary`; corpora without an up-to-date one use their float index
+INDEX_BINARY = os.getenv("INDEX_BINARY", "0") == "1"
+
+# === Ingestion service (POST /ingest + watched raw folder, background worker processes) ===
+INGEST_DIR = os.getenv("INGEST_DIR", "src/data/ingest")  # persisted jobs and their work files
+INGEST_WATCH_DIR = os.getenv("INGEST_WATCH_DIR", "src/data/raw")
+INGEST_WATCH = os.getenv("INGEST_WATCH", "1") == "1"
+INGEST_POLL_S = float(os.getenv("INGEST_POLL_S", "5"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))  # worker processes, i.e. concurrent jobs
+INGEST_NICE = int(os.getenv("INGEST_NICE", "10"))  # workers run below the API's CPU priority
+INGEST_RESIZE = os.getenv("INGEST_RESIZE", "1") == "1"  # token-size chunks like merge_chunks.py
+INGEST_MAX_UPLOAD_MB = float(os.getenv("INGEST_MAX_UPLOAD_MB", "100"))  # larger uploads get 413
+# The /ingest endpoints are off unless a token is set; clients send `Authorization: Bearer <token>`
+INGEST_API_TOKEN = os.getenv("INGEST_API_TOKEN", "")
+
+# === Sharded retrieval (shard workers listen on TCP, local or remote) ===
+SHARD_DIR = os.getenv("SHARD_DIR", "src/data/shards")
+# Shared secret of shard workers and clients; needed to serve a shard by hand or beyond
+# localhost. Workers started by the API itself use a random per-process key when unset.
+SHARD_AUTHKEY = os.getenv("SHARD_AUTHKEY", "").encode("utf-8")
+
+# === Hybrid retrieval (BM25 + vectors, fused with reciprocal-rank fusion) ===
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "0") == "1"  # opt-in
+HYBRID_CANDIDATES = 20  # Candidates taken from each ranking before fusion
+RRF_K = 60
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Lexical-only fast path: answer without embedding the question when the top BM25
+# hit contains every query term and clearly beats the runner-up
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "0") == "1"
+LEXICAL_MIN_MARGIN = float(os.getenv("LEXICAL_MIN_MARGIN", "1.5"))
+LEXICAL_MIN_TERMS = 2
+
+# === Extractive fast path (numeric Key Metrics / Impact lookups, no LLM call) ===
+EXTRACTIVE_FAST_PATH = os.getenv("EXTRACTIVE_FAST_PATH", "0") == "1"
+EXTRACTIVE_MIN_SIMILARITY = float(os.getenv("EXTRACTIVE_MIN_SIMILARITY", "0.75"))
+EXTRACTIVE_MIN_TERM_OVERLAP = 2  # Question terms that must appear around the number
+
+# === Admission control for /ask ===
+ADMISSION_MAX_REQUESTS = int(os.getenv("ADMISSION_MAX_REQUESTS", "64"))  # /ask requests in flight
+ADMISSION_EMBED_CONCURRENCY = int(os.getenv("ADMISSION_EMBED_CONCURRENCY", "16"))
+ADMISSION_CHAT_CONCURRENCY = int(os.getenv("ADMISSION_CHAT_CONCURRENCY", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))  # waiting calls per gate
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "2"))
+
+# === Chunking log (pdf_chunk_logger's file, relative to the working directory) ===
+CHUNK_LOG_PATH = os.getenv("CHUNK_LOG_PATH", "logs/pdf_chunk.log")
+
+# === Q&A log (structured JSONL, written in the background) ===
+QA_LOG_PATH = os.getenv("QA_LOG_PATH", "src/logs/QA.jsonl")
+QA_LOG_MAX_BYTES = int(os.getenv("QA_LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # 0 = no size rotation
+QA_LOG_ROTATE_WHEN = os.getenv("QA_LOG_ROTATE_WHEN", "")  # "" | "H" (hourly) | "D" (daily)
+QA_LOG_BACKUPS = int(os.getenv("QA_LOG_BACKUPS", "10"))
+
+# === Profiling (off by default) ===
+# "off" | "header" (requests sending `X-Profile: 1`) | "sample" (PROFILE_SAMPLE_RATE of requests) | "all"
+PROFILE_MODE = os.getenv("PROFILE_MODE", "off")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "src/logs/profiles")
+
 PAGES_TO_USE_PDF_2020 = [page for page in range(3, 14)] + [
     page for page in range(15, 18)
 ]
@@ -0,0 +1,189 @@
+# corpus_registry.py
+# Lazily loaded chunk stores + indexes of several corpora, kept in an LRU under a
+# memory budget. Idle corpora are evicted when loading another one exceeds it.
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+from config import (
+    CORPORA_DIR,
+    CORPUS_MEMORY_BUDGET_MB,
+    DEFAULT_CORPUS,
+    DEFAULT_CORPUS_CHUNKS_PATH,
+    DEFAULT_CORPUS_INDEX_PATH,
+    DEFAULT_CORPUS_LEXICAL_PATH,
+    HYBRID_RETRIEVAL,
+    INDEX_BINARY,
+)
+from jsonl_io import read_jsonl
+from metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_FILENAME = "merged_chunks.jsonl"
+INDEX_FILENAME = "faiss_index.faiss"
+LEXICAL_FILENAME = "bm25_index.bin"
+
+CORPUS_LOADS = Counter("rag_corpus_loads_total", "Corpus loads, by corpus.", ("corpus",))
+CORPUS_EVICTIONS = Counter("rag_corpus_evictions_total", "Corpus evictions, by corpus.", ("corpus",))
+CORPUS_RESIDENT_BYTES = Gauge(
+    "rag_corpus_resident_bytes", "Estimated resident size of loaded corpora.", ("corpus",)
+)
+
+
+class UnknownCorpus(KeyError):
+    pass
+
+
+@dataclass
+class CorpusPaths:
+    chunks: str
+    index: str
+    lexical: str | None = None
+
+
+@dataclass
+class LoadedCorpus:
+    name: str
+    chunks: list[dict]
+    index: faiss.Index
+    resident_bytes: int
+    lexical: BM25Index | None = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+def estimate_resident_bytes(chunks_path: str, index: faiss.Index, lexical: BM25Index | None = None) -> int:
+    """Index codes plus roughly twice the JSONL size for the parsed chunk dicts (plus BM25 postings)."""
+    code_size = getattr(index, "code_size", index.d * 4)
+    postings = lexical.doc_ids.nbytes + lexical.tfs.nbytes + lexical.impacts.nbytes if lexical else 0
+    return int(index.ntotal * code_size + 2 * os.path.getsize(chunks_path) + postings)
+
+
+def discover_corpora(corpora_dir: str = CORPORA_DIR) -> dict[str, CorpusPaths]:
+    corpora = {
+        DEFAULT_CORPUS: CorpusPaths(
+            DEFAULT_CORPUS_CHUNKS_PATH, DEFAULT_CORPUS_INDEX_PATH, DEFAULT_CORPUS_LEXICAL_PATH
+        )
+    }
+    if os.path.isdir(corpora_dir):
+        for name in sorted(os.listdir(corpora_dir)):
+            chunks = os.path.join(corpora_dir, name, CHUNKS_FILENAME)
+            index = os.path.join(corpora_dir, name, INDEX_FILENAME)
+            if os.path.exists(chunks) and os.path.exists(index):
+                corpora[name] = CorpusPaths(chunks, index, os.path.join(corpora_dir, name, LEXICAL_FILENAME))
+    return corpora
+
+
+class CorpusRegistry:
+    """
+    Thread-safe LRU of loaded corpora.
+    `get(name)` loads a corpus on first use and evicts the least recently used
+    other corpora while the total estimated size exceeds `budget_bytes`.
+    """
+
+    def __init__(self, corpora: dict[str, CorpusPaths] | None = None, budget_mb: float = CORPUS_MEMORY_BUDGET_MB):
+        self.corpora = corpora if corpora is not None else discover_corpora()
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._loaded: OrderedDict[str, LoadedCorpus] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def register(self, name: str, chunks_path: str, index_path: str, lexical_path: str | None = None):
+        with self._lock:
+            self.corpora[name] = CorpusPaths(chunks_path, index_path, lexical_path)
+
+    def get(self, name: str) -> LoadedCorpus:
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name]
+            if name not in self.corpora:
+                raise UnknownCorpus(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Loading happens outside the registry lock: other corpora stay servable
+        with load_lock:
+            with self._lock:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                    return self._loaded[name]
+            corpus = self._load(name, self.corpora[name])
+            with self._lock:
+                self._loaded[name] = corpus
+                self._evict(keep=name)
+            return corpus
+
+    def refresh(self, name: str, replace_files: Callable[[], None] | None = None) -> LoadedCorpus | None:
+        """
+        Reload a corpus whose files were rebuilt and swap it in. Requests already
+        holding the old copy finish on it; a corpus that is not loaded is left to
+        load lazily from the new files. `replace_files` moves rebuilt files in place
+        first, while no load of the corpus can read a mix of old and new files.
+        """
+        with self._lock:
+            if name not in self.corpora:
+                raise UnknownCorpus(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            if replace_files is not None:
+                replace_files()
+            with self._lock:
+                if name not in self._loaded:
+                    return None
+            corpus = self._load(name, self.corpora[name])
+            with self._lock:
+                self._loaded[name] = corpus
+                self._loaded.move_to_end(name)
+                self._evict(keep=name)
+            return corpus
+
+    def _load(self, name: str, paths: CorpusPaths) -> LoadedCorpus:
+        from lexical import BM25Index  # numpy, kept off the API startup path
+        from retriever import load_search_index
+
+        start = time.perf_counter()
+        chunks = list(read_jsonl(paths.chunks))
+        index = load_search_index(paths.index, INDEX_BINARY)
+        lexical = None
+        if HYBRID_RETRIEVAL:
+            # A corpus without a persisted BM25 index (or a stale one) gets one built in memory
+            lexical = BM25Index.load_for(chunks, paths.lexical)
+        resident = estimate_resident_bytes(paths.chunks, index, lexical)
+        CORPUS_LOADS.inc(corpus=name)
+        CORPUS_RESIDENT_BYTES.set(resident, corpus=name)
+        logger.info(
+            f"📥 Loaded corpus `{name}` ({index.ntotal} vectors, ~{resident / 1e6:.1f} MB) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return LoadedCorpus(name, chunks, index, resident, lexical)
+
+    def _evict(self, keep: str):
+        """Drop least recently used corpora until the budget holds (caller holds the lock)."""
+        while self.resident_bytes() > self.budget_bytes and len(self._loaded) > 1:
+            victim = next(n for n in self._loaded if n != keep)
+            evicted = self._loaded.pop(victim)
+            CORPUS_EVICTIONS.inc(corpus=victim)
+            CORPUS_RESIDENT_BYTES.set(0, corpus=victim)
+            logger.info(f"♻️ Evicted corpus `{victim}` (~{evicted.resident_bytes / 1e6:.1f} MB)")
+
+    def resident_bytes(self) -> int:
+        return sum(c.resident_bytes for c in self._loaded.values())
+
+    def status(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "corpus": name,
+                    "loaded": name in self._loaded,
+                    "resident_bytes": self._loaded[name].resident_bytes if name in self._loaded else 0,
+                }
+                for name in self.corpora
+            ]
@@ -0,0 +1,131 @@
+# dedup.py
+# Near-duplicate chunk detection (MinHash + LSH) before embedding.
+
+import logging
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.85
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_content(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s%]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Word n-grams of the normalized text (the text itself if it is shorter)."""
+    words = normalize_content(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _permutations(num_perm: int, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, np.iinfo(np.int32).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+    b = rng.randint(0, np.iinfo(np.int32).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+    return a, b
+
+
+def minhash_signature(shingle_set: set[str], a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """MinHash signature of a shingle set, vectorized over all permutations."""
+    if not shingle_set:
+        return np.full(len(a), _MAX_HASH, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set),
+    )
+    permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _occurrence(chunk: dict) -> dict:
+    return {
+        "source": chunk.get("source"),
+        "page": chunk.get("page"),
+        "header": chunk.get("header", ""),
+    }
+
+
+def dedupe_chunks(
+    chunks: list[dict],
+    threshold: float = SIMILARITY_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> tuple[list[dict], dict]:
+    """
+    Collapse near-duplicate chunks into one canonical chunk.
+
+    Candidate pairs come from LSH banding of MinHash signatures and are kept when
+    their estimated Jaccard similarity reaches `threshold`. The first chunk of
+    each cluster is the canonical one; it gets an `occurrences` list with the
+    source/page/header of every member, so citations can still list all of them.
+
+    Returns (canonical_chunks, report).
+    """
+    rows = num_perm // bands
+    a, b = _permutations(num_perm)
+    signatures = np.stack(
+        [minhash_signature(shingles(c.get("content", "")), a, b) for c in chunks]
+    ) if chunks else np.empty((0, num_perm), dtype=np.uint64)
+
+    parent = list(range(len(chunks)))
+    for band in range(bands):
+        buckets = defaultdict(list)
+        band_sig = signatures[:, band * rows : (band + 1) * rows]
+        for i, row in enumerate(band_sig):
+            if chunks[i].get("content"):
+                buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = _find(parent, first), _find(parent, other)
+                if root_a == root_b:
+                    continue
+                similarity = float(np.mean(signatures[first] == signatures[other]))
+                if similarity >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for i in range(len(chunks)):
+        clusters[_find(parent, i)].append(i)
+
+    canonical = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        chunk = dict(chunks[root])
+        chunk["occurrences"] = [_occurrence(chunks[i]) for i in members]
+        canonical.append(chunk)
+
+    report = {
+        "input_chunks": len(chunks),
+        "output_chunks": len(canonical),
+        "collapsed": len(chunks) - len(canonical),
+        "reduction": (1 - len(canonical) / len(chunks)) if chunks else 0.0,
+    }
+    logger.info(
+        f"🧹 Dedup: {report['input_chunks']} → {report['output_chunks']} chunks "
+        f"({report['reduction']:.1%} smaller)"
+    )
+    return canonical, report
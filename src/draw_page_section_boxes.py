@@ -1,52 +1,120 @@
+# draw_page_section_boxes.py
+# Draw template section boxes on rendered PDF pages to validate coordinates.
+# Rendered pages are cached on disk (keyed by PDF content hash, page and DPI), so
+# trying another SECTION_COORDINATES_DICT only re-draws boxes on cached images.
+#
+#   python src/draw_page_section_boxes.py --pdf data/raw/sr_2023_cb_v.pdf --templates 2022 2023
+
+import argparse
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 
-import fitz  # PyMuPDF
 from PIL import Image, ImageDraw, ImageFont
 
-from config import SECTION_COORDINATES_DICT_PDF_2022, SECTION_COORDINATES_DICT_PDF_2023
+import config
+from config import PAGES_TO_USE_PDF_2023
 
+DPI = 150
+TEMPLATE_DPI = 150  # SECTION_COORDINATES_DICT_* in config.py are pixels at this DPI
+OUTPUT_DIR = "section_boxes"
+PIXMAP_CACHE_DIR = os.path.join(OUTPUT_DIR, ".pixmap_cache")
+FONT_SIZE = 24
 
-def draw_section_boxes_on_pdf_page(pdf_path, page_index, section_coordinates_dict):
+# 🎨 Pastel renkler (RGB) — 8 adet
+PASTEL_COLORS = [
+    (35, 87, 188),
+    (251, 180, 15),
+    (213, 33, 39),
+    (47, 187, 179),
+    (115, 59, 151),
+    (7, 177, 81),
+    (243, 102, 33),
+    (76, 72, 155),
+]
+
+
+def pdf_hash(pdf_path: str) -> str:
+    """Content hash of the PDF: a revised file never reuses stale renders."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def cached_page_path(digest: str, page_index: int, dpi: int = DPI, cache_dir: str = PIXMAP_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{digest}_p{page_index}_{dpi}dpi.png")
+
+
+def _render_pages(pdf_path: str, digest: str, page_indexes: list[int], dpi: int, cache_dir: str) -> list[str]:
+    """Render pages of one PDF into the cache, opening the document once."""
+    import fitz  # PyMuPDF
+
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in page_indexes:
+            path = cached_page_path(digest, page_index, dpi, cache_dir)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            doc[page_index - 1].get_pixmap(dpi=dpi).save(tmp, output="png")
+            os.replace(tmp, path)
+            paths.append(path)
+    return paths
+
+
+def render_pages(
+    pdf_path: str,
+    pages: list[int],
+    dpi: int = DPI,
+    cache_dir: str = PIXMAP_CACHE_DIR,
+    workers: int | None = None,
+) -> dict[int, str]:
     """
-    section_coordinates_dict = {
-        "social_issues": ((x0, y0), (x1, y1)),
-        ...
-    }
+    Cached page images of `pages` (1-based), rendering only the missing ones,
+    split across a process pool. Returns {page: image path}.
     """
-    # 🎨 Pastel renkler (RGB) — 8 adet
-    pastel_colors = [
-        (35, 87, 188),
-        (251, 180, 15),
-        (213, 33, 39),
-        (47, 187, 179),
-        (115, 59, 151),
-        (7, 177, 81),
-        (243, 102, 33),
-        (76, 72, 155),
-    ]
+    digest = pdf_hash(pdf_path)
+    paths = {p: cached_page_path(digest, p, dpi, cache_dir) for p in pages}
+    missing = [p for p, path in paths.items() if not os.path.exists(path)]
+    if not missing:
+        return paths
 
-    doc = fitz.open(pdf_path)
-    page = doc[page_index - 1]
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    if workers == 1:
+        _render_pages(pdf_path, digest, missing, dpi, cache_dir)
+        return paths
+    slices = [missing[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_render_pages, *zip(*[(pdf_path, digest, s, dpi, cache_dir) for s in slices])))
+    print(f"🖼️ Rendered {len(missing)} page(s) of {os.path.basename(pdf_path)} at {dpi} DPI")
+    return paths
 
-    # PDF sayfasını görüntü olarak al
-    pix = page.get_pixmap(dpi=150)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    draw = ImageDraw.Draw(img, "RGBA")
 
-    font_size = 24
+@lru_cache(maxsize=None)
+def _font():
     try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
+        return ImageFont.truetype("arial.ttf", FONT_SIZE)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def draw_sections(img: Image.Image, section_coordinates_dict: dict, scale: float = 1.0) -> Image.Image:
+    """
+    Draw every section box with its label onto `img`. Coordinates are pixels at
+    TEMPLATE_DPI; `scale` (render DPI / TEMPLATE_DPI) maps them onto the image.
+    """
+    draw = ImageDraw.Draw(img, "RGBA")
 
     # Kutuları çiz
     for idx, (section_name, (top_left, bottom_right)) in enumerate(
         section_coordinates_dict.items()
     ):
-        x0, y0 = top_left
-        x1, y1 = bottom_right
+        x0, y0 = (v * scale for v in top_left)
+        x1, y1 = (v * scale for v in bottom_right)
 
-        color = pastel_colors[idx % len(pastel_colors)]
+        color = PASTEL_COLORS[idx % len(PASTEL_COLORS)]
         fill_color = (*color, 25)  # %10 opacity
         border_color = (*color, 255)
 
@@ -54,19 +122,77 @@ def draw_section_boxes_on_pdf_page(pdf_path, page_index, section_coordinates_dic
         draw.rectangle([x0, y0, x1, y1], fill=fill_color, outline=border_color, width=3)
 
         # Etiketi üst sol köşeye yaz (kutu dışında)
-        label_pos = (x0, max(0, y0 - font_size - 4))
-        draw.text(label_pos, section_name, fill=border_color, font=font)
+        label_pos = (x0, max(0, y0 - FONT_SIZE - 4))
+        draw.text(label_pos, section_name, fill=border_color, font=_font())
+    return img
+
+
+def _overlay(image_path: str, section_coordinates_dict: dict, output_path: str, dpi: int = DPI) -> str:
+    with Image.open(image_path) as page_img:
+        img = page_img.convert("RGB")
+    draw_sections(img, section_coordinates_dict, dpi / TEMPLATE_DPI).save(output_path)
+    return output_path
+
+
+def draw_section_boxes_on_pdf_page(pdf_path, page_index, section_coordinates_dict):
+    """
+    section_coordinates_dict = {
+        "social_issues": ((x0, y0), (x1, y1)),
+        ...
+    }
+    """
+    image_path = render_pages(pdf_path, [page_index], workers=1)[page_index]
 
     # ✅ Dosya adını otomatik belirle
     base_filename = os.path.basename(pdf_path).replace(".pdf", "")
-    output_path = f"section_boxes/{base_filename}_page{page_index}_sections.jpg"
-    img.save(output_path)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = f"{OUTPUT_DIR}/{base_filename}_page{page_index}_sections.jpg"
+    _overlay(image_path, section_coordinates_dict, output_path)
     print(f"✅ Saved marked page to: {output_path}")
 
 
-if __name__ == "__main__":
-    draw_section_boxes_on_pdf_page(
-        pdf_path=r"data\raw\sr_2023_cb_v.pdf",
-        page_index=17,
-        section_coordinates_dict=SECTION_COORDINATES_DICT_PDF_2023,
+def draw_section_boxes_on_pages(
+    pdf_path: str,
+    pages: list[int],
+    templates: dict[str, dict],
+    dpi: int = DPI,
+    workers: int | None = None,
+    output_dir: str = OUTPUT_DIR,
+) -> list[str]:
+    """
+    Batch mode: render `pages` once (cached) and overlay each named template on them.
+    Writes <pdf>_page<N>_<template>_sections.jpg and returns the written paths.
+    """
+    images = render_pages(pdf_path, pages, dpi, workers=workers)
+    base_filename = os.path.basename(pdf_path).replace(".pdf", "")
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (images[page], coords, os.path.join(output_dir, f"{base_filename}_page{page}_{name}_sections.jpg"), dpi)
+        for name, coords in templates.items()
+        for page in pages
+    ]
+    # PIL decodes / encodes without holding the GIL, threads are enough here
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        written = list(pool.map(lambda job: _overlay(*job), jobs))
+    print(f"✅ Saved {len(written)} marked page(s) to: {output_dir}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw template section boxes on PDF pages")
+    parser.add_argument("--pdf", default=os.path.join("data", "raw", "sr_2023_cb_v.pdf"))
+    parser.add_argument("--pages", type=int, nargs="+", default=PAGES_TO_USE_PDF_2023)
+    parser.add_argument(
+        "--templates", nargs="+", default=["2023"],
+        help="Years of SECTION_COORDINATES_DICT_PDF_<year> in config.py to overlay",
     )
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    templates = {year: getattr(config, f"SECTION_COORDINATES_DICT_PDF_{year}") for year in args.templates}
+    draw_section_boxes_on_pages(args.pdf, args.pages, templates, args.dpi, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,12 @@
 # embedding.py
-import json
-import os
 import logging
 from typing import List, Dict
 from pathlib import Path
-from tqdm import tqdm
-from openai import OpenAI
-from dotenv import load_dotenv
 
-# Load environment variables (like OPENAI_API_KEY)
-load_dotenv()
+from config import EMBED_DIMENSIONS
+from jsonl_io import read_chunks, write_jsonl
+from llm_backend import get_backend
+from utils import chunk_id, content_hash
 
 # Configure logger
 logging.basicConfig(level=logging.INFO, format="📘 [%(levelname)s] %(message)s")
@@ -18,52 +15,57 @@ logger = logging.getLogger(__name__)
 # === Constants ===
 CHUNKS_PATH = "src/data/merged_chunks.jsonl"
 EMBEDDINGS_PATH = "src/data/embeddings.jsonl"
-EMBED_MODEL = "text-embedding-3-small"
 
-# === Init OpenAI client ===
-client = OpenAI()
 
 def load_chunks(path: str) -> List[Dict]:
     """Load JSONL chunks from file."""
     logger.info(f"📥 Loading chunks from: {path}")
-    chunks = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            # Skip chunks with empty content
-            if not obj.get("content"):
-                continue
-            chunks.append(obj)
+    # Skip chunks with empty content
+    chunks = [c for c in read_chunks(path) if c.get("content")]
     logger.info(f"✅ Loaded {len(chunks)} valid chunks.")
     return chunks
 
 
-def embed_chunk(content: str) -> List[float]:
-    """Embed a single chunk using OpenAI API."""
-    response = client.embeddings.create(input=content, model=EMBED_MODEL)
-    return response.data[0].embedding
+def embed_chunk(content: str, dimensions: int = EMBED_DIMENSIONS) -> List[float]:
+    """Embed a single chunk using the configured backend."""
+    return get_backend().embed([content], dimensions=dimensions)[0]
+
+
+def embedding_record(chunk: Dict, vector: List[float]) -> Dict:
+    """Embedding store record: the vector plus the chunk's metadata."""
+    return {
+        "embedding": vector,
+        "metadata": {
+            "main_title_of_page": chunk.get("main_title_of_page", ""),
+            "main_subtitle_of_page": chunk.get("main_subtitle_of_page", ""),
+            "header": chunk.get("header", ""),
+            "page": chunk.get("page"),
+            "source": chunk.get("source"),
+            "chunk_id": chunk_id(chunk),
+            "content_hash": content_hash(chunk),
+            "occurrences": chunk.get("occurrences", []),
+            **{
+                key: chunk[key]
+                for key in ("parent_id", "part", "parts", "packed_from")
+                if key in chunk
+            },
+        }
+    }
 
 
 def embed_chunks(chunks: List[Dict]) -> List[Dict]:
-    """Embed all chunks with metadata."""
+    """
+    Embed all chunks with metadata, in memory.
+    Failed chunks are logged and left out; full-corpus runs go through
+    `embedding_jobs` instead, which journals progress and retries failures.
+    """
+    from tqdm import tqdm
+
     logger.info("🚀 Starting embedding process...")
     embedded = []
     for chunk in tqdm(chunks):
         try:
-            vector = embed_chunk(chunk["content"])
-            embedded.append({
-                "embedding": vector,
-                "metadata": {
-                    "main_title_of_page": chunk.get("main_title_of_page", ""),
-                    "main_subtitle_of_page": chunk.get("main_subtitle_of_page", ""),
-                    "header": chunk.get("header", ""),
-                    "page": chunk.get("page"),
-                    "source": chunk.get("source"),
-                }
-            })
+            embedded.append(embedding_record(chunk, embed_chunk(chunk["content"])))
         except Exception as e:
             logger.warning(f"⚠️ Failed to embed chunk on page {chunk.get('page')}: {e}")
     logger.info(f"✅ Embedded {len(embedded)} chunks.")
@@ -72,11 +74,7 @@ def embed_chunks(chunks: List[Dict]) -> List[Dict]:
 
 def save_embeddings(vectors: List[Dict], path: str):
     """Save embeddings as JSONL."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for vec in vectors:
-            json.dump(vec, f)
-            f.write("\n")
+    write_jsonl(path, vectors)
     logger.info(f"💾 Embeddings saved to: {path}")
 
 
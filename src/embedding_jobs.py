@@ -0,0 +1,239 @@
+# embedding_jobs.py
+# Crash-resumable embedding runs. Every finished batch is appended (and fsynced) to
+# a journal in the job directory; chunks that fail go to a retry queue with their
+# error. Re-running the job embeds only what is not journaled yet, and `finalize`
+# refuses to write the embedding store while any chunk is still missing.
+#
+#   python src/embedding_jobs.py run      # start, or resume after a crash
+#   python src/embedding_jobs.py retry    # re-try only the failed chunks (attempt counts start over)
+#   python src/embedding_jobs.py status
+#   python src/embedding_jobs.py finalize # write embeddings.jsonl
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+
+from config import EMBED_BATCH_SIZE, EMBED_DIMENSIONS, EMBED_JOB_DIR, EMBED_MAX_ATTEMPTS
+from embedding import CHUNKS_PATH, EMBEDDINGS_PATH, embedding_record, load_chunks
+from jsonl_io import write_jsonl
+from llm_backend import get_backend
+from utils import chunk_id, chunk_key, content_hash  # chunk_key: journal key, edited chunks are re-embedded
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE = "job.json"
+JOURNAL_FILE = "journal.jsonl"
+FAILED_FILE = "failed.jsonl"
+
+
+class IncompleteEmbeddingJob(RuntimeError):
+    pass
+
+
+def _write_atomic(path: str, lines: list[str]):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class EmbeddingJob:
+    """
+    One embedding run over a chunk store, persisted in `job_dir`:
+    job.json (parameters), journal.jsonl (finished records) and
+    failed.jsonl (retry queue with error details and attempt counts).
+    """
+
+    def __init__(
+        self,
+        job_dir: str = EMBED_JOB_DIR,
+        chunks_path: str | None = None,
+        dimensions: int = EMBED_DIMENSIONS,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_attempts: int = EMBED_MAX_ATTEMPTS,
+    ):
+        self.job_dir = job_dir
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.journal_path = os.path.join(job_dir, JOURNAL_FILE)
+        self.failed_path = os.path.join(job_dir, FAILED_FILE)
+        os.makedirs(job_dir, exist_ok=True)
+
+        job_path = os.path.join(job_dir, JOB_FILE)
+        if os.path.exists(job_path):
+            with open(job_path, "r", encoding="utf-8") as f:
+                job = json.load(f)
+            if job["dimensions"] != dimensions or chunks_path not in (None, job["chunks_path"]):
+                raise ValueError(
+                    f"Job in {job_dir} embeds {job['chunks_path']} with {job['dimensions']} dimensions"
+                )
+        else:
+            job = {
+                "chunks_path": chunks_path or CHUNKS_PATH,
+                "dimensions": dimensions,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            _write_atomic(job_path, [json.dumps(job, indent=2)])
+        self.chunks_path = job["chunks_path"]
+        self.dimensions = job["dimensions"]
+        self.chunks = load_chunks(self.chunks_path)
+        self.done = self._load_journal()
+        self.failed = self._load_failed()
+
+    def _load_journal(self) -> dict[str, dict]:
+        """Journaled records by key; a torn last line from a crash is cut off."""
+        done, good_bytes = {}, 0
+        if not os.path.exists(self.journal_path):
+            return done
+        with open(self.journal_path, "rb") as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                if not raw.endswith(b"\n"):
+                    break
+                done[entry["key"]] = entry["record"]
+                good_bytes += len(raw)
+        if good_bytes < os.path.getsize(self.journal_path):
+            logger.warning(f"⚠️ Truncating torn journal tail in {self.journal_path}")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_bytes)
+        return done
+
+    def _load_failed(self) -> dict[str, dict]:
+        if not os.path.exists(self.failed_path):
+            return {}
+        with open(self.failed_path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return {e["key"]: e for e in entries if e["key"] not in self.done}
+
+    def _commit(self, records: dict[str, dict], errors: dict[str, tuple[dict, str]]):
+        """Append finished records to the journal and rewrite the retry queue."""
+        if records:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for key, record in records.items():
+                    f.write(json.dumps({"key": key, "record": record}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.update(records)
+        for key in records:
+            self.failed.pop(key, None)
+        for key, (chunk, error) in errors.items():
+            attempts = self.failed.get(key, {}).get("attempts", 0) + 1
+            self.failed[key] = {
+                "key": key,
+                "chunk_id": chunk_id(chunk),
+                "source": chunk.get("source"),
+                "page": chunk.get("page"),
+                "error": error,
+                "attempts": attempts,
+                "last_attempt": datetime.now().isoformat(timespec="seconds"),
+            }
+        if records or errors:
+            _write_atomic(self.failed_path, [json.dumps(e) + "\n" for e in self.failed.values()])
+
+    def _embed_batch(self, batch: list[tuple[str, dict]]):
+        backend = get_backend()
+        try:
+            vectors = backend.embed([c["content"] for _, c in batch], dimensions=self.dimensions)
+            return {key: embedding_record(c, v) for (key, c), v in zip(batch, vectors)}, {}
+        except Exception as e:
+            if len(batch) == 1:
+                key, chunk = batch[0]
+                return {}, {key: (chunk, f"{type(e).__name__}: {e}")}
+        # Batch failed: embed one by one so a single bad chunk does not sink the rest
+        records, errors = {}, {}
+        for item in batch:
+            ok, failed = self._embed_batch([item])
+            records.update(ok)
+            errors.update(failed)
+        return records, errors
+
+    def pending(self, only_failed: bool = False) -> list[tuple[str, dict]]:
+        """Chunks still to embed; failed chunks that used up their attempts are skipped (until `retry`)."""
+        todo, seen = [], set()
+        for chunk in self.chunks:
+            key = chunk_key(chunk)
+            if key in self.done or key in seen:
+                continue
+            failure = self.failed.get(key)
+            if only_failed and failure is None:
+                continue
+            if failure is not None and failure["attempts"] >= self.max_attempts:
+                continue
+            seen.add(key)
+            todo.append((key, chunk))
+        return todo
+
+    def run(self, only_failed: bool = False) -> dict:
+        """Embed every pending chunk batch by batch, committing each batch."""
+        todo = self.pending(only_failed)
+        logger.info(f"🚀 Embedding {len(todo)} chunks ({len(self.done)} already journaled)")
+        for start in range(0, len(todo), self.batch_size):
+            records, errors = self._embed_batch(todo[start:start + self.batch_size])
+            self._commit(records, errors)
+            for key, (chunk, error) in errors.items():
+                logger.warning(f"⚠️ Failed to embed chunk on page {chunk.get('page')}: {error}")
+        status = self.status()
+        logger.info(f"✅ Embedding job: {status}")
+        return status
+
+    def retry(self) -> dict:
+        """Re-try every failed chunk, also those that used up their attempts: their count starts over."""
+        for failure in self.failed.values():
+            failure["attempts"] = 0
+        return self.run(only_failed=True)
+
+    def status(self) -> dict:
+        keys = {chunk_key(c) for c in self.chunks}
+        done = len(keys & self.done.keys())
+        failed = len(keys & self.failed.keys())
+        exhausted = sum(
+            1 for k in keys & self.failed.keys() if self.failed[k]["attempts"] >= self.max_attempts
+        )
+        return {
+            "total": len(keys),
+            "done": done,
+            "failed": failed,
+            "exhausted": exhausted,
+            "pending": len(keys) - done - failed,
+        }
+
+    def finalize(self, output_path: str = EMBEDDINGS_PATH) -> int:
+        """Write the embedding store in chunk order; raises if any chunk has no vector."""
+        missing = [c for c in self.chunks if chunk_key(c) not in self.done]
+        if missing:
+            raise IncompleteEmbeddingJob(
+                f"{len(missing)} of {len(self.chunks)} chunks have no embedding "
+                f"({len(self.failed)} in the retry queue: {self.failed_path})"
+            )
+        write_jsonl(output_path, (self.done[chunk_key(c)] for c in self.chunks))
+        logger.info(f"💾 Embeddings saved to: {output_path}")
+        return len(self.chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Journaled, resumable embedding jobs")
+    parser.add_argument("command", choices=["run", "retry", "status", "finalize"])
+    parser.add_argument("--job-dir", default=EMBED_JOB_DIR)
+    parser.add_argument("--chunks", help=f"Chunk store of a new job (default: {CHUNKS_PATH})")
+    parser.add_argument("--output", default=EMBEDDINGS_PATH)
+    args = parser.parse_args()
+
+    job = EmbeddingJob(args.job_dir, args.chunks)
+    if args.command == "run":
+        job.run()
+    elif args.command == "retry":
+        job.retry()
+    elif args.command == "finalize":
+        job.finalize(args.output)
+    print(json.dumps(job.status(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+# ingest_service.py
+# Background ingestion of report PDFs. A PDF uploaded via POST /ingest or dropped
+# into the watched raw folder becomes a job persisted under INGEST_DIR. A bounded
+# pool of worker processes chunks and embeds it, merges it into the corpus store
+# and rebuilds the FAISS + BM25 indexes; the API process then swaps the rebuilt
+# corpus into the registry. The heavy work runs in separate, lower-priority
+# processes, so /ask never waits on it (nor on the GIL it would hold).
+#
+# Job stages: chunking → embedding → indexing (worker process) → publishing (API process)
+
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+
+import config
+from config import (
+    CORPORA_DIR,
+    DEFAULT_CORPUS,
+    DEFAULT_CORPUS_CHUNKS_PATH,
+    DEFAULT_CORPUS_INDEX_PATH,
+    DEFAULT_CORPUS_LEXICAL_PATH,
+    INDEX_BINARY,
+    INDEX_DIMENSIONS,
+    INGEST_DIR,
+    INGEST_NICE,
+    INGEST_POLL_S,
+    INGEST_RESIZE,
+    INGEST_WATCH_DIR,
+    INGEST_WORKERS,
+)
+from corpus_registry import CHUNKS_FILENAME, INDEX_FILENAME, LEXICAL_FILENAME, CorpusPaths, CorpusRegistry
+from jsonl_io import read_chunks, read_jsonl, write_jsonl
+from metrics import INGEST_STAGE_SECONDS
+from utils import chunk_key, record_key
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILENAME = "embeddings.jsonl"
+STAGES = ("chunking", "embedding", "indexing", "publishing")
+SPLIT_LAYOUTS = {"2022"}  # their chunker expects double-page spreads split into pages
+CORPUS_NAME = re.compile(r"[A-Za-z0-9_-]+")  # corpus names become directory names
+
+
+class UnknownLayout(ValueError):
+    pass
+
+
+# === Layouts: which chunker reads a report ===
+
+
+def chunk_plain_pages(pdf_path: str, pages: list[int]) -> list[dict]:
+    """Fallback for layouts without rules yet: one chunk per page, its first line as the title."""
+    import fitz  # PyMuPDF
+
+    from utils import clean_text
+
+    chunks = []
+    with fitz.open(pdf_path) as doc:
+        for page_num in pages:
+            lines = [line.strip() for line in doc[page_num - 1].get_text().splitlines() if line.strip()]
+            if not lines:
+                continue
+            chunks.append(
+                {
+                    "main_title_of_page": lines[0],
+                    "main_subtitle_of_page": "",
+                    "header": "",
+                    "content": clean_text(" ".join(lines[1:]) or lines[0]),
+                    "page": page_num,
+                    "source": os.path.basename(pdf_path),
+                }
+            )
+    return chunks
+
+
+def _template_chunker(year: int):
+    def chunker(pdf_path: str, pages: list[int]) -> list[dict]:
+        from pdf_chunker_by_template import extract_chunks_by_template, px2pt
+
+        coords_px = getattr(config, f"SECTION_COORDINATES_DICT_PDF_{year}")
+        coords_pt = {key: (px2pt(tl), px2pt(br)) for key, (tl, br) in coords_px.items()}
+        return extract_chunks_by_template(pdf_path, pages, coords_pt)
+
+    return chunker
+
+
+def _span_chunker(module_name: str):
+    def chunker(pdf_path: str, pages: list[int]) -> list[dict]:
+        import importlib
+        import tempfile
+
+        # The span-based chunkers write their output file instead of returning chunks
+        with tempfile.TemporaryDirectory() as tmp:
+            output_path = os.path.join(tmp, "chunks.jsonl")
+            importlib.import_module(module_name).extract_chunks(pdf_path, pages, output_path)
+            return list(read_jsonl(output_path)) if os.path.exists(output_path) else []
+
+    return chunker
+
+
+LAYOUTS = {
+    "2020": _span_chunker("pdf_2020_chunker_by_span_analysis"),
+    "2022": _template_chunker(2022),
+    "2023": _template_chunker(2023),
+    "2024": _span_chunker("pdf_2024_chunker_by_span_analysis"),
+    "pages": chunk_plain_pages,
+}
+
+
+def detect_layout(pdf_path: str) -> str:
+    """Report year from names like sr_2023_cb_v.pdf, "pages" for anything else."""
+    match = re.search(r"_(\d{4})_", os.path.basename(pdf_path))
+    return match.group(1) if match and match.group(1) in LAYOUTS else "pages"
+
+
+def is_split(pdf_path: str) -> bool:
+    """Output of split_double_pages_pdfs.py, e.g. data/raw/sr_2022_cb_v_split.pdf."""
+    return os.path.splitext(os.path.basename(pdf_path))[0].endswith("_split")
+
+
+def source_name(pdf_path: str, layout: str) -> str:
+    """The `source` of the chunks a job produces (split reports are chunked as <stem>_split.pdf)."""
+    name = os.path.basename(pdf_path)
+    if layout in SPLIT_LAYOUTS and not is_split(pdf_path):
+        return f"{os.path.splitext(name)[0]}_split.pdf"
+    return name
+
+
+def chunk_pdf(pdf_path: str, layout: str, work_dir: str, pages: list[int] | None = None, resize: bool = INGEST_RESIZE) -> list[dict]:
+    if layout not in LAYOUTS:
+        raise UnknownLayout(f"Unknown layout {layout!r} (known: {', '.join(LAYOUTS)})")
+    if layout in SPLIT_LAYOUTS and not is_split(pdf_path):
+        from split_double_pages_pdfs import split_double_pages_vertically
+
+        split_path = os.path.join(work_dir, source_name(pdf_path, layout))
+        split_double_pages_vertically(pdf_path, split_path)
+        pdf_path = split_path
+    if pages is None:
+        pages = getattr(config, f"PAGES_TO_USE_PDF_{layout}", None)
+    if pages is None:
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            pages = list(range(1, doc.page_count + 1))
+
+    chunks = [c for c in LAYOUTS[layout](pdf_path, pages) if c.get("content")]
+    if resize:
+        from merge_chunks import resize_by_page
+
+        chunks = list(resize_by_page(chunks))
+    return chunks
+
+
+# === Corpus stores ===
+
+
+def corpus_paths(registry: CorpusRegistry, corpus: str) -> CorpusPaths:
+    """Paths of a served corpus, or of a new one under CORPORA_DIR/<corpus>."""
+    if not CORPUS_NAME.fullmatch(corpus):
+        raise ValueError(f"Invalid corpus name {corpus!r} (letters, digits, '_' and '-' only)")
+    if corpus in registry.corpora:
+        return registry.corpora[corpus]
+    if corpus == DEFAULT_CORPUS:
+        return CorpusPaths(DEFAULT_CORPUS_CHUNKS_PATH, DEFAULT_CORPUS_INDEX_PATH, DEFAULT_CORPUS_LEXICAL_PATH)
+    directory = os.path.join(CORPORA_DIR, corpus)
+    return CorpusPaths(
+        os.path.join(directory, CHUNKS_FILENAME),
+        os.path.join(directory, INDEX_FILENAME),
+        os.path.join(directory, LEXICAL_FILENAME),
+    )
+
+
+def embeddings_path_for(paths: CorpusPaths) -> str:
+    """The embedding store sits next to the chunk store (src/data/embeddings.jsonl for the default corpus)."""
+    return os.path.join(os.path.dirname(paths.chunks), EMBEDDINGS_FILENAME)
+
+
+def _source_of(record: dict) -> str:
+    return os.path.basename(str(record.get("source", "")).replace("\\", "/"))
+
+
+def _replace(path: str, write):
+    """Write via `write(tmp_path)` and move the result over `path`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _staged(path: str) -> str:
+    return f"{path}.{os.getpid()}.staged"
+
+
+def stage_corpus(candidates: list[dict], records: list[dict], paths: CorpusPaths) -> tuple[int, dict[str, str]]:
+    """
+    Write a corpus of `candidates` and rebuild its indexes, next to the served files
+    under temporary names. Chunks are paired with `records` by chunk key, so line i
+    of the chunk store is always row i of the FAISS index; chunks without a vector
+    are dropped, and so are records without a chunk.
+    Returns the corpus size and {served path: staged path} for `commit_staged`.
+    """
+    import faiss
+    import numpy as np
+
+    from lexical import BM25Index
+    from retriever import binary_paths_for, build_faiss_index, normalize_embeddings, save_binary, truncate_embeddings
+
+    vectors = {record_key(r): r for r in records}
+    legacy = {r["metadata"].get("chunk_id"): r for r in records if "content_hash" not in r["metadata"]}
+    rows = []
+    for chunk in candidates:
+        key = chunk_key(chunk)
+        record = vectors.get(key) or legacy.get(key.split(":", 1)[0])
+        if record is not None:
+            rows.append((chunk, record))
+    if len(rows) < len(candidates):
+        logger.warning(f"⚠️ {len(candidates) - len(rows)} chunk(s) without a vector left out of the corpus")
+    if not rows:
+        raise ValueError("Nothing to publish: no chunk has a vector")
+
+    chunks = [chunk for chunk, _ in rows]
+    records = [record for _, record in rows]
+    embeddings = normalize_embeddings(np.array([r["embedding"] for r in records], dtype="float32"))
+    if INDEX_DIMENSIONS:
+        embeddings = truncate_embeddings(embeddings, INDEX_DIMENSIONS)
+    os.makedirs(os.path.dirname(paths.chunks) or ".", exist_ok=True)
+    store_path = embeddings_path_for(paths)
+    binary_paths = binary_paths_for(paths.index) if INDEX_BINARY else ()
+    staged = {path: _staged(path) for path in (paths.chunks, store_path, paths.lexical, paths.index, *binary_paths) if path}
+    write_jsonl(staged[paths.chunks], chunks)
+    write_jsonl(staged[store_path], records)
+    if paths.lexical:
+        BM25Index.build(chunks).save(staged[paths.lexical])
+    faiss.write_index(build_faiss_index(embeddings), staged[paths.index])
+    if binary_paths:  # written after the float index, so it is not taken for stale
+        save_binary(embeddings, *(staged[path] for path in binary_paths))
+    return len(chunks), staged
+
+
+def stage_source(source: str, chunks_path: str, embeddings_path: str, paths: CorpusPaths) -> tuple[int, dict[str, str]]:
+    """
+    Replace every chunk and vector of `source` in the corpus with the new ones
+    (`stage_corpus`). Returns the corpus size and the staged files.
+    """
+    store_path = embeddings_path_for(paths)
+    stored = list(read_jsonl(store_path)) if os.path.exists(store_path) else []
+    kept = list(read_jsonl(paths.chunks)) if os.path.exists(paths.chunks) else []
+    records = [r for r in stored if _source_of(r["metadata"]) != source] + list(read_jsonl(embeddings_path))
+    candidates = [c for c in kept if _source_of(c) != source] + list(read_chunks(chunks_path))
+    return stage_corpus(candidates, records, paths)
+
+
+def commit_staged(staged: dict[str, str]):
+    """
+    Move staged corpus files over the served ones. Not atomic as a whole: run it
+    where no load of the corpus can interleave (`CorpusRegistry.refresh`).
+    """
+    for path, tmp in staged.items():
+        os.replace(tmp, path)
+
+
+def publish_source(source: str, chunks_path: str, embeddings_path: str, paths: CorpusPaths) -> int:
+    """`stage_source` + `commit_staged`, for a corpus nothing is serving. Returns the corpus size."""
+    total, staged = stage_source(source, chunks_path, embeddings_path, paths)
+    commit_staged(staged)
+    logger.info(f"✅ Published {source}: corpus now has {total} chunks")
+    return total
+
+
+# === Persistent jobs ===
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def read_job(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_job(path: str, job: dict):
+    def write(tmp: str):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+    _replace(path, write)
+
+
+def update_job(path: str, **fields) -> dict:
+    job = read_job(path)
+    job.update(fields)
+    write_job(path, job)
+    return job
+
+
+@contextmanager
+def job_stage(job_path: str, name: str):
+    """Record the running stage, then its duration and the overall progress, in the job file."""
+    update_job(job_path, stage=name)
+    start = time.perf_counter()
+    yield
+    job = read_job(job_path)
+    timings = dict(job["timings"], **{name: round(time.perf_counter() - start, 3)})
+    update_job(job_path, timings=timings, progress=round((STAGES.index(name) + 1) / len(STAGES), 2))
+
+
+class IngestQueue:
+    """Ingestion jobs, one JSON file each under `ingest_dir`/jobs, with a work directory per job."""
+
+    def __init__(self, ingest_dir: str = INGEST_DIR):
+        self.ingest_dir = ingest_dir
+        self.jobs_dir = os.path.join(ingest_dir, "jobs")  # created with the first job
+        self._lock = threading.Lock()
+
+    def path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def get(self, job_id: str) -> dict | None:
+        path = self.path(os.path.basename(job_id))
+        return read_job(path) if os.path.exists(path) else None
+
+    def jobs(self) -> list[dict]:
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        jobs = [read_job(os.path.join(self.jobs_dir, n)) for n in os.listdir(self.jobs_dir) if n.endswith(".json")]
+        return sorted(jobs, key=lambda job: (job["created_at"], job["id"]))
+
+    def find(self, sha256: str, corpus: str, include_failed: bool = False) -> dict | None:
+        for job in self.jobs():
+            if job["sha256"] == sha256 and job["corpus"] == corpus and (include_failed or job["status"] != "failed"):
+                return job
+        return None
+
+    def find_source(self, source: str, corpus: str) -> dict | None:
+        """The latest job that ingested (or is ingesting) `source` into `corpus`."""
+        jobs = [job for job in self.jobs() if job["source"] == source and job["corpus"] == corpus and job["status"] != "failed"]
+        return jobs[-1] if jobs else None
+
+    def create(self, pdf_path: str, layout: str, corpus: str, paths: CorpusPaths, pages: list[int] | None = None) -> dict:
+        with self._lock:
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                "id": job_id,
+                "pdf_path": pdf_path,
+                "source": source_name(pdf_path, layout),
+                "sha256": file_sha256(pdf_path),
+                "layout": layout,
+                "pages": pages,
+                "corpus": corpus,
+                "paths": asdict(paths),
+                "work_dir": os.path.join(self.ingest_dir, "work", job_id),
+                "status": "queued",
+                "stage": None,
+                "progress": 0.0,
+                "timings": {},
+                "chunks": None,
+                "corpus_chunks": None,
+                "staged": None,
+                "error": None,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            write_job(self.path(job_id), job)
+        return job
+
+    def recover(self) -> list[dict]:
+        """Jobs to (re)run after a restart: queued ones and those interrupted while running."""
+        jobs = [job for job in self.jobs() if job["status"] in ("queued", "running")]
+        for job in jobs:
+            update_job(self.path(job["id"]), status="queued")
+        return jobs
+
+
+# === Worker process side ===
+
+
+def _lower_priority(nice: int):
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):  # not available on this platform
+        pass
+
+
+def prepare_job(job_path: str, resize: bool = INGEST_RESIZE) -> int:
+    """Chunk and embed the job's PDF. Both steps resume from the work directory after a crash."""
+    from embedding_jobs import EmbeddingJob
+
+    job = read_job(job_path)
+    work_dir = job["work_dir"]
+    os.makedirs(work_dir, exist_ok=True)
+    chunks_path = os.path.join(work_dir, CHUNKS_FILENAME)
+
+    with job_stage(job_path, "chunking"):
+        if not os.path.exists(chunks_path):
+            write_jsonl(chunks_path, chunk_pdf(job["pdf_path"], job["layout"], work_dir, job["pages"], resize))
+    with job_stage(job_path, "embedding"):
+        embedding_job = EmbeddingJob(os.path.join(work_dir, "embedding_job"), chunks_path)
+        embedding_job.run()
+        if embedding_job.failed:
+            embedding_job.retry()
+        count = embedding_job.finalize(os.path.join(work_dir, EMBEDDINGS_FILENAME))
+    update_job(job_path, chunks=count)
+    return count
+
+
+def index_job(job_path: str) -> int:
+    """Build the job's corpus files under staged names; the API process swaps them in."""
+    job = read_job(job_path)
+    with job_stage(job_path, "indexing"):
+        total, staged = stage_source(
+            job["source"],
+            os.path.join(job["work_dir"], CHUNKS_FILENAME),
+            os.path.join(job["work_dir"], EMBEDDINGS_FILENAME),
+            CorpusPaths(**job["paths"]),
+        )
+    update_job(job_path, corpus_chunks=total, staged=staged)
+    return total
+
+
+# === API process side ===
+
+
+class IngestService:
+    """
+    Runs queued jobs on `workers` worker processes (one job per process at a time)
+    and optionally polls `watch_dir` for new PDFs. Jobs of the same corpus publish
+    one after another; the registry swap is the only step done in this process.
+    """
+
+    def __init__(
+        self,
+        registry: CorpusRegistry,
+        ingest_dir: str = INGEST_DIR,
+        watch_dir: str | None = INGEST_WATCH_DIR,
+        workers: int = INGEST_WORKERS,
+        poll_s: float = INGEST_POLL_S,
+        resize: bool = INGEST_RESIZE,
+        nice: int = INGEST_NICE,
+    ):
+        self.registry = registry
+        self.queue = IngestQueue(ingest_dir)
+        self.watch_dir = watch_dir
+        self.workers = workers
+        self.poll_s = poll_s
+        self.resize = resize
+        self.nice = nice
+        self._pending: queue.Queue = queue.Queue()
+        self._pool: ProcessPoolExecutor | None = None
+        self._threads: list[threading.Thread] = []
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._corpus_locks: dict[str, threading.Lock] = {}
+        self._ignored: set[tuple[str, float]] = set()
+
+    def start(self, watch: bool = False):
+        """Start the worker pool (resuming unfinished jobs) and, with `watch`, the folder watcher."""
+        with self._lock:
+            if self._pool is None:
+                self._stop.clear()
+                # spawn: forking a process that runs server threads is not safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_lower_priority,
+                    initargs=(self.nice,),
+                )
+                for job in self.queue.recover():
+                    self._pending.put(job["id"])
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"ingest-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            if watch and self.watch_dir and self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="ingest-watch", daemon=True)
+                self._watcher.start()
+
+    def stop(self):
+        with self._lock:
+            if self._pool is None:
+                return
+            self._stop.set()
+            for _ in self._threads:
+                self._pending.put(None)
+            threads, self._threads, self._watcher = self._threads + [self._watcher], [], None
+        for thread in threads:
+            if thread is not None:
+                thread.join()
+        self._pool.shutdown()
+        self._pool = None
+
+    def submit(self, pdf_path: str, layout: str | None = None, corpus: str = DEFAULT_CORPUS, pages: list[int] | None = None) -> dict:
+        """Queue a PDF. The same file already queued or ingested into `corpus` returns the existing job."""
+        if not os.path.isfile(pdf_path):
+            raise FileNotFoundError(pdf_path)
+        layout = layout or detect_layout(pdf_path)
+        if layout not in LAYOUTS:
+            raise UnknownLayout(f"Unknown layout {layout!r} (known: {', '.join(LAYOUTS)})")
+        existing = self.queue.find(file_sha256(pdf_path), corpus)
+        if existing is not None:
+            return existing
+        job = self.queue.create(pdf_path, layout, corpus, corpus_paths(self.registry, corpus), pages)
+        logger.info(f"📥 Queued ingestion job {job['id']}: {job['source']} ({layout}) → `{corpus}`")
+        self.start()
+        self._pending.put(job["id"])
+        return job
+
+    def server_path(self, path: str) -> str:
+        """
+        A PDF already on the server, given by path. Only files inside the watched
+        folder can be ingested this way; anything else raises PermissionError.
+        """
+        if not self.watch_dir:
+            raise PermissionError("Ingesting server-side paths needs a watched folder")
+        root = os.path.realpath(self.watch_dir)
+        resolved = os.path.realpath(path)
+        if os.path.commonpath([root, resolved]) != root:
+            raise PermissionError(f"{path} is outside the watched folder")
+        return resolved
+
+    def upload_path(self, filename: str) -> str:
+        """Where an uploaded PDF is stored: the watched folder, under its own (sanitized) name."""
+        name = os.path.basename(filename.replace("\\", "/"))
+        if not name.lower().endswith(".pdf"):
+            raise ValueError(f"Not a PDF file name: {filename!r}")
+        directory = self.watch_dir or os.path.join(self.queue.ingest_dir, "uploads")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    def store_upload(self, tmp_path: str, filename: str, replace: bool = False) -> str:
+        """
+        Move an uploaded file to its `upload_path`. The same content reuses an existing
+        report; different content replaces it only with `replace` (a corrected report),
+        otherwise it raises FileExistsError.
+        """
+        path = self.upload_path(filename)
+        try:
+            os.link(tmp_path, path)  # fails instead of overwriting
+        except FileExistsError:
+            if file_sha256(path) != file_sha256(tmp_path):
+                if not replace:
+                    raise FileExistsError(
+                        f"{os.path.basename(path)} already exists with different content, "
+                        "upload it with replace=true to correct it"
+                    )
+                os.replace(tmp_path, path)
+                logger.info(f"♻️ {os.path.basename(path)} replaced by a corrected upload")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _corpus_lock(self, corpus: str) -> threading.Lock:
+        with self._lock:
+            return self._corpus_locks.setdefault(corpus, threading.Lock())
+
+    def _work(self):
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                return
+            self.run_job(job_id)
+
+    def run_job(self, job_id: str):
+        path = self.queue.path(job_id)
+        job = update_job(path, status="running", started_at=_now(), error=None)
+        try:
+            self._pool.submit(prepare_job, path, self.resize).result()
+            with self._corpus_lock(job["corpus"]):
+                self._pool.submit(index_job, path).result()
+                with job_stage(path, "publishing"):
+                    self.publish(read_job(path))
+            job = update_job(path, status="done", stage=None, finished_at=_now())
+            for stage, seconds in job["timings"].items():
+                INGEST_STAGE_SECONDS.observe(seconds, stage=stage)
+            logger.info(f"✅ Ingestion job {job_id} done: {job['timings']}")
+        except Exception as e:
+            logger.exception(f"❌ Ingestion job {job_id} failed: {e}")
+            update_job(path, status="failed", error=f"{type(e).__name__}: {e}", finished_at=_now())
+
+    def publish(self, job: dict):
+        """
+        Serve the rebuilt corpus: move its staged files in while the registry holds
+        loads of the corpus back, then register it, or reload and swap a loaded one.
+        """
+        paths = CorpusPaths(**job["paths"])
+        if job["corpus"] not in self.registry.corpora:
+            commit_staged(job["staged"])
+            self.registry.register(job["corpus"], paths.chunks, paths.index, paths.lexical)
+        else:
+            self.registry.refresh(job["corpus"], replace_files=lambda: commit_staged(job["staged"]))
+        logger.info(f"✅ Published {job['source']}: `{job['corpus']}` now has {job['corpus_chunks']} chunks")
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_s):
+            try:
+                self.scan()
+            except Exception as e:
+                logger.warning(f"⚠️ Watching {self.watch_dir} failed: {e}")
+
+    def scan(self) -> list[dict]:
+        """
+        Queue new PDFs of the watched folder into the default corpus. A file is picked
+        up once it has not changed for a poll interval; files already queued (by
+        content) are skipped. A source already in the corpus is re-ingested when a job
+        ingested it with other content; one without a job (built by the pipeline) has no
+        stored hash to compare and is skipped.
+        """
+        if not self.watch_dir or not os.path.isdir(self.watch_dir):
+            return []
+        queued, served = [], None
+        for name in sorted(os.listdir(self.watch_dir)):
+            path = os.path.join(self.watch_dir, name)
+            if not name.lower().endswith(".pdf") or not os.path.isfile(path):
+                continue
+            mtime = os.path.getmtime(path)
+            if (path, mtime) in self._ignored or time.time() - mtime < self.poll_s:
+                continue
+            self._ignored.add((path, mtime))
+            if self.queue.find(file_sha256(path), DEFAULT_CORPUS, include_failed=True):
+                continue
+            if served is None:
+                chunks_path = corpus_paths(self.registry, DEFAULT_CORPUS).chunks
+                served = {_source_of(c) for c in read_jsonl(chunks_path)} if os.path.exists(chunks_path) else set()
+            source = source_name(path, detect_layout(path))
+            if source in served and self.queue.find_source(source, DEFAULT_CORPUS) is None:
+                continue
+            queued.append(self.submit(path))
+        return queued
@@ -0,0 +1,103 @@
+# jsonl_io.py
+# Streaming JSONL reading / writing shared by every chunk and embedding store.
+# Uses orjson when it is installed (JSONL_CODEC=orjson, the default) and the
+# standard json module otherwise. Writes go to a temp file that replaces the
+# target only once complete, so readers never see a half-written store.
+
+import json
+import os
+from typing import Callable, Iterable, Iterator
+
+from config import JSONL_CODEC
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+USE_ORJSON = JSONL_CODEC == "orjson" and orjson is not None
+
+# Field types of a chunk record; the first three are required
+CHUNK_FIELDS = {
+    "content": str,
+    "page": int,
+    "source": str,
+    "header": str,
+    "main_title_of_page": str,
+    "main_subtitle_of_page": str,
+    "occurrences": list,
+    "part": int,
+    "parts": int,
+    "parent_id": str,
+    "packed_from": list,
+}
+REQUIRED_CHUNK_FIELDS = ("content", "page", "source")
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def loads(line: bytes | str):
+    return orjson.loads(line) if USE_ORJSON else json.loads(line)
+
+
+def dumps(record) -> bytes:
+    """One record as UTF-8 JSON bytes (non-ASCII kept as is), without the newline."""
+    if USE_ORJSON:
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+
+def read_jsonl(path: str, validate: Callable[[dict], list[str]] | None = None) -> Iterator[dict]:
+    """Yield the records of a JSONL file one by one, skipping blank lines."""
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = loads(line)
+            except ValueError as e:
+                raise InvalidRecord(f"{path}:{line_number}: invalid JSON ({e})") from None
+            if validate is not None:
+                errors = validate(record)
+                if errors:
+                    raise InvalidRecord(f"{path}:{line_number}: {'; '.join(errors)}")
+            yield record
+
+
+def write_jsonl(path: str, records: Iterable[dict]) -> int:
+    """Stream `records` into `path` atomically. Returns the number of records written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with open(tmp, "wb") as f:
+            for record in records:
+                f.write(dumps(record) + b"\n")
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
+
+
+def validate_chunk(chunk: dict) -> list[str]:
+    """Schema errors of a chunk record (empty when valid)."""
+    if not isinstance(chunk, dict):
+        return [f"expected an object, got {type(chunk).__name__}"]
+    errors = [f"missing `{field}`" for field in REQUIRED_CHUNK_FIELDS if field not in chunk]
+    for field, expected in CHUNK_FIELDS.items():
+        value = chunk.get(field)
+        if value is not None and not isinstance(value, expected):
+            errors.append(f"`{field}` should be {expected.__name__}, got {type(value).__name__}")
+    return errors
+
+
+def read_chunks(path: str, validate: bool = True) -> Iterator[dict]:
+    """Yield the chunks of a chunk store, checking each against the chunk schema."""
+    return read_jsonl(path, validate_chunk if validate else None)
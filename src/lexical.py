@@ -0,0 +1,208 @@
+# lexical.py
+# In-process BM25 inverted index over the chunk store. Exact product names
+# ("TradeWaltz®") and figures ("50%") score well here even when their dense
+# similarity is borderline; qa.py fuses both rankings with reciprocal-rank fusion.
+#
+# On disk the index is one compact binary file: a small JSON header, the vocabulary
+# and the postings as flat arrays (term offsets, doc ids, term frequencies, doc lengths).
+# The header carries a digest of the indexed chunk texts, so an index built from
+# another chunk store is detected at load time instead of returning wrong doc ids.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+from collections import Counter
+
+import numpy as np
+
+from config import BM25_B, BM25_K1, DEFAULT_CORPUS_CHUNKS_PATH, DEFAULT_CORPUS_LEXICAL_PATH
+from jsonl_io import read_jsonl
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BM25\x01"
+TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*%?")
+INDEXED_FIELDS = ("main_title_of_page", "main_subtitle_of_page", "header", "content")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words and figures; "TradeWaltz®" → "tradewaltz", "50%" and "3.5" kept whole."""
+    return TOKEN.findall(text.lower())
+
+
+def chunk_text(chunk: dict) -> str:
+    return " ".join(str(chunk.get(field) or "") for field in INDEXED_FIELDS)
+
+
+def chunks_digest(chunks: list[dict]) -> str:
+    """Digest of the indexed text of every chunk, in order."""
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        digest.update(chunk_text(chunk).encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a CSR inverted index. Doc ids are positions in the chunk list,
+    the same ids the FAISS index uses. Per-posting impacts are precomputed once,
+    so a query is a handful of vectorized adds.
+    """
+
+    def __init__(
+        self,
+        vocab: list[str],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        digest: str | None = None,
+    ):
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(doc_lengths)
+        self.digest = digest  # chunks_digest of the chunks it was built from
+
+        df = np.diff(offsets).astype("float32")
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype("float32")
+        avgdl = float(doc_lengths.mean()) if self.n_docs else 1.0
+        tf = tfs.astype("float32")
+        norm = k1 * (1 - b + b * doc_lengths[doc_ids].astype("float32") / (avgdl or 1.0))
+        term_of_posting = np.repeat(np.arange(len(vocab)), np.diff(offsets))
+        self.impacts = (self.idf[term_of_posting] * tf * (k1 + 1) / (tf + norm)).astype("float32")
+
+    @classmethod
+    def build(cls, chunks: list[dict], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lengths = np.zeros(len(chunks), dtype="uint32")
+        for doc, chunk in enumerate(chunks):
+            tokens = tokenize(chunk_text(chunk))
+            doc_lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype="uint32")
+        offsets[1:] = np.cumsum([len(postings[t]) for t in vocab])
+        pairs = np.array([p for t in vocab for p in postings[t]], dtype="uint32").reshape(-1, 2)
+        tfs = np.minimum(pairs[:, 1], np.iinfo("uint16").max).astype("uint16")
+        return cls(vocab, offsets, pairs[:, 0].copy(), tfs, doc_lengths, k1, b, chunks_digest(chunks))
+
+    def search(self, query: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, doc ids), best first; only documents sharing a term with the query."""
+        scores = np.zeros(self.n_docs, dtype="float32")
+        for term in set(tokenize(query)):
+            t = self.term_ids.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            scores[self.doc_ids[start:end]] += self.impacts[start:end]
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return scores[order], order
+
+    def known_terms(self, terms) -> set[str]:
+        return {t for t in terms if t in self.term_ids}
+
+    def matches(self, chunks: list[dict]) -> bool:
+        """Whether doc ids of this index are positions in `chunks` (same count, same digest if known)."""
+        return self.n_docs == len(chunks) and self.digest in (None, chunks_digest(chunks))
+
+    def save(self, path: str):
+        vocab_bytes = "\n".join(self.vocab).encode("utf-8")
+        header = json.dumps(
+            {
+                "k1": self.k1,
+                "b": self.b,
+                "n_docs": self.n_docs,
+                "n_terms": len(self.vocab),
+                "n_postings": len(self.doc_ids),
+                "vocab_bytes": len(vocab_bytes),
+                "digest": self.digest,
+            }
+        ).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header + vocab_bytes)
+            for array, dtype in (
+                (self.offsets, "<u4"),
+                (self.doc_ids, "<u4"),
+                (self.tfs, "<u2"),
+                (self.doc_lengths, "<u4"),
+            ):
+                f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        logger.info(f"💾 BM25 index ({len(self.vocab)} terms, {len(self.doc_ids)} postings) saved to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"Not a BM25 index file: {path}")
+        pos = len(MAGIC)
+        (header_len,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        header = json.loads(data[pos : pos + header_len])
+        pos += header_len
+        vocab_text = data[pos : pos + header["vocab_bytes"]].decode("utf-8")
+        vocab = vocab_text.split("\n") if header["n_terms"] else []
+        pos += header["vocab_bytes"]
+
+        arrays = []
+        for dtype, count in (
+            ("<u4", header["n_terms"] + 1),
+            ("<u4", header["n_postings"]),
+            ("<u2", header["n_postings"]),
+            ("<u4", header["n_docs"]),
+        ):
+            arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=pos))
+            pos += arrays[-1].nbytes
+        return cls(vocab, *arrays, k1=header["k1"], b=header["b"], digest=header.get("digest"))
+
+    @classmethod
+    def load_for(cls, chunks: list[dict], path: str | None) -> "BM25Index":
+        """The index saved at `path` if it was built from `chunks`, else one built from them in memory."""
+        if path and os.path.exists(path):
+            index = cls.load(path)
+            if index.matches(chunks):
+                return index
+            logger.warning(
+                f"⚠️ {path} was built from another chunk store ({index.n_docs} docs, "
+                f"{len(chunks)} chunks loaded); rebuilding it in memory"
+            )
+        return cls.build(chunks)
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list[tuple[int, float]]:
+    """Fuse ranked id lists: score(d) = Σ 1 / (k + rank). Returns (id, score), best first."""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            if doc < 0:
+                continue
+            fused[int(doc)] = fused.get(int(doc), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def build_and_save(chunks_path: str = DEFAULT_CORPUS_CHUNKS_PATH, path: str = DEFAULT_CORPUS_LEXICAL_PATH) -> BM25Index:
+    """Index every line of the chunk store (doc id = line position, as in the corpus registry)."""
+    index = BM25Index.build(list(read_jsonl(chunks_path)))
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="📘 [%(levelname)s] %(message)s")
+    build_and_save()
@@ -0,0 +1,164 @@
+# load_test.py
+# Async load generator for the /ask endpoint.
+#
+# In-process, against the offline backend:
+#   LLM_BACKEND=offline OFFLINE_CHAT_LATENCY_MS=800 python src/load_test.py --qps 20 --requests 500
+# Over HTTP, against a running server:
+#   python src/load_test.py --url http://localhost:8000 --concurrency 32 --duration 60
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+
+from utils import load_qtest_questions
+
+QTEST_PATH = "QTEST.md"
+TIMEOUT_S = 120
+
+
+def parse_server_timing(header: str | None) -> dict:
+    """`embed;dur=12.3, search;dur=0.4` → {"embed": 12.3, "search": 0.4} (ms)."""
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(value)
+    return stages
+
+
+def question_mix(questions: list[str], n: int, seed: int = 0) -> list[str]:
+    """Sample `n` questions uniformly (with replacement) from the question set."""
+    rng = random.Random(seed)
+    return [rng.choice(questions) for _ in range(n)]
+
+
+async def _send(client: httpx.AsyncClient, question: str) -> dict:
+    start = time.perf_counter()
+    try:
+        response = await client.post("/ask", json={"question": question})
+        status = response.status_code
+        stages = parse_server_timing(response.headers.get("Server-Timing"))
+    except httpx.HTTPError as e:
+        status, stages = type(e).__name__, {}
+    return {
+        "status": status,
+        "latency_ms": (time.perf_counter() - start) * 1000,
+        "stages": stages,
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    questions: list[str],
+    qps: float = 0,
+    concurrency: int = 8,
+    duration: float | None = None,
+) -> tuple[list[dict], float]:
+    """
+    Open-loop load: request i is released at i / qps (or immediately if qps == 0),
+    at most `concurrency` requests are in flight. Stops early after `duration` s.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def _one(i: int, question: str):
+        if qps:
+            await asyncio.sleep(max(0.0, start + i / qps - time.perf_counter()))
+        async with semaphore:
+            # Checked once a slot is free: requests queued behind the semaphore may be past it
+            if duration and time.perf_counter() - start > duration:
+                return None
+            return await _send(client, question)
+
+    results = await asyncio.gather(*(_one(i, q) for i, q in enumerate(questions)))
+    return [r for r in results if r is not None], time.perf_counter() - start
+
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    """Percentiles are over successful requests only; None when there were none."""
+    ok = [r for r in results if r["status"] == 200]
+    latencies = np.array([r["latency_ms"] for r in ok])
+    summary = {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            p: float(np.percentile(latencies, int(p[1:]))) if ok else None for p in ("p50", "p95", "p99")
+        },
+        "stages_ms": {},
+    }
+    stage_names = sorted({name for r in ok for name in r["stages"]})
+    for name in stage_names:
+        values = np.array([r["stages"][name] for r in ok if name in r["stages"]])
+        summary["stages_ms"][name] = {
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)),
+        }
+    return summary
+
+
+def _ms(value: float | None) -> str:
+    return "n/a" if value is None else f"{value:.1f} ms"
+
+
+def print_summary(summary: dict):
+    lat = summary["latency_ms"]
+    print(
+        f"\n📊 {summary['requests']} requests | {summary['throughput_rps']:.1f} req/s | "
+        f"errors {summary['errors']} ({summary['error_rate']:.1%})"
+    )
+    print(f"⏱️  latency  p50 {_ms(lat['p50'])} | p95 {_ms(lat['p95'])} | p99 {_ms(lat['p99'])}")
+    for name, p in summary["stages_ms"].items():
+        print(f"   • {name:<12} p50 {p['p50']:.1f} ms | p95 {p['p95']:.1f} ms | p99 {p['p99']:.1f} ms")
+
+
+def _client(url: str | None) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=TIMEOUT_S)
+    from app import app  # In-process: requests never leave the event loop
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=TIMEOUT_S
+    )
+
+
+async def main_async(args) -> dict:
+    questions = question_mix(load_qtest_questions(args.questions), args.requests, args.seed)
+    async with _client(args.url) as client:
+        results, elapsed = await run_load(
+            client, questions, args.qps, args.concurrency, args.duration
+        )
+    return summarize(results, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for /ask")
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--qps", type=float, default=0, help="Target request rate (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--duration", type=float, help="Stop issuing requests after this many seconds")
+    parser.add_argument("--questions", default=QTEST_PATH, help="Markdown file with `### N. question` headings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(main_async(args))
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,22 @@
 import logging
 import os
 
-# Logs klasörü yoksa oluştur
-os.makedirs("logs", exist_ok=True)
+from config import CHUNK_LOG_PATH
+
+LOG_FILE = CHUNK_LOG_PATH
+
+
+class LazyFileHandler(logging.FileHandler):
+    """Opens the log file (and creates its folder) on the first record, not at import."""
+
+    def __init__(self, filename, encoding=None):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        # Logs klasörü yoksa oluştur
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 
 # Logger nesnesi oluştur
 logger = logging.getLogger("pdf_chunk_logger")
@@ -21,7 +35,7 @@ console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
 
 # File Handler
-file_handler = logging.FileHandler("logs/pdf_chunk.log", encoding="utf-8")
+file_handler = LazyFileHandler(LOG_FILE, encoding="utf-8")
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(formatter)
 
@@ -1,6 +1,19 @@
 # merge_chunks.py
-import json
-from pathlib import Path
+# Merge the per-PDF chunk files into the single chunk store used for embedding.
+#
+#   python src/merge_chunks.py                     (run from src/, default paths)
+#   python src/merge_chunks.py a.jsonl b.jsonl -o merged.jsonl --no-near-duplicates
+
+import argparse
+import heapq
+import logging
+from itertools import groupby
+from typing import Iterable, Iterator
+
+from jsonl_io import read_chunks, write_jsonl
+from utils import chunk_id, content_hash
+
+logger = logging.getLogger(__name__)
 
 INPUT_FILES = [
     "data/chunks/chunks_pdf_2020.jsonl",
@@ -11,15 +24,104 @@ INPUT_FILES = [
 
 OUTPUT_FILE = "data/merged_chunks.jsonl"
 
-with open(OUTPUT_FILE, "w", encoding="utf-8") as outfile:
-    for file_path in INPUT_FILES:
-        with open(file_path, "r", encoding="utf-8") as infile:
-            for line in infile:
-                line = line.strip()
-                if not line:
-                    continue  # boş satırı atla
-                json_obj = json.loads(line)
-                json.dump(json_obj, outfile)
-                outfile.write("\n")
-
-print(f"✅ Merged {len(INPUT_FILES)} files into {OUTPUT_FILE}")
+
+def _page_key(chunk: dict) -> tuple:
+    return (str(chunk.get("source", "")), chunk.get("page") or 0)
+
+
+def merge_streams(paths: list[str], stats: dict | None = None) -> Iterator[dict]:
+    """
+    k-way merge of chunk files (each in page order) by (source, page), dropping
+    repeated chunk IDs. Only the IDs seen so far are kept in memory.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(input_chunks=0, duplicate_ids=0)
+    seen: dict[str, str] = {}
+    for chunk in heapq.merge(*(read_chunks(p) for p in paths), key=_page_key):
+        stats["input_chunks"] += 1
+        cid, digest = chunk_id(chunk), content_hash(chunk)
+        if cid in seen:
+            if seen[cid] == digest:
+                stats["duplicate_ids"] += 1
+                continue
+            # Same page and header, different text: both are kept, nothing is lost silently
+            logger.warning(f"⚠️ Chunk ID {cid} ({chunk.get('source')} p.{chunk.get('page')}) has differing content")
+        seen[cid] = digest
+        yield chunk
+
+
+def resize_by_page(chunks: Iterable[dict], encoding=None) -> Iterator[dict]:
+    """`resize_chunks` applied page by page, so only one page is held at a time."""
+    from chunk_sizing import get_encoding, pack_chunks, split_chunk
+
+    encoding = encoding or get_encoding()
+    for _, page in groupby((c for c in chunks if c.get("content")), key=_page_key):
+        split = [piece for chunk in page for piece in split_chunk(chunk, encoding=encoding)]
+        yield from pack_chunks(split, encoding=encoding)
+
+
+def merged_chunks(
+    input_files: list[str] = INPUT_FILES,
+    near_duplicates: bool = True,
+    resize: bool = True,
+    encoding=None,
+    stats: dict | None = None,
+) -> Iterable[dict]:
+    """
+    The chunk store built from `input_files`: merged, deduped and resized.
+    Without `near_duplicates` it streams; the MinHash pass needs every chunk at once.
+    """
+    stats = stats if stats is not None else {}
+    chunks: Iterable[dict] = merge_streams(input_files, stats)
+
+    if near_duplicates:
+        from dedup import dedupe_chunks
+
+        # Near-duplicate'leri tek bir kanonik chunk'a indir
+        chunks, stats["near_duplicates"] = dedupe_chunks(list(chunks))
+
+    # Büyük chunk'ları böl, küçükleri aynı sayfa/bölüm içinde birleştir
+    if resize:
+        chunks = resize_by_page(chunks, encoding)
+    return chunks
+
+
+def merge_chunk_files(
+    input_files: list[str] = INPUT_FILES,
+    output_file: str = OUTPUT_FILE,
+    near_duplicates: bool = True,
+    resize: bool = True,
+    encoding=None,
+) -> dict:
+    """Merge, dedupe and resize chunk files into `output_file` (written atomically)."""
+    stats: dict = {}
+    stats["output_chunks"] = write_jsonl(
+        output_file, merged_chunks(input_files, near_duplicates, resize, encoding, stats)
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge per-PDF chunk files into one chunk store")
+    parser.add_argument("inputs", nargs="*", default=INPUT_FILES)
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("--no-near-duplicates", action="store_true", help="Skip MinHash dedup (fully streaming)")
+    parser.add_argument("--no-resize", action="store_true")
+    args = parser.parse_args()
+
+    stats = merge_chunk_files(args.inputs, args.output, not args.no_near_duplicates, not args.no_resize)
+    print(f"✅ Merged {len(args.inputs)} files into {args.output}")
+    print(
+        f"🧹 {stats['input_chunks']} → {stats['output_chunks']} chunks "
+        f"({stats['duplicate_ids']} repeated chunk IDs dropped)"
+    )
+    report = stats.get("near_duplicates")
+    if report:
+        print(
+            f"🧹 {report['input_chunks']} → {report['output_chunks']} after near-dedup "
+            f"({report['collapsed']} near-duplicates collapsed, {report['reduction']:.1%} smaller)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# page_manifest.py
+# Per-page fingerprints for incremental re-ingestion of revised reports.
+
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Callable
+
+import fitz  # PyMuPDF
+
+from corpus_registry import CorpusPaths
+from jsonl_io import read_jsonl, write_jsonl
+from logger import logger
+from utils import chunk_id, chunk_key, record_key
+
+MANIFEST_DIR = "data/manifests"
+
+
+def fingerprint_page(page) -> dict:
+    """Hash the raw content stream and the extracted text of a single page."""
+    return {
+        "content_hash": hashlib.sha256(page.read_contents()).hexdigest(),
+        "text_hash": hashlib.sha256(page.get_text("text").encode("utf-8")).hexdigest(),
+    }
+
+
+def build_manifest(pdf_path: str, pages: list[int]) -> dict:
+    """
+    Build the fingerprint manifest of the given (1-based) pages of a PDF.
+    """
+    doc = fitz.open(pdf_path)
+    manifest = {"source": os.path.basename(pdf_path), "pages": {}}
+    for page_num in pages:
+        if not (1 <= page_num <= doc.page_count):
+            logger.warning(f"Skipping page {page_num}: out of range (1–{doc.page_count})")
+            continue
+        manifest["pages"][str(page_num)] = fingerprint_page(doc[page_num - 1])
+    doc.close()
+    return manifest
+
+
+def manifest_path_for(pdf_path: str) -> str:
+    """Default manifest location for a PDF, next to the chunk files."""
+    base = os.path.basename(pdf_path).rsplit(".", 1)[0]
+    return os.path.join(MANIFEST_DIR, f"{base}.manifest.json")
+
+
+def load_manifest(path: str) -> dict:
+    """Load a manifest from disk, or an empty one if it does not exist yet."""
+    if not os.path.exists(path):
+        return {"source": "", "pages": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"💾 Manifest saved to {path}")
+
+
+def diff_manifests(old: dict, new: dict) -> tuple[list[int], list[int]]:
+    """
+    Compare two manifests.
+    Returns (changed_or_added_pages, removed_pages), both sorted.
+    """
+    old_pages, new_pages = old.get("pages", {}), new.get("pages", {})
+    changed = [int(p) for p, fp in new_pages.items() if old_pages.get(p) != fp]
+    removed = [int(p) for p in old_pages if p not in new_pages]
+    return sorted(changed), sorted(removed)
+
+
+def diff_chunks(old_chunks: list[dict], new_chunks: list[dict]) -> tuple[list[dict], list[str]]:
+    """
+    Compare chunk lists by chunk key (id + content hash) as multisets, so a page with
+    several chunks under one header is matched chunk for chunk.
+    Returns (new_or_changed_chunks, removed_chunk_ids).
+    """
+    remaining = Counter(chunk_key(c) for c in old_chunks)
+    changed = []
+    for c in new_chunks:
+        key = chunk_key(c)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            changed.append(c)
+    removed = Counter(chunk_id(c) for c in old_chunks) - Counter(chunk_id(c) for c in new_chunks)
+    return changed, list(removed.elements())
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    return list(read_jsonl(path)) if os.path.exists(path) else []
+
+
+def reingest_pdf(
+    pdf_path: str,
+    pages: list[int],
+    chunker: Callable[[str, list[int]], list[dict]],
+    chunks_path: str,
+    paths: CorpusPaths,
+    chunk_files: list[str] | None = None,
+    manifest_path: str | None = None,
+    near_duplicates: bool = True,
+    resize: bool = True,
+    encoding=None,
+) -> dict:
+    """
+    Re-ingest a (possibly revised) PDF, touching only the pages whose fingerprint changed.
+
+    1) Fingerprint the pages and diff them against the stored manifest.
+    2) Re-chunk only the changed pages into the PDF's chunk file (`chunks_path`).
+    3) Rebuild the corpus from every per-PDF chunk file as a full build does
+       (merge_chunks.py), so dedup still works across sources.
+    4) Embed only chunks without a stored vector; reuse stored vectors for everything else.
+    5) Write the chunk store, the embedding store and the indexes of `paths` together,
+       staged and then moved into place (ingest_service.stage_corpus).
+    """
+    from embedding import embed_chunks
+    from ingest_service import commit_staged, embeddings_path_for, stage_corpus
+    from merge_chunks import INPUT_FILES, merged_chunks
+
+    manifest_path = manifest_path or manifest_path_for(pdf_path)
+    chunk_files = list(chunk_files or INPUT_FILES)
+    if chunks_path not in chunk_files:
+        chunk_files.append(chunks_path)
+    source = os.path.basename(pdf_path)
+
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = build_manifest(pdf_path, pages)
+    changed_pages, removed_pages = diff_manifests(old_manifest, new_manifest)
+    stats = {"changed_pages": changed_pages, "removed_pages": removed_pages, "embedded": 0}
+
+    if not changed_pages and not removed_pages:
+        logger.info(f"✅ {source}: no page changed, nothing to re-ingest.")
+        return stats
+    logger.info(
+        f"🔄 {source}: {len(changed_pages)} changed, {len(removed_pages)} removed page(s)"
+    )
+
+    old_chunks = _read_jsonl(chunks_path)
+    touched = set(changed_pages) | set(removed_pages)
+    kept_chunks = [c for c in old_chunks if c.get("page") not in touched]
+    rechunked = chunker(pdf_path, changed_pages) if changed_pages else []
+    changed, removed_ids = diff_chunks(
+        [c for c in old_chunks if c.get("page") in touched], rechunked
+    )
+    # merge_streams expects every chunk file in page order
+    write_jsonl(chunks_path, sorted(kept_chunks + rechunked, key=lambda c: c.get("page") or 0))
+
+    chunk_files = [path for path in chunk_files if os.path.exists(path)]  # reports not chunked yet
+    corpus = list(merged_chunks(chunk_files, near_duplicates, resize, encoding))
+
+    # Reuse stored vectors (paired by id + content hash), embed only what is missing
+    stored = _read_jsonl(embeddings_path_for(paths))
+    known = {record_key(rec) for rec in stored}
+    to_embed = list({chunk_key(c): c for c in corpus if chunk_key(c) not in known}.values())
+    fresh = embed_chunks(to_embed) if to_embed else []
+
+    total, staged = stage_corpus(corpus, stored + fresh, paths)
+    commit_staged(staged)
+    save_manifest(new_manifest, manifest_path)
+
+    stats.update(
+        embedded=len(fresh),
+        changed_chunks=len(changed),
+        removed_chunks=len(removed_ids),
+        corpus_chunks=total,
+    )
+    logger.info(
+        f"✅ {source}: re-embedded {len(fresh)} chunk(s), removed {len(removed_ids)}; corpus now has {total} chunks"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    from config import PAGES_TO_USE_PDF_2023, SECTION_COORDINATES_DICT_PDF_2023
+    from pdf_chunker_by_template import extract_chunks_by_template, px2pt
+
+    coords_pt = {
+        key: (px2pt(tl), px2pt(br))
+        for key, (tl, br) in SECTION_COORDINATES_DICT_PDF_2023.items()
+    }
+    reingest_pdf(
+        pdf_path="data/raw/sr_2023_cb_v.pdf",
+        pages=PAGES_TO_USE_PDF_2023,
+        chunker=lambda path, pages: extract_chunks_by_template(path, pages, coords_pt),
+        chunks_path="data/chunks/chunks_pdf_2023.jsonl",
+        paths=CorpusPaths("data/merged_chunks.jsonl", "data/faiss_index.faiss", "data/bm25_index.bin"),
+    )
@@ -1,7 +1,5 @@
 import json
 
-import fitz  # PyMuPDF
-
 from config import PAGES_TO_USE_PDF_2020
 from logger import logger
 
@@ -35,6 +33,8 @@ key-metrics
 
 
 def extract_chunks(pdf_path: str, page_numbers: list[int], output_path: str):
+    import fitz  # PyMuPDF
+
     try:
         doc = fitz.open(pdf_path)
         logger.info(f"Opened PDF: {pdf_path} with {len(doc)} pages.")
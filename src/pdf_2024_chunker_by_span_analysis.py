@@ -1,8 +1,6 @@
 import json
 import os
 
-import fitz  # PyMuPDF
-
 from config import PAGES_TO_USE_PDF_2024
 from logger import logger
 
@@ -12,6 +10,8 @@ def extract_chunks(pdf_path: str, pages: list[int], output_path: str) -> None:
     Extracts chunks from the given PDF over the specified pages,
     using span-based y0/font/size/color filters, then writes to JSONL.
     """
+    import fitz  # PyMuPDF
+
     try:
         doc = fitz.open(pdf_path)
         logger.info(f"Opened PDF `{pdf_path}` ({doc.page_count} pages).")
@@ -1,8 +1,6 @@
 import json
 import os
 
-import fitz  # PyMuPDF
-
 from config import (
     PAGES_TO_USE_PDF_2022,
     PAGES_TO_USE_PDF_2023,
@@ -22,6 +20,8 @@ def extract_chunks_by_template(
     """
     Extracts chunks from the given PDF according to fixed rectangular regions.
     """
+    import fitz  # PyMuPDF
+
     try:
         doc = fitz.open(pdf_path)
         logger.info(f"Opened PDF `{pdf_path}` ({doc.page_count} pages).")
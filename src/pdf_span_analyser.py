@@ -1,23 +1,31 @@
-import fitz  # PyMuPDF
+# pdf_span_analyser.py
+# Span inspection for the span-based chunkers. `print_page_spans` prints one page;
+# `profile_pdf` scans every page in parallel and clusters spans by (font, size,
+# color), with x-band / y-band histograms and a suggested filter rule per cluster,
+# written in the same form as the rules in pdf_20xx_chunker_by_span_analysis.py.
+#
+#   python src/pdf_span_analyser.py data/raw/sr_2020_cb_p.pdf --page 8
+#   python src/pdf_span_analyser.py data/raw/sr_2024_cb_v.pdf --output span_profile_2024.json
 
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def print_page_spans(pdf_path: str, page_number: int):
-    """
-    Belirtilen sayfadaki tüm yazıları yukarıdan aşağıya sıralı şekilde yazdırır.
-    Her yazı için font, boyut, renk ve pozisyon gibi bilgiler gösterilir.
-    """
-    doc = fitz.open(pdf_path)
+import numpy as np
 
-    if page_number < 0 or page_number >= len(doc):
-        print(f"⚠️ Sayfa numarası geçersiz. PDF {len(doc)} sayfa içeriyor.")
-        return
+SIZE_STEP = 0.5  # font sizes closer than this fall into the same cluster
+X_BANDS = 3  # columns (the 2024 layout has three)
+Y_BANDS = 10
+MIN_CHAR_SHARE = 0.002  # clusters smaller than this share of all characters are left out of the report
+SAMPLE_TEXTS = 3
 
-    page = doc[page_number]
-    page_dict = page.get_text("dict")
 
+def _page_spans(page) -> list[dict]:
+    """Non-empty text spans of a page with font, size, color and bbox."""
     span_list = []
-
-    for block in page_dict["blocks"]:
+    for block in page.get_text("dict")["blocks"]:
         if block.get("type") != 0:  # sadece metin blokları
             continue
         for line in block.get("lines", []):
@@ -36,6 +44,23 @@ def print_page_spans(pdf_path: str, page_number: int):
                         "bbox": span["bbox"],
                     }
                 )
+    return span_list
+
+
+def print_page_spans(pdf_path: str, page_number: int):
+    """
+    Belirtilen sayfadaki tüm yazıları yukarıdan aşağıya sıralı şekilde yazdırır.
+    Her yazı için font, boyut, renk ve pozisyon gibi bilgiler gösterilir.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(pdf_path)
+
+    if page_number < 0 or page_number >= len(doc):
+        print(f"⚠️ Sayfa numarası geçersiz. PDF {len(doc)} sayfa içeriyor.")
+        return
+
+    span_list = _page_spans(doc[page_number])
 
     # Y koordinatına göre sıralıyoruz (yukarıdan aşağıya)
     span_list.sort(key=lambda s: s["y"])
@@ -51,6 +76,232 @@ def print_page_spans(pdf_path: str, page_number: int):
         print("-" * 60)
 
 
+# ---------------------------------------------------------------------------
+# Whole-document profile
+# ---------------------------------------------------------------------------
+
+def _collect_pages(pdf_path: str, pages: list[int]) -> dict:
+    """Span columns of `pages` (1-based) of one PDF, opening the document once."""
+    import fitz  # PyMuPDF
+
+    columns = {key: [] for key in ("page", "font", "size", "color", "x0", "y0", "x1", "y1", "chars", "text", "width", "height")}
+    with fitz.open(pdf_path) as doc:
+        for page_num in pages:
+            page = doc[page_num - 1]
+            for span in _page_spans(page):
+                x0, y0, x1, y1 = span["bbox"]
+                for key, value in (
+                    ("page", page_num), ("font", span["font"]), ("size", span["size"]),
+                    ("color", span["color"]), ("x0", x0), ("y0", y0), ("x1", x1), ("y1", y1),
+                    ("chars", len(span["text"])), ("text", span["text"]),
+                    ("width", page.rect.width), ("height", page.rect.height),
+                ):
+                    columns[key].append(value)
+    return columns
+
+
+def collect_spans(pdf_path: str, pages: list[int] | None = None, workers: int | None = None) -> dict:
+    """
+    Every span of `pages` (1-based, default all) as numpy columns, with pages split
+    across a process pool. Fonts are interned: `font` holds ids into `fonts`.
+    """
+    import fitz  # PyMuPDF
+
+    if pages is None:
+        with fitz.open(pdf_path) as doc:
+            pages = list(range(1, doc.page_count + 1))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pages)))
+    if workers == 1:
+        parts = [_collect_pages(pdf_path, pages)]
+    else:
+        slices = [pages[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_collect_pages, [pdf_path] * workers, slices))
+
+    merged = {key: [v for part in parts for v in part[key]] for key in parts[0]}
+    fonts, font_ids = np.unique(np.array(merged.pop("font"), dtype=str), return_inverse=True)
+    table = {
+        key: np.asarray(values, dtype="int64" if key in ("page", "color", "chars") else "float32")
+        for key, values in merged.items()
+        if key != "text"
+    }
+    table.update(font=font_ids.astype("int64"), fonts=fonts.tolist(), text=merged["text"], n_pages=len(pages))
+    return table
+
+
+def _size_bounds(lo: float, hi: float, step: float = SIZE_STEP) -> tuple[float, float]:
+    """Open interval on the `step` grid around [lo, hi]: 9.0 → (8.5, 9.5)."""
+    return (
+        math.floor((lo - step / 2) / step) * step,
+        math.ceil((hi + step / 2) / step) * step,
+    )
+
+
+def _rule(font: str, size: tuple[float, float], color: int, y0: tuple[float, float], x0: tuple[float, float]) -> str:
+    return (
+        f'{size[0]:g} < s["size"] < {size[1]:g} and s["color"] == {color} '
+        f'and "{font}" in s["font"] and {math.floor(y0[0])} <= s["y0"] <= {math.ceil(y0[1])} '
+        f'and {math.floor(x0[0])} <= s["x0"] <= {math.ceil(x0[1])}'
+    )
+
+
+def profile_spans(
+    table: dict,
+    size_step: float = SIZE_STEP,
+    x_bands: int = X_BANDS,
+    y_bands: int = Y_BANDS,
+    min_char_share: float = MIN_CHAR_SHARE,
+) -> dict:
+    """
+    Aggregate span columns into a size histogram and (font, size, color) clusters.
+    Each cluster carries its page coverage, x-band / y-band histograms (relative to
+    the page size), 5th–95th percentile positions, a role hint and a filter rule.
+    """
+    chars = table["chars"]
+    total_chars = int(chars.sum())
+    if not total_chars:
+        return {"spans": 0, "chars": 0, "pages": table["n_pages"], "size_histogram": [], "clusters": []}
+
+    size_bin = np.round(table["size"] / size_step).astype("int64")
+    keys = np.stack([table["font"], size_bin, table["color"]], axis=1)
+    cluster_keys, cluster_of = np.unique(keys, axis=0, return_inverse=True)
+    cluster_of = cluster_of.reshape(-1)
+    n_clusters = len(cluster_keys)
+
+    span_counts = np.bincount(cluster_of, minlength=n_clusters)
+    char_counts = np.bincount(cluster_of, weights=chars, minlength=n_clusters).astype("int64")
+    page_pairs = np.unique(np.stack([cluster_of, table["page"]], axis=1), axis=0)
+    page_counts = np.bincount(page_pairs[:, 0], minlength=n_clusters)
+
+    x_band = np.minimum((table["x0"] / table["width"] * x_bands).astype("int64"), x_bands - 1)
+    y_band = np.minimum((table["y0"] / table["height"] * y_bands).astype("int64"), y_bands - 1)
+    x_hist = np.zeros((n_clusters, x_bands), dtype="int64")
+    y_hist = np.zeros((n_clusters, y_bands), dtype="int64")
+    np.add.at(x_hist, (cluster_of, np.clip(x_band, 0, None)), 1)
+    np.add.at(y_hist, (cluster_of, np.clip(y_band, 0, None)), 1)
+
+    sizes, size_of = np.unique(size_bin, return_inverse=True)
+    size_chars = np.bincount(size_of.reshape(-1), weights=chars).astype("int64")
+
+    body = int(np.argmax(char_counts))
+    body_size = cluster_keys[body, 1] * size_step
+    order = np.argsort(-char_counts, kind="stable")
+
+    clusters = []
+    for c in order:
+        if char_counts[c] / total_chars < min_char_share:
+            continue
+        members = np.flatnonzero(cluster_of == c)
+        font = table["fonts"][cluster_keys[c, 0]]
+        color = int(cluster_keys[c, 2])
+        size = float(cluster_keys[c, 1] * size_step)
+        y0 = tuple(float(v) for v in np.percentile(table["y0"][members], [5, 95]))
+        x0 = tuple(float(v) for v in np.percentile(table["x0"][members], [5, 95]))
+        size_range = _size_bounds(float(table["size"][members].min()), float(table["size"][members].max()), size_step)
+        top_share = y_hist[c, : max(1, y_bands // 4)].sum() / span_counts[c]
+
+        if c == body:
+            role = "body"
+        elif size >= 1.5 * body_size and top_share >= 0.5:
+            role = "title"
+        elif size > body_size:
+            role = "heading"
+        else:
+            role = "minor"
+
+        samples = list(dict.fromkeys(table["text"][i] for i in members[:50]))[:SAMPLE_TEXTS]
+        clusters.append(
+            {
+                "role": role,
+                "font": font,
+                "size": size,
+                "color": color,
+                "color_hex": f"#{color:06x}",
+                "spans": int(span_counts[c]),
+                "chars": int(char_counts[c]),
+                "char_share": round(float(char_counts[c] / total_chars), 4),
+                "pages": int(page_counts[c]),
+                "x_bands": x_hist[c].tolist(),
+                "y_bands": y_hist[c].tolist(),
+                "x0": [round(v, 1) for v in x0],
+                "y0": [round(v, 1) for v in y0],
+                "samples": samples,
+                "rule": _rule(font, size_range, color, y0, x0),
+            }
+        )
+
+    # Page margin filter: where body-size-or-larger text lives (the chunkers' `y0 < 55 or y0 > 520`)
+    main = size_bin >= np.round(body_size / size_step) - 1
+    content_y0 = np.percentile(table["y0"][main], [1, 99]) if main.any() else np.array([0.0, 0.0])
+
+    return {
+        "spans": int(len(chars)),
+        "chars": total_chars,
+        "pages": table["n_pages"],
+        "body_size": float(body_size),
+        "content_y0": [math.floor(content_y0[0]), math.ceil(content_y0[1])],
+        "size_histogram": [[float(s * size_step), int(n)] for s, n in zip(sizes, size_chars)],
+        "clusters": clusters,
+    }
+
+
+def format_report(profile: dict) -> str:
+    """Compact text view of a profile: one line per cluster plus its rule."""
+    lines = [
+        f"📄 {profile.get('pdf', '')} | {profile['pages']} pages | {profile['spans']} spans | "
+        f"{profile['chars']} chars | body size {profile.get('body_size', 0):g}",
+        f"   content y0 window: {profile.get('content_y0')}",
+    ]
+    for c in profile["clusters"]:
+        lines.append(
+            f"  {c['role']:<8} {c['font'][:28]:<28} {c['size']:>5g}pt {c['color_hex']} "
+            f"{c['char_share']:>6.1%} chars  {c['pages']:>4} pages  y0 {c['y0']}  "
+            f"e.g. {' | '.join(s[:30] for s in c['samples'])}"
+        )
+        lines.append(f"           {c['rule']}")
+    return "\n".join(lines)
+
+
+def profile_pdf(
+    pdf_path: str,
+    pages: list[int] | None = None,
+    workers: int | None = None,
+    output_path: str | None = None,
+    **options,
+) -> dict:
+    """Collect, profile and (optionally) write the JSON report of one PDF."""
+    profile = profile_spans(collect_spans(pdf_path, pages, workers), **options)
+    profile = {"pdf": os.path.basename(pdf_path), **profile}
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect PDF spans: one page, or a whole-document profile")
+    parser.add_argument("pdf")
+    parser.add_argument("--page", type=int, help="Print the spans of this 0-based page only")
+    parser.add_argument("--pages", type=int, nargs="+", help="1-based pages to profile (default: all)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="Write the JSON profile here")
+    parser.add_argument("--size-step", type=float, default=SIZE_STEP)
+    parser.add_argument("--x-bands", type=int, default=X_BANDS)
+    parser.add_argument("--y-bands", type=int, default=Y_BANDS)
+    args = parser.parse_args()
+
+    if args.page is not None:
+        print_page_spans(args.pdf, args.page)
+        return
+    profile = profile_pdf(
+        args.pdf, args.pages, args.workers, args.output,
+        size_step=args.size_step, x_bands=args.x_bands, y_bands=args.y_bands,
+    )
+    print(format_report(profile))
+    if args.output:
+        print(f"✅ Profile saved to: {args.output}")
+
+
 if __name__ == "__main__":
-    PDF_PATH = r"data\raw\sr_2020_cb_p.pdf"
-    print_page_spans(PDF_PATH, page_number=8)
+    main()
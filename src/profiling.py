@@ -0,0 +1,98 @@
+# profiling.py
+# Opt-in cProfile + tracemalloc capture of single /ask requests or pipeline stages.
+# With PROFILE_MODE=off (the default) `maybe_profile` returns a no-op context.
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import tracemalloc
+import uuid
+from contextlib import contextmanager, nullcontext
+
+from config import PROFILE_DIR, PROFILE_MODE, PROFILE_SAMPLE_RATE
+
+PROFILE_HEADER = "x-profile"
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 15
+
+# cProfile and tracemalloc are process-wide: only one capture at a time,
+# concurrent requests are simply not profiled.
+_capture_lock = threading.Lock()
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def should_profile(headers=None, mode: str = PROFILE_MODE) -> bool:
+    """Decide whether the current request / stage gets profiled."""
+    if mode == "off":
+        return False
+    if mode == "all":
+        return True
+    if mode == "sample":
+        return random.random() < PROFILE_SAMPLE_RATE
+    if mode == "header":
+        return headers is not None and headers.get(PROFILE_HEADER, "") not in ("", "0")
+    return False
+
+
+@contextmanager
+def profile_block(name: str, request_id: str, directory: str = PROFILE_DIR):
+    """
+    Profile the enclosed block with cProfile and record tracemalloc peak memory.
+    Writes `<name>-<request_id>.prof` (pstats) and a `.txt` summary to `directory`.
+    Yields the path prefix, or None if another capture is already running.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        yield None
+        return
+
+    safe_id = re.sub(r"[^\w.-]", "_", request_id)[:64]
+    prefix = os.path.join(directory, f"{name}-{safe_id}")
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield prefix
+        finally:
+            profiler.disable()
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            _write_profile(profiler, snapshot, current, peak, prefix)
+    finally:
+        _capture_lock.release()
+
+
+def _write_profile(profiler, snapshot, current: int, peak: int, prefix: str):
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    profiler.dump_stats(f"{prefix}.prof")
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    top_allocations = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+        f.write(f"tracemalloc peak: {peak / 1024:.1f} KiB | retained: {current / 1024:.1f} KiB\n\n")
+        f.write("Top allocation sites:\n")
+        for stat in top_allocations:
+            f.write(f"  {stat}\n")
+        f.write("\n")
+        f.write(stream.getvalue())
+
+
+def maybe_profile(name: str, request_id: str, headers=None):
+    """`profile_block` when profiling is requested, otherwise a no-op context."""
+    if PROFILE_MODE == "off" or not should_profile(headers):
+        return nullcontext()
+    return profile_block(name, request_id)
@@ -0,0 +1,343 @@
+# qa.py
+# Question-answering flow shared by the API (app.py) and the CLI (query.py):
+# embed → search → (fallback) → prompt → completion, each stage timed.
+
+import random
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from admission import CHAT_GATE, EMBED_GATE, AdmissionGate
+from config import (
+    EMBED_BATCH_SIZE,
+    EXTRACTIVE_FAST_PATH,
+    EXTRACTIVE_MIN_SIMILARITY,
+    EXTRACTIVE_MIN_TERM_OVERLAP,
+    HYBRID_CANDIDATES,
+    LEXICAL_FAST_PATH,
+    LEXICAL_MIN_MARGIN,
+    LEXICAL_MIN_TERMS,
+    RRF_K,
+)
+from lexical import BM25Index, chunk_text, reciprocal_rank_fusion, tokenize
+from llm_backend import get_backend
+from metrics import CACHE_HITS, FALLBACKS, Counter, RequestTimings
+from utils import build_context, format_other_occurrences
+
+TOP_K = 5
+SIMILARITY_THRESHOLD = 0.5
+EMBED_CACHE_SIZE = 1024
+SYSTEM_PROMPT = "You are a helpful assistant answering questions based on company reports."
+
+FALLBACK_MESSAGES = {
+    "en": [
+        "Sorry, I couldn't find any relevant information in the available documents.",
+        "I'm not confident enough to answer that based on the provided sources.",
+        "This question seems to be outside the scope of the documents I'm trained on.",
+    ],
+    "tr": [
+        "Üzgünüm, elimdeki belgelerde bu soruya dair güvenilir bir bilgi bulamadım.",
+        "Bu soruya mevcut kaynaklara dayanarak sağlıklı bir yanıt veremem.",
+        "Bu soru, elimdeki belgelerin kapsamının dışında görünüyor.",
+    ],
+}
+
+METRIC_HEADERS = ("Key Metrics", "Key-Metrics", "Impact")
+NUMERIC_QUESTION = re.compile(
+    r"\b(how (much|many|long)|what (percentage|percent|share|proportion|number)|percentage|"
+    r"number of|reduc\w*|increas\w*|decreas\w*|ratio|rate)\b",
+    re.I,
+)
+STOPWORDS = set(
+    "a an and are as at be by did do does for from has have how in is it its of on or "
+    "that the to was were what when which who why with according report reported".split()
+)
+
+EXTRACTIVE = Counter(
+    "rag_extractive_fast_path_total",
+    "Answer attempts on the extractive fast path, by outcome (hit/miss).",
+    ("outcome",),
+)
+
+LEXICAL = Counter(
+    "rag_lexical_fast_path_total",
+    "Answer attempts on the lexical-only (no embedding) fast path, by outcome (hit/miss).",
+    ("outcome",),
+)
+
+_embed_cache: OrderedDict = OrderedDict()
+_embed_cache_lock = threading.Lock()
+
+
+def fallback_answer(question: str) -> str:
+    user_lang = "tr" if any(ch in question for ch in "ığüşöç") else "en"
+    return random.choice(FALLBACK_MESSAGES[user_lang])
+
+
+def _cache_put(key: tuple, qvec: np.ndarray):
+    with _embed_cache_lock:
+        _embed_cache[key] = qvec
+        if len(_embed_cache) > EMBED_CACHE_SIZE:
+            _embed_cache.popitem(last=False)
+
+
+def embed_question(question: str, dimensions: int) -> np.ndarray:
+    """Embed a question as a (1, d) float32 array; repeated questions hit an LRU cache."""
+    key = (question, dimensions)
+    with _embed_cache_lock:
+        if key in _embed_cache:
+            _embed_cache.move_to_end(key)
+            CACHE_HITS.inc(cache="question_embedding")
+            return _embed_cache[key]
+    with EMBED_GATE.slot():
+        vector = get_backend().embed([question], dimensions=dimensions)[0]
+    qvec = np.array(vector, dtype="float32").reshape(1, -1)
+    _cache_put(key, qvec)
+    return qvec
+
+
+def embed_questions(questions: list[str], dimensions: int) -> np.ndarray:
+    """Embed many questions as an (n, d) array, one backend call per EMBED_BATCH_SIZE cache misses."""
+    vectors = {}
+    with _embed_cache_lock:
+        for question in questions:
+            if (question, dimensions) in _embed_cache:
+                vectors[question] = _embed_cache[(question, dimensions)]
+                CACHE_HITS.inc(cache="question_embedding")
+    missing = [q for q in dict.fromkeys(questions) if q not in vectors]
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[start : start + EMBED_BATCH_SIZE]
+        with EMBED_GATE.slot():
+            embedded = get_backend().embed(batch, dimensions=dimensions)
+        for question, vector in zip(batch, embedded):
+            vectors[question] = np.array(vector, dtype="float32").reshape(1, -1)
+            _cache_put((question, dimensions), vectors[question])
+    return np.vstack([vectors[q] for q in questions])
+
+
+def build_messages(question: str, retrieved: list[dict]) -> list[dict]:
+    context = build_context(retrieved)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
+    ]
+
+
+def format_similarity(similarity: float | None) -> str:
+    """A dense similarity, or "Lexical match" for chunks found by BM25 alone (no similarity)."""
+    return "Lexical match" if similarity is None else f"Similarity: {similarity:.2f}"
+
+
+def format_sources(retrieved: list[dict], similarities: list[float | None]) -> list[str]:
+    return [
+        f"{c['source']} | Page {c['page']} | {c['header']} | {format_similarity(sim)}"
+        f"{format_other_occurrences(c)}"
+        for c, sim in zip(retrieved, similarities)
+    ]
+
+
+def _terms(text: str) -> set[str]:
+    return {w for w in re.findall(r"[a-z0-9%]+", text.lower()) if w not in STOPWORDS and len(w) > 1}
+
+
+def extractive_answer(question: str, chunk: dict, similarity: float | None) -> str | None:
+    """
+    Answer a numeric lookup straight from a Key Metrics / Impact chunk, without the LLM.
+    Returns None unless the chunk is a very close match (by its own dense similarity;
+    lexical-only hits have none) and one of its numeric segments shares enough terms
+    with the question.
+    """
+    if similarity is None or similarity < EXTRACTIVE_MIN_SIMILARITY or not NUMERIC_QUESTION.search(question):
+        return None
+    if not any(h in chunk.get("header", "") for h in METRIC_HEADERS):
+        return None
+
+    question_terms = _terms(question)
+    title_terms = _terms(chunk.get("main_title_of_page", ""))
+    best, best_score = None, (0, 0)
+    for segment in re.split(r"(?<=[.!?])\s+|\s*[•\n]\s*", chunk.get("content", "")):
+        if not re.search(r"\d", segment):
+            continue
+        # The segment itself must share the terms; the page title only breaks ties
+        terms = _terms(segment)
+        score = (len(question_terms & terms), len(question_terms & (terms | title_terms)))
+        if score > best_score:
+            best, best_score = segment.strip(), score
+    if best is None or best_score[0] < EXTRACTIVE_MIN_TERM_OVERLAP:
+        return None
+    return f"{best} (Source: {chunk.get('source')}, page {chunk.get('page')})"
+
+
+def lexical_confident(question: str, chunks: list[dict], scores: np.ndarray, ids: np.ndarray, lexical: BM25Index) -> bool:
+    """
+    True when the best BM25 hit contains every question term the corpus knows
+    (at least LEXICAL_MIN_TERMS of them) and beats the runner-up by LEXICAL_MIN_MARGIN.
+    """
+    if len(ids) == 0:
+        return False
+    terms = lexical.known_terms(t for t in tokenize(question) if t not in STOPWORDS and len(t) > 1)
+    if len(terms) < LEXICAL_MIN_TERMS or not terms <= set(tokenize(chunk_text(chunks[ids[0]]))):
+        return False
+    return len(scores) == 1 or scores[0] >= LEXICAL_MIN_MARGIN * scores[1]
+
+
+def search_depth(top_k: int, lexical: BM25Index | None) -> int:
+    """Dense results to fetch: more candidates when they get fused with BM25."""
+    return max(top_k, HYBRID_CANDIDATES) if lexical is not None else top_k
+
+
+def answer_question(
+    question: str,
+    chunks: list[dict],
+    index,
+    timings: RequestTimings | None = None,
+    top_k: int = TOP_K,
+    fast_path: bool = EXTRACTIVE_FAST_PATH,
+    lexical: BM25Index | None = None,
+    lexical_fast_path: bool = LEXICAL_FAST_PATH,
+    dense_hits: tuple[np.ndarray, np.ndarray] | None = None,
+    chat_gate: AdmissionGate | None = None,
+) -> dict:
+    """
+    Answer a question from the chunk store and its index.
+    Returns answer, retrieved chunks, their similarities and whether the
+    low-similarity fallback or the extractive fast path was used.
+
+    With a BM25 `lexical` index the dense and lexical rankings are fused (RRF).
+    A confident lexical match also overrides the low-similarity fallback and,
+    on the lexical fast path, skips the embedding call altogether. Chunks found
+    by BM25 alone have no dense similarity: theirs is None (max_similarity too,
+    on the lexical fast path), and they never take the extractive fast path.
+
+    `dense_hits` are precomputed (distances, indices) of this question, and
+    `chat_gate` replaces the process-wide CHAT_GATE (batch mode).
+    """
+    timings = timings or RequestTimings()
+    candidates = search_depth(top_k, lexical)
+
+    lexical_hits, confident = None, False
+    if lexical is not None:
+        with timings.stage("lexical"):
+            lexical_hits = lexical.search(question, candidates)
+        confident = lexical_confident(question, chunks, *lexical_hits, lexical)
+        if lexical_fast_path:
+            LEXICAL.inc(outcome="hit" if confident else "miss")
+
+    if confident and lexical_fast_path:
+        pairs = [(chunks[i], None) for i in lexical_hits[1][:top_k]]
+        max_sim = None
+    else:
+        if dense_hits is not None:
+            distances, indices = dense_hits
+        else:
+            with timings.stage("embed"):
+                qvec = embed_question(question, index.d)
+
+            with timings.stage("search"):
+                distances, indices = index.search(qvec, candidates)
+        max_sim = float(distances[0][0])
+
+        if max_sim < SIMILARITY_THRESHOLD and not confident:
+            FALLBACKS.inc()
+            return {
+                "answer": fallback_answer(question),
+                "retrieved": [],
+                "similarities": [],
+                "max_similarity": max_sim,
+                "fallback": True,
+                "extractive": False,
+            }
+
+        dense = {int(i): float(d) for d, i in zip(distances[0], indices[0]) if i >= 0}
+        if lexical_hits is not None:
+            with timings.stage("fuse"):
+                fused = reciprocal_rank_fusion([list(dense), lexical_hits[1]], RRF_K)[:top_k]
+            pairs = [(chunks[i], dense.get(i)) for i, _ in fused]  # None: lexical-only hit
+        else:
+            pairs = [(chunks[i], d) for i, d in dense.items()]
+
+    retrieved = [c for c, _ in pairs]
+
+    if fast_path:
+        with timings.stage("extract"):
+            extracted = extractive_answer(question, *pairs[0])
+        EXTRACTIVE.inc(outcome="hit" if extracted else "miss")
+        if extracted:
+            return {
+                "answer": extracted,
+                "retrieved": retrieved[:1],
+                "similarities": [pairs[0][1]],
+                "max_similarity": max_sim,
+                "fallback": False,
+                "extractive": True,
+            }
+
+    with timings.stage("prompt"):
+        messages = build_messages(question, retrieved)
+
+    with timings.stage("completion"), (chat_gate or CHAT_GATE).slot():
+        answer = get_backend().chat(messages).strip()
+
+    return {
+        "answer": answer,
+        "retrieved": retrieved,
+        "similarities": [sim for _, sim in pairs],
+        "max_similarity": max_sim,
+        "fallback": False,
+        "extractive": False,
+    }
+
+
+def answer_questions(
+    questions: list[str],
+    chunks: list[dict],
+    index,
+    workers: int = 8,
+    top_k: int = TOP_K,
+    lexical: BM25Index | None = None,
+    lexical_fast_path: bool = LEXICAL_FAST_PATH,
+    **options,
+):
+    """
+    Batch mode: embed all questions in batches, search them as one matrix, then
+    answer them on `workers` threads. Yields (position, question, result, timings)
+    as answers complete; a question that fails yields its exception as result.
+    Questions the lexical fast path answers are not embedded at all.
+    """
+    if not questions:
+        return
+    batch_timings = RequestTimings()
+    depth = search_depth(top_k, lexical)
+    dense = list(range(len(questions)))
+    if lexical is not None and lexical_fast_path:
+        with batch_timings.stage("lexical_batch"):
+            dense = [
+                i for i in dense
+                if not lexical_confident(questions[i], chunks, *lexical.search(questions[i], depth), lexical)
+            ]
+    dense_hits = {}
+    if dense:
+        with batch_timings.stage("embed_batch"):
+            qvecs = embed_questions([questions[i] for i in dense], index.d)
+        with batch_timings.stage("search_batch"):
+            distances, indices = index.search(qvecs, depth)
+        dense_hits = {i: (distances[row : row + 1], indices[row : row + 1]) for row, i in enumerate(dense)}
+
+    def answer(i: int):
+        timings = RequestTimings()
+        timings.stages.update(batch_timings.stages)
+        try:
+            result = answer_question(
+                questions[i], chunks, index, timings, top_k=top_k, lexical=lexical,
+                lexical_fast_path=lexical_fast_path, dense_hits=dense_hits.get(i), **options,
+            )
+        except Exception as e:
+            result = e
+        return i, questions[i], result, timings
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(answer, i) for i in range(len(questions))]):
+            yield future.result()
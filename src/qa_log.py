@@ -0,0 +1,220 @@
+# qa_log.py
+# Queue-backed background writer for structured Q&A records (JSONL), with size- or
+# time-based rotation and one fsync per batch. Callers only pay for a queue put.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from config import QA_LOG_BACKUPS, QA_LOG_MAX_BYTES, QA_LOG_PATH, QA_LOG_ROTATE_WHEN
+from utils import chunk_id
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 256
+FLUSH_INTERVAL_S = 1.0
+QUEUE_SIZE = 10_000
+
+_ROTATE_FORMATS = {"H": "%Y-%m-%d_%H", "D": "%Y-%m-%d"}
+
+
+class BackgroundJSONLWriter:
+    """
+    Appends records to a JSONL file from a daemon thread.
+
+    `write` never blocks: if the queue is full the record is dropped and counted
+    in `dropped`. Records are written in batches and fsynced once per batch; a batch
+    that fails to write is logged and counted in `failed`, and the writer carries on.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = QA_LOG_MAX_BYTES,
+        rotate_when: str = QA_LOG_ROTATE_WHEN,
+        backup_count: int = QA_LOG_BACKUPS,
+        flush_interval: float = FLUSH_INTERVAL_S,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_when = rotate_when
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        # An existing log belongs to the period it was last written in
+        self._period = self._current_period(os.path.getmtime(path) if os.path.exists(path) else None)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="qa-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._file.close()
+
+    def flush(self, timeout: float = 5.0):
+        """Block until every record queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _current_period(self, timestamp: float | None = None) -> str | None:
+        fmt = _ROTATE_FORMATS.get(self.rotate_when)
+        when = datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()
+        return when.strftime(fmt) if fmt else None
+
+    def _period_ended(self) -> bool:
+        return bool(self.rotate_when) and self._current_period() != self._period
+
+    def _backup_name(self) -> str:
+        """<path>.<period>, or <path>.<period>.<n> once the period already has a backup."""
+        name, n = f"{self.path}.{self._period}", 0
+        while os.path.exists(name if not n else f"{name}.{n}"):
+            n += 1
+        return name if not n else f"{name}.{n}"
+
+    def _backup_order(self, name: str) -> tuple[str, int]:
+        period, _, n = name[len(os.path.basename(self.path)) + 1 :].partition(".")
+        return period, int(n) if n.isdigit() else 0
+
+    def _rotate(self):
+        self._file.close()
+        if self.rotate_when and os.path.getsize(self.path) == 0:
+            self._period = self._current_period()  # nothing to keep from the ended period
+        elif self.rotate_when:
+            os.replace(self.path, self._backup_name())
+            self._period = self._current_period()
+            rotated = sorted(
+                (
+                    f for f in os.listdir(os.path.dirname(self.path) or ".")
+                    if f.startswith(os.path.basename(self.path) + ".")
+                ),
+                key=self._backup_order,
+            )
+            for old in rotated[: max(0, len(rotated) - self.backup_count)]:
+                os.remove(os.path.join(os.path.dirname(self.path), old))
+        elif self.backup_count == 0:
+            open(self.path, "w").close()  # no backups: start the file over
+        else:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _reopen(self):
+        """After a failed write or rotation, make sure the next batch has a file to go to."""
+        if self._file.closed:
+            try:
+                self._file = open(self.path, "a", encoding="utf-8")
+            except OSError as e:
+                logger.error(f"❌ Q&A log {self.path} cannot be reopened: {e}")
+
+    def _write_batch(self, batch: list[dict]):
+        # Time rollover before writing, so a batch lands in the period it was written in
+        if self._period_ended():
+            self._rotate()
+        for record in batch:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _run(self):
+        while True:
+            batch, stop, waiters = [], False, []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception(f"❌ {len(batch)} Q&A record(s) could not be written to {self.path}")
+                    self._reopen()
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+
+_writer: BackgroundJSONLWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_qa_writer() -> BackgroundJSONLWriter:
+    """The process-wide Q&A log writer, started on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundJSONLWriter(QA_LOG_PATH)
+            atexit.register(_writer.close)
+        return _writer
+
+
+def round_similarity(similarity: float | None) -> float | None:
+    return None if similarity is None else round(similarity, 4)  # None: lexical-only hit
+
+
+def log_qa_record(
+    question: str,
+    result: dict,
+    timings: dict | None = None,
+    channel: str = "api",
+    request_id: str | None = None,
+):
+    """Queue a structured Q&A record built from an `answer_question` result."""
+    get_qa_writer().write(
+        {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "channel": channel,
+            "request_id": request_id,
+            "question": question,
+            "answer": result["answer"],
+            "fallback": result["fallback"],
+            "max_similarity": round_similarity(result["max_similarity"]),
+            "sources": [
+                {
+                    "chunk_id": chunk_id(c),
+                    "source": c.get("source"),
+                    "page": c.get("page"),
+                    "header": c.get("header"),
+                }
+                for c in result["retrieved"]
+            ],
+            "similarities": [round_similarity(s) for s in result["similarities"]],
+            "timings_ms": {k: round(v * 1000, 2) for k, v in (timings or {}).items()},
+        }
+    )
@@ -1,45 +1,46 @@
+# query.py
+# python src/query.py                                  # interactive
+# python src/query.py --questions QTEST.md --workers 32 --output answers.jsonl
+# cat questions.txt | python src/query.py --questions - > answers.jsonl
+
+import argparse
 import json
-import os
-import random
-from datetime import datetime
-import faiss
-import numpy as np
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
+import sys
+import time
+
+from admission import AdmissionGate
+from config import DEFAULT_CORPUS_LEXICAL_PATH, HYBRID_RETRIEVAL
+from jsonl_io import read_jsonl
+from lexical import BM25Index
+from metrics import RequestTimings
+from qa import answer_question, answer_questions, format_similarity
+from qa_log import log_qa_record, round_similarity
+from utils import format_other_occurrences, load_qtest_questions
 
 CHUNKS_PATH = r"src/data/merged_chunks.jsonl"
 INDEX_PATH = r"src/data/faiss_index.faiss"
-LOG_PATH = r"src/logs/QA.log"
-os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-
-
-def log_qa(question: str, answer: str):
-    """Logs Q&A to a classic timestamped .log file format."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] [INFO] Q: {question}\n")
-        f.write(f"[{timestamp}] [INFO] A: {answer.strip()}\n\n")
 
 
 def load_chunks(path: str):
     """Load JSONL chunks from disk once."""
-    chunks = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            chunks.append(json.loads(line))
-    return chunks
+    return list(read_jsonl(path))
 
 
 def load_index(path: str):
-    """Load FAISS index from disk once."""
-    return faiss.read_index(path)
+    """Load FAISS index from disk once (the two-stage binary one with INDEX_BINARY)."""
+    from retriever import load_search_index
+
+    return load_search_index(path)
 
 
-def interactive_qa_loop(chunks, index):
+def load_lexical(chunks, path: str = DEFAULT_CORPUS_LEXICAL_PATH):
+    """Persisted BM25 index if there is one, else built from the chunks (None when hybrid retrieval is off)."""
+    if not HYBRID_RETRIEVAL:
+        return None
+    return BM25Index.load_for(chunks, path)
+
+
+def interactive_qa_loop(chunks, index, lexical=None):
     """Ana interaktif soru-cevap döngüsü."""
     while True:
         question = input("❓ Question: ")
@@ -47,71 +48,98 @@ def interactive_qa_loop(chunks, index):
             print("👋 Exiting. Goodbye!")
             break
 
-        # Create embedding
-        resp = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=question,
-        )
-        qvec = np.array(resp.data[0].embedding, dtype="float32").reshape(1, -1)
-
-        # Search FAISS
-        distances, indices = index.search(qvec, k=5)
-        max_sim = distances[0][0]
-
-        # Fallback düşük benzerlik için
-        if max_sim < 0.5:
-            user_lang = "tr" if any(ch in question for ch in "ığüşöç") else "en"
-            fallback = {
-                "en": [
-                    "Sorry, I couldn't find any relevant information in the available documents.",
-                    "I'm not confident enough to answer that based on the provided sources.",
-                    "This question seems to be outside the scope of the documents I'm trained on.",
-                ],
-                "tr": [
-                    "Üzgünüm, elimdeki belgelerde bu soruya dair güvenilir bir bilgi bulamadım.",
-                    "Bu soruya mevcut kaynaklara dayanarak sağlıklı bir yanıt veremem.",
-                    "Bu soru, elimdeki belgelerin kapsamının dışında görünüyor.",
-                ],
-            }
+        timings = RequestTimings()
+        result = answer_question(question, chunks, index, timings, lexical=lexical)
+        log_qa_record(question, result, timings.stages, channel="cli")
+
+        if result["fallback"]:
             print("\n🧠 Answer:")
-            print(random.choice(fallback[user_lang]))
-            print(f"\n📚 Sources: No reliable sources found (max similarity {max_sim:.2f})\n")
+            print(result["answer"])
+            print(f"\n📚 Sources: No reliable sources found (max similarity {result['max_similarity']:.2f})\n")
             continue
 
-        # Build context
-        retrieved = [chunks[i] for i in indices[0]]
-        context = "\n\n".join(
-            f"[{c['main_title_of_page']} > {c['main_subtitle_of_page']} > {c['header']}] (Page {c['page']})\n{c['content']}"
-            for c in retrieved
-        )
-
-        # Ask GPT
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant answering questions based on company reports."},
-            {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
-        ]
-        chat = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.3,
-        )
-        answer = chat.choices[0].message.content
-
-        # Log & print
-        log_qa(question, answer)
         print("\n🧠 Answer:")
-        print(answer)
+        print(result["answer"])
         print("\n📚 Sources:")
-        for sim, idx in zip(distances[0], indices[0]):
-            c = chunks[idx]
-            print(f"📄 {c['source']} | Page {c['page']} | {c['header']} — 📈 Similarity: {sim:.2f}")
+        for c, sim in zip(result["retrieved"], result["similarities"]):
+            print(f"📄 {c['source']} | Page {c['page']} | {c['header']} — 📈 {format_similarity(sim)}{format_other_occurrences(c)}")
+        print(f"\n⏱️ {timings.summary()}")
         print("\n👉 Do you have another question? (Press Enter to exit)")
 
 
+def read_questions(path: str) -> list[str]:
+    """One question per line (`-` reads stdin); a Markdown file is parsed like QTEST.md."""
+    if path.endswith(".md"):
+        return load_qtest_questions(path)
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    with f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def batch_record(position: int, question: str, result, timings: RequestTimings) -> dict:
+    record = {"id": position, "question": question}
+    if isinstance(result, Exception):
+        record["error"] = f"{type(result).__name__}: {result}"
+    else:
+        record.update(
+            answer=result["answer"],
+            fallback=result["fallback"],
+            extractive=result["extractive"],
+            max_similarity=round_similarity(result["max_similarity"]),
+            sources=[
+                {"source": c.get("source"), "page": c.get("page"), "header": c.get("header"), "similarity": round_similarity(sim)}
+                for c, sim in zip(result["retrieved"], result["similarities"])
+            ],
+        )
+    record["timings_ms"] = {k: round(v * 1000, 2) for k, v in timings.stages.items()}
+    return record
+
+
+def batch_qa(questions: list[str], chunks, index, lexical=None, workers: int = 8, out=sys.stdout) -> int:
+    """
+    Answer all questions concurrently, streaming one JSON line per answer as it completes.
+    Completions go through a gate of the batch's own, sized to `workers`: the
+    process-wide CHAT_GATE is shared with the API and stays as it is.
+    """
+    chat_gate = AdmissionGate("batch_completion", workers)
+    start, failed = time.perf_counter(), 0
+    for position, question, result, timings in answer_questions(
+        questions, chunks, index, workers, lexical=lexical, chat_gate=chat_gate
+    ):
+        if isinstance(result, Exception):
+            failed += 1
+        else:
+            log_qa_record(question, result, timings.stages, channel="batch")
+        out.write(json.dumps(batch_record(position, question, result, timings), ensure_ascii=False) + "\n")
+        out.flush()
+    print(
+        f"✅ {len(questions)} questions ({failed} failed) in {time.perf_counter() - start:.1f}s with {workers} workers",
+        file=sys.stderr,
+    )
+    return failed
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Ask questions about the indexed reports")
+    parser.add_argument("--questions", help="Question file for batch mode (`-` for stdin, .md parsed like QTEST.md)")
+    parser.add_argument("--output", help="JSONL output of batch mode (default: stdout)")
+    parser.add_argument("--workers", type=int, default=8, help="Questions answered concurrently in batch mode")
+    args = parser.parse_args()
+
     chunks = load_chunks(CHUNKS_PATH)
     index = load_index(INDEX_PATH)
-    interactive_qa_loop(chunks, index)
+    lexical = load_lexical(chunks)
+    if not args.questions:
+        interactive_qa_loop(chunks, index, lexical)
+        return
+
+    questions = read_questions(args.questions)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            failed = batch_qa(questions, chunks, index, lexical, args.workers, out)
+    else:
+        failed = batch_qa(questions, chunks, index, lexical, args.workers)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
@@ -4,17 +4,16 @@ import json
 import logging
 import os
 
-import faiss
-from dotenv import load_dotenv
-from openai import OpenAI
-
 # --- your embedding & index utilities ---
-from src.embedding import embed_chunks, save_embeddings
+from embedding_jobs import EmbeddingJob
 
 # --- your custom chunker ---
-from src.pdf_chunker_by_template import extract_chunks_by_template
-from src.query import interactive_qa_loop
-from src.retriever import build_and_save
+from pdf_chunker_by_template import extract_chunks_by_template
+from config import DEFAULT_CORPUS_LEXICAL_PATH, HYBRID_RETRIEVAL
+from lexical import BM25Index
+from query import interactive_qa_loop
+from metrics import INGEST_STAGE_SECONDS, RequestTimings
+from profiling import maybe_profile, new_request_id
 
 # --- CONFIGURATION (adjust per‐PDF) ---
 PDF_PATH = "src/data/raw/sr_2020_cb_p.pdf"
@@ -32,19 +31,19 @@ SECTION_COORDINATES_DICT = {
 # --- PATHS ---
 CHUNKS_JSONL = "src/data/chunks/merged_chunks.jsonl"
 EMBEDDINGS_JSONL = "src/data/embeddings.jsonl"
+EMBEDDING_JOB_DIR = "src/data/chunks/embedding_job"
 FAISS_INDEX = "src/data/faiss_index.faiss"
-LOG_PATH = "src/logs/QA.log"
+BM25_INDEX = DEFAULT_CORPUS_LEXICAL_PATH  # where the registry and query.py look for it
+LOG_PATH = "src/logs/QA.jsonl"
 
 # --- Setup ---
-load_dotenv()
 logging.basicConfig(level=logging.INFO, format="🔹 [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
-os.makedirs(os.path.dirname(CHUNKS_JSONL), exist_ok=True)
-os.makedirs(os.path.dirname(EMBEDDINGS_JSONL), exist_ok=True)
-os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 
-# --- OpenAI client ---
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def make_output_dirs():
+    for path in (CHUNKS_JSONL, EMBEDDINGS_JSONL, LOG_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
 
 
 def run_chunking(pdf_path: str, pages: list[int], coords: dict) -> list[dict]:
@@ -64,18 +63,25 @@ def run_chunking(pdf_path: str, pages: list[int], coords: dict) -> list[dict]:
 
 def run_embedding(chunks: list[dict]) -> None:
     """
-    Embed the provided chunks and save embeddings.jsonl.
+    Embed the chunks written to CHUNKS_JSONL through a journaled job and save
+    embeddings.jsonl. An interrupted run resumes where it stopped; failed
+    chunks are retried and the pipeline stops if any are still missing.
     """
     logger.info("🚀 Embedding chunks...")
-    vectors = embed_chunks(chunks)
-    save_embeddings(vectors, EMBEDDINGS_JSONL)
+    job = EmbeddingJob(EMBEDDING_JOB_DIR, CHUNKS_JSONL)
+    job.run()
+    if job.failed:
+        job.retry()
+    job.finalize(EMBEDDINGS_JSONL)
 
 
-def run_index_build() -> tuple[faiss.IndexFlatIP, list[dict]]:
+def run_index_build():
     """
     Load embeddings.jsonl, build & save a FAISS index + metadata,
     then return the loaded index and metadata list.
     """
+    from retriever import build_and_save  # faiss is only loaded when an index is built
+
     logger.info("⚙️ Building FAISS index from embeddings...")
     idx, _ = build_and_save()  # assumes build_and_save reads EMBEDDINGS_JSONL
     return idx
@@ -85,14 +91,24 @@ def run_pipeline():
     """
     Full pipeline: chunk → embed → index → interactive Q&A.
     """
+    make_output_dirs()
+    timings = RequestTimings(INGEST_STAGE_SECONDS)
+    run_id = new_request_id()  # PROFILE_MODE=all profiles every stage under this id
     # 1) Chunk
-    chunks = run_chunking(PDF_PATH, PAGES_TO_USE, SECTION_COORDINATES_DICT)
+    with timings.stage("chunking"), maybe_profile("chunking", run_id):
+        chunks = run_chunking(PDF_PATH, PAGES_TO_USE, SECTION_COORDINATES_DICT)
     # 2) Embed
-    run_embedding(chunks)
+    with timings.stage("embedding"), maybe_profile("embedding", run_id):
+        run_embedding(chunks)
     # 3) Build & load index
-    index = run_index_build()
+    with timings.stage("index_build"), maybe_profile("index_build", run_id):
+        index = run_index_build()
+    with timings.stage("lexical_index"):
+        lexical = BM25Index.build(chunks)
+        lexical.save(BM25_INDEX)  # kept fresh even while hybrid retrieval is off
+    logger.info(f"⏱️ Ingestion stages: {timings.summary()}")
     # 4) Enter QA loop
-    interactive_qa_loop(chunks, index)  # ✅ doğru isim ve parametreler
+    interactive_qa_loop(chunks, index, lexical if HYBRID_RETRIEVAL else None)  # ✅ doğru isim ve parametreler
 
 
 if __name__ == "__main__":
@@ -1,16 +1,22 @@
 # retriever.py
 
-import json
+import argparse
+import hashlib
 import faiss
+import ipaddress
 import numpy as np
 import os
 import logging
+import multiprocessing as mp
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
 from typing import List, Dict, Tuple
-from openai import OpenAI
-from dotenv import load_dotenv
 
-# Load API keys
-load_dotenv()
+from config import INDEX_BINARY, INDEX_DIMENSIONS, INDEX_STORAGE, SHARD_AUTHKEY, SHARD_DIR
+from jsonl_io import read_jsonl
 
 # Logging config
 logging.basicConfig(level=logging.INFO, format="🔍 [%(levelname)s] %(message)s")
@@ -19,10 +25,18 @@ logger = logging.getLogger(__name__)
 # Constants
 EMBEDDINGS_PATH = "src/data/embeddings.jsonl"
 INDEX_PATH = "src/data/faiss_index.faiss"
-DIMENSION = 1536  # OpenAI text-embedding-3-small dimension
 TOP_K = 5
 
-client = OpenAI()
+# Two-stage (binary coarse search + float rerank) mode, saved next to the float index
+BINARY_INDEX_PATH = "src/data/faiss_index_binary.faiss"
+FLOAT_STORE_FILENAME = "embeddings_f32.npy"
+FLOAT_STORE_PATH = "src/data/" + FLOAT_STORE_FILENAME
+OVERFETCH = 10  # Candidates fetched by the binary stage per requested result
+
+# Hierarchical (page → chunk) mode
+PAGE_INDEX_PATH = "src/data/faiss_page_index.faiss"
+PAGE_MAP_PATH = "src/data/page_map.npz"
+PAGE_PROBE = 8  # Candidate pages selected per query by the coarse stage
 
 
 def load_embeddings(path: str) -> Tuple[np.ndarray, List[Dict]]:
@@ -30,11 +44,9 @@ def load_embeddings(path: str) -> Tuple[np.ndarray, List[Dict]]:
     logger.info(f"📥 Loading embeddings from {path}")
     embeddings = []
     metadatas = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            obj = json.loads(line)
-            embeddings.append(obj["embedding"])
-            metadatas.append(obj["metadata"])
+    for obj in read_jsonl(path):
+        embeddings.append(obj["embedding"])
+        metadatas.append(obj["metadata"])
     return np.array(embeddings, dtype="float32"), metadatas
 
 
@@ -44,25 +56,541 @@ def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
     return embeddings / norms
 
 
-def build_faiss_index(embeddings: np.ndarray) -> faiss.IndexFlatIP:
-    """Build FAISS index (Inner Product) for normalized embeddings."""
-    logger.info("⚙️ Building FAISS index...")
-    index = faiss.IndexFlatIP(DIMENSION)
+def truncate_embeddings(embeddings: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    Keep the first `dimensions` components and renormalize.
+    text-embedding-3 vectors stay meaningful when shortened this way.
+    """
+    if dimensions >= embeddings.shape[1]:
+        return embeddings
+    return normalize_embeddings(np.ascontiguousarray(embeddings[:, :dimensions]))
+
+
+def build_faiss_index(embeddings: np.ndarray, storage: str = INDEX_STORAGE) -> faiss.Index:
+    """
+    Build FAISS index (Inner Product) for normalized embeddings.
+    The dimension is taken from the data; `storage` selects full float32 vectors
+    or float16 / int8 scalar-quantized codes.
+    """
+    logger.info(f"⚙️ Building FAISS index ({storage})...")
+    dimension = embeddings.shape[1]
+    if storage == "float32":
+        index = faiss.IndexFlatIP(dimension)
+    elif storage in ("float16", "int8"):
+        qtype = (
+            faiss.ScalarQuantizer.QT_fp16
+            if storage == "float16"
+            else faiss.ScalarQuantizer.QT_8bit
+        )
+        index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    else:
+        raise ValueError(f"Unknown index storage: {storage!r}")
     index.add(embeddings)
     return index
 
 
-def save_index(index: faiss.IndexFlatIP, path: str):
+def save_index(index: faiss.Index, path: str):
     faiss.write_index(index, path)
     logger.info(f"💾 FAISS index saved to {path}")
 
-def build_and_save():
+def build_and_save(dimensions: int | None = INDEX_DIMENSIONS, storage: str = INDEX_STORAGE):
     """Full pipeline: load embeddings, build index, save it."""
     embeddings, metadatas = load_embeddings(EMBEDDINGS_PATH)
     embeddings = normalize_embeddings(embeddings)
-    index = build_faiss_index(embeddings)
+    if dimensions:
+        embeddings = truncate_embeddings(embeddings, dimensions)
+    index = build_faiss_index(embeddings, storage)
     save_index(index, INDEX_PATH)
     return index, metadatas
 
+def binarize(embeddings: np.ndarray) -> np.ndarray:
+    """Sign-bit binary codes (1 bit per dimension, packed into uint8)."""
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def build_binary_index(embeddings: np.ndarray) -> faiss.IndexBinaryFlat:
+    """Build a Hamming-distance FAISS index over the sign bits of the embeddings."""
+    logger.info("⚙️ Building binary FAISS index...")
+    index = faiss.IndexBinaryFlat(embeddings.shape[1])
+    index.add(binarize(embeddings))
+    return index
+
+
+class BinaryRerankIndex:
+    """
+    Two-stage search: Hamming search over binary codes over-fetches candidates,
+    which are then rescored exactly against the (memory-mapped) float vectors.
+    `search` has the same signature and return shape as `faiss.Index.search`.
+    """
+
+    def __init__(self, binary_index: faiss.IndexBinary, vectors: np.ndarray, overfetch: int = OVERFETCH):
+        self.binary_index = binary_index
+        self.vectors = vectors
+        self.overfetch = overfetch
+        self.d = vectors.shape[1]
+        self.ntotal = binary_index.ntotal
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        n_candidates = min(k * self.overfetch, self.ntotal)
+        _, candidates = self.binary_index.search(binarize(queries), n_candidates)
+
+        distances = np.full((len(queries), k), -np.inf, dtype="float32")
+        indices = np.full((len(queries), k), -1, dtype="int64")
+        for row, (query, cand) in enumerate(zip(queries, candidates)):
+            cand = np.sort(cand[cand >= 0])  # sorted reads are friendlier to the mmap
+            scores = self.vectors[cand] @ query
+            top = np.argsort(-scores)[:k]
+            distances[row, : len(top)] = scores[top]
+            indices[row, : len(top)] = cand[top]
+        return distances, indices
+
+
+def save_float_store(embeddings: np.ndarray, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:  # a file object keeps np.save from appending .npy to staged names
+        np.save(f, np.ascontiguousarray(embeddings, dtype="float32"))
+    logger.info(f"💾 Float vectors saved to {path}")
+
+
+def binary_paths_for(index_path: str) -> Tuple[str, str]:
+    """The two-stage index files of a float index: <index>_binary.faiss and the float store beside it."""
+    stem, ext = os.path.splitext(index_path)
+    return f"{stem}_binary{ext}", os.path.join(os.path.dirname(index_path), FLOAT_STORE_FILENAME)
+
+
+def save_binary(embeddings: np.ndarray, index_path: str, store_path: str):
+    faiss.write_index_binary(build_binary_index(embeddings), index_path)
+    logger.info(f"💾 Binary FAISS index saved to {index_path}")
+    save_float_store(embeddings, store_path)
+
+
+def build_and_save_binary(dimensions: int | None = INDEX_DIMENSIONS) -> BinaryRerankIndex:
+    """Build the two-stage index: binary index + float vector store for reranking."""
+    embeddings, _ = load_embeddings(EMBEDDINGS_PATH)
+    embeddings = normalize_embeddings(embeddings)
+    if dimensions:
+        embeddings = truncate_embeddings(embeddings, dimensions)
+    save_binary(embeddings, BINARY_INDEX_PATH, FLOAT_STORE_PATH)
+    return load_binary_rerank_index()
+
+
+def load_binary_rerank_index(
+    index_path: str = BINARY_INDEX_PATH, store_path: str = FLOAT_STORE_PATH
+) -> BinaryRerankIndex:
+    """Load the binary index into memory and memory-map the float vectors."""
+    binary_index = faiss.read_index_binary(index_path)
+    vectors = np.load(store_path, mmap_mode="r")
+    return BinaryRerankIndex(binary_index, vectors)
+
+
+def load_search_index(index_path: str, binary: bool = INDEX_BINARY):
+    """
+    The float index at `index_path`, or with `binary` the two-stage index built next
+    to it. Binary files older than the float index are stale and not used.
+    """
+    if binary:
+        binary_path, store_path = binary_paths_for(index_path)
+        built = os.path.getmtime(index_path)
+        if all(os.path.exists(p) and os.path.getmtime(p) >= built for p in (binary_path, store_path)):
+            return load_binary_rerank_index(binary_path, store_path)
+        logger.warning(f"⚠️ No up-to-date binary index next to {index_path}, serving the float index")
+    return faiss.read_index(index_path)
+
+
+# === Sharded retrieval ===
+# Vectors are partitioned into shards (by source file or by chunk id hash), each saved
+# as an IndexIDMap2 that keeps the global row ids. A shard worker process serves one
+# shard over a multiprocessing connection (TCP, so it works locally and across
+# nodes); ShardedIndex scatters queries to all shards and merges the top-k.
+
+
+def assign_shards(metadatas: List[Dict], n_shards: int, by: str = "hash") -> np.ndarray:
+    """Shard number of every vector, by `source` file (round-robin) or by chunk id hash."""
+    if by == "source":
+        sources = sorted({os.path.basename(str(m.get("source", "")).replace("\\", "/")) for m in metadatas})
+        shard_of = {src: i % n_shards for i, src in enumerate(sources)}
+        return np.array(
+            [shard_of[os.path.basename(str(m.get("source", "")).replace("\\", "/"))] for m in metadatas]
+        )
+    if by == "hash":
+        keys = [str(m.get("chunk_id", i)) for i, m in enumerate(metadatas)]
+        return np.array([int(hashlib.md5(k.encode()).hexdigest(), 16) % n_shards for k in keys])
+    raise ValueError(f"Unknown sharding scheme: {by!r}")
+
+
+def build_shards(
+    embeddings: np.ndarray, metadatas: List[Dict], n_shards: int, by: str = "hash"
+) -> List[faiss.IndexIDMap2]:
+    """Split normalized embeddings into `n_shards` ID-mapped flat indexes."""
+    assignment = assign_shards(metadatas, n_shards, by)
+    shards = []
+    for shard in range(n_shards):
+        ids = np.flatnonzero(assignment == shard).astype("int64")
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+        if len(ids):
+            index.add_with_ids(embeddings[ids], ids)
+        shards.append(index)
+    return shards
+
+
+def build_and_save_shards(n_shards: int, by: str = "hash", shard_dir: str = SHARD_DIR) -> List[str]:
+    """Build every shard from the embedding store and save them as shard_<i>.faiss."""
+    embeddings, metadatas = load_embeddings(EMBEDDINGS_PATH)
+    embeddings = normalize_embeddings(embeddings)
+    os.makedirs(shard_dir, exist_ok=True)
+    paths = []
+    for i, index in enumerate(build_shards(embeddings, metadatas, n_shards, by)):
+        path = os.path.join(shard_dir, f"shard_{i}.faiss")
+        save_index(index, path)
+        paths.append(path)
+    logger.info(f"✅ {n_shards} shards ({by}) saved to {shard_dir}")
+    return paths
+
+
+# Wire format (raw bytes, nothing is unpickled): a one-byte op, then
+#   b"I"                          → <qq d, ntotal
+#   b"S" <qqq n, d, k> n*d float32 → <qq n, k'> n*k' float32 distances, n*k' int64 ids
+#   b"C"                          → connection closed
+_HEADER = struct.Struct("<qq")
+_SEARCH = struct.Struct("<qqq")
+
+
+def _encode_search(queries: np.ndarray, k: int) -> bytes:
+    n, d = queries.shape
+    return b"S" + _SEARCH.pack(n, d, k) + np.ascontiguousarray(queries, dtype="<f4").tobytes()
+
+
+def _decode_search(message: bytes) -> Tuple[np.ndarray, int]:
+    n, d, k = _SEARCH.unpack_from(message, 1)
+    queries = np.frombuffer(message, dtype="<f4", count=n * d, offset=1 + _SEARCH.size).reshape(n, d)
+    return queries, k
+
+
+def _encode_result(distances: np.ndarray, ids: np.ndarray) -> bytes:
+    n, k = ids.shape
+    return _HEADER.pack(n, k) + distances.astype("<f4").tobytes() + ids.astype("<i8").tobytes()
+
+
+def _decode_result(message: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    n, k = _HEADER.unpack_from(message)
+    offset = _HEADER.size
+    distances = np.frombuffer(message, dtype="<f4", count=n * k, offset=offset).reshape(n, k)
+    ids = np.frombuffer(message, dtype="<i8", count=n * k, offset=offset + 4 * n * k).reshape(n, k)
+    return distances.copy(), ids.copy()
+
+
+def _handle_shard_connection(conn, index: faiss.Index):
+    with conn:
+        while True:
+            try:
+                message = conn.recv_bytes()
+            except EOFError:
+                return
+            op = message[:1]
+            if op == b"I":
+                conn.send_bytes(_HEADER.pack(index.d, index.ntotal))
+            elif op == b"S":
+                queries, k = _decode_search(message)
+                conn.send_bytes(_encode_result(*index.search(queries, min(k, max(index.ntotal, 1)))))
+            else:  # b"C" or anything unexpected
+                return
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def _shard_authkey(authkey: bytes | None) -> bytes:
+    """The given key, else SHARD_AUTHKEY, else this process tree's random key (local workers only)."""
+    return authkey or SHARD_AUTHKEY or mp.current_process().authkey
+
+
+def serve_shard(index_path: str, address=("127.0.0.1", 0), authkey: bytes | None = None, ready=None):
+    """
+    Load one shard and answer search requests on `address` until killed. Binding
+    beyond localhost needs a shared key (`authkey` or SHARD_AUTHKEY).
+    """
+    if not (authkey or SHARD_AUTHKEY) and not _is_loopback(address[0]):
+        raise ValueError(f"Refusing to serve a shard on {address[0]} without SHARD_AUTHKEY")
+    index = faiss.read_index(index_path)
+    with Listener(address, authkey=_shard_authkey(authkey)) as listener:
+        if ready is not None:
+            ready.put(listener.address)
+        logger.info(f"🧩 Serving shard {index_path} ({index.ntotal} vectors) on {listener.address}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle_shard_connection, args=(conn, index), daemon=True).start()
+
+
+def start_local_shard_workers(shard_paths: List[str], authkey: bytes | None = None):
+    """Start one worker process per shard on localhost. Returns (processes, addresses)."""
+    authkey = _shard_authkey(authkey)
+    ready = mp.Queue()
+    processes, addresses = [], []
+    for path in shard_paths:
+        process = mp.Process(target=serve_shard, args=(path, ("127.0.0.1", 0), authkey, ready), daemon=True)
+        process.start()
+        processes.append(process)
+        addresses.append(ready.get(timeout=60))
+    return processes, addresses
+
+
+class ShardedIndex:
+    """
+    Scatter-gather search over shard workers.
+    `search` has the same signature and return shape as `faiss.Index.search`,
+    with global row ids, so it can replace a single index in the QA flow.
+    """
+
+    def __init__(self, addresses: list, authkey: bytes | None = None):
+        authkey = _shard_authkey(authkey)
+        self._connections = [Client(tuple(a) if isinstance(a, list) else a, authkey=authkey) for a in addresses]
+        self._locks = [threading.Lock() for _ in addresses]
+        self._pool = ThreadPoolExecutor(max_workers=len(addresses))
+        infos = [_HEADER.unpack(self._call(i, b"I")) for i in range(len(addresses))]
+        self.d = infos[0][0]
+        self.ntotal = sum(ntotal for _, ntotal in infos)
+
+    def _call(self, shard: int, message: bytes) -> bytes:
+        with self._locks[shard]:
+            self._connections[shard].send_bytes(message)
+            return self._connections[shard].recv_bytes()
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        futures = [
+            self._pool.submit(self._call, shard, _encode_search(queries, k))
+            for shard in range(len(self._connections))
+        ]
+        results = [_decode_result(f.result()) for f in futures]
+        distances = np.hstack([d for d, _ in results])
+        ids = np.hstack([i for _, i in results])
+        missing = k - ids.shape[1]
+        if missing > 0:  # shards clamp k to their size; pad like faiss does
+            distances = np.pad(distances, ((0, 0), (0, missing)))
+            ids = np.pad(ids, ((0, 0), (0, missing)), constant_values=-1)
+        distances[ids < 0] = -np.inf
+        top = np.argsort(-distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, top, axis=1),
+            np.take_along_axis(ids, top, axis=1),
+        )
+
+    def close(self):
+        for shard, conn in enumerate(self._connections):
+            try:
+                with self._locks[shard]:
+                    conn.send_bytes(b"C")
+                conn.close()
+            except OSError:
+                pass
+        self._pool.shutdown(wait=False)
+
+
+# === Hierarchical retrieval ===
+# Chunks of a page share its title / subtitle, so pages are a natural coarse level:
+# a small index of page vectors picks candidate pages, then only those pages' chunks
+# are scored exactly (IDSelectorArray on a flat index visits just the listed ids).
+
+
+def assign_pages(metadatas: List[Dict]) -> Tuple[np.ndarray, List[Tuple[str, int]]]:
+    """Page number of every chunk (dense, 0-based) and the (source, page) key of every page."""
+    keys = [
+        (os.path.basename(str(m.get("source", "")).replace("\\", "/")), int(m.get("page") or 0))
+        for m in metadatas
+    ]
+    pages = sorted(set(keys))
+    page_ids = {key: i for i, key in enumerate(pages)}
+    return np.array([page_ids[key] for key in keys], dtype="int64"), pages
+
+
+def page_titles(metadatas: List[Dict], page_of: np.ndarray, n_pages: int) -> List[str]:
+    """The "title — subtitle" of every page, from the first chunk that has one."""
+    titles = [""] * n_pages
+    for meta, page in zip(metadatas, page_of):
+        if not titles[page]:
+            parts = [meta.get("main_title_of_page"), meta.get("main_subtitle_of_page")]
+            titles[page] = " — ".join(p for p in parts if p)
+    return titles
+
+
+def build_page_vectors(
+    embeddings: np.ndarray,
+    page_of: np.ndarray,
+    n_pages: int,
+    titles: List[str] | None = None,
+) -> np.ndarray:
+    """
+    Normalized centroid of each page's chunk vectors. With `titles`, the embedded
+    page title is added to the centroid (pages without a title keep the centroid).
+    """
+    sums = np.zeros((n_pages, embeddings.shape[1]), dtype="float32")
+    np.add.at(sums, page_of, embeddings)
+    vectors = normalize_embeddings(sums)
+    if titles is not None:
+        from llm_backend import get_backend
+        from config import EMBED_BATCH_SIZE
+
+        titled = [i for i, t in enumerate(titles) if t]
+        for start in range(0, len(titled), EMBED_BATCH_SIZE):
+            batch = titled[start : start + EMBED_BATCH_SIZE]
+            embedded = get_backend().embed([titles[i] for i in batch], dimensions=embeddings.shape[1])
+            vectors[batch] += normalize_embeddings(np.array(embedded, dtype="float32"))
+        vectors = normalize_embeddings(vectors)
+    return vectors
+
+
+class HierarchicalIndex:
+    """
+    Page-then-chunk search. The coarse stage searches `page_index` (one vector per
+    page) for `page_probe` pages; the exact stage searches `chunk_index` restricted
+    to those pages' chunk ids. Cost follows the number of pages (plus the chunks of
+    the probed pages), not the corpus size.
+    `search` has the same signature and return shape as `faiss.Index.search`.
+    """
+
+    def __init__(
+        self,
+        page_index: faiss.Index,
+        chunk_index: faiss.Index,
+        page_of: np.ndarray,
+        pages: List[Tuple[str, int]] | None = None,
+        page_probe: int = PAGE_PROBE,
+    ):
+        self.page_index = page_index
+        self.chunk_index = chunk_index
+        self.page_of = np.asarray(page_of, dtype="int64")
+        self.pages = pages
+        self.page_probe = page_probe
+        self.d = chunk_index.d
+        self.ntotal = chunk_index.ntotal
+
+        # CSR layout: chunk ids of page p are chunks_by_page[offsets[p]:offsets[p + 1]]
+        self.chunks_by_page = np.argsort(self.page_of, kind="stable").astype("int64")
+        self.offsets = np.searchsorted(self.page_of[self.chunks_by_page], np.arange(page_index.ntotal + 1))
+
+    def candidate_ids(self, page_ids: np.ndarray) -> np.ndarray:
+        page_ids = page_ids[page_ids >= 0]
+        if not len(page_ids):
+            return np.empty(0, dtype="int64")
+        return np.concatenate([self.chunks_by_page[self.offsets[p] : self.offsets[p + 1]] for p in page_ids])
+
+    def search(self, queries: np.ndarray, k: int, page_probe: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        probe = min(page_probe or self.page_probe, self.page_index.ntotal)
+        _, page_ids = self.page_index.search(queries, probe)
+
+        distances = np.full((len(queries), k), -np.inf, dtype="float32")
+        indices = np.full((len(queries), k), -1, dtype="int64")
+        for row, pages in enumerate(page_ids):
+            ids = self.candidate_ids(pages)
+            if not len(ids):
+                continue
+            params = faiss.SearchParameters(sel=faiss.IDSelectorArray(ids))
+            d, i = self.chunk_index.search(queries[row : row + 1], min(k, len(ids)), params=params)
+            distances[row, : d.shape[1]] = d[0]
+            indices[row, : i.shape[1]] = i[0]
+        return distances, indices
+
+    def search_pages(self, queries: np.ndarray, k: int, page_probe: int | None = None) -> List[List[Dict]]:
+        """
+        Like `search`, with each query's hits grouped by page (best page first):
+        [{"page": (source, page), "score": best, "hits": [(chunk id, score), ...]}, ...]
+        """
+        distances, indices = self.search(queries, k, page_probe)
+        grouped = []
+        for row_d, row_i in zip(distances, indices):
+            groups: Dict[int, Dict] = {}
+            for score, chunk in zip(row_d, row_i):
+                if chunk < 0:
+                    continue
+                page = int(self.page_of[chunk])
+                group = groups.setdefault(
+                    page,
+                    {"page": self.pages[page] if self.pages else page, "score": float(score), "hits": []},
+                )
+                group["hits"].append((int(chunk), float(score)))
+            grouped.append(list(groups.values()))  # hits arrive best first, so groups do too
+        return grouped
+
+
+def build_hierarchical_index(
+    embeddings: np.ndarray,
+    metadatas: List[Dict],
+    use_titles: bool = False,
+    page_probe: int = PAGE_PROBE,
+) -> HierarchicalIndex:
+    """Build both levels from normalized chunk embeddings and their metadata."""
+    page_of, pages = assign_pages(metadatas)
+    titles = page_titles(metadatas, page_of, len(pages)) if use_titles else None
+    page_index = faiss.IndexFlatIP(embeddings.shape[1])
+    page_index.add(build_page_vectors(embeddings, page_of, len(pages), titles))
+    logger.info(f"⚙️ Page index: {len(pages)} pages over {len(metadatas)} chunks")
+    return HierarchicalIndex(page_index, build_faiss_index(embeddings, "float32"), page_of, pages, page_probe)
+
+
+def save_page_map(index: HierarchicalIndex, path: str = PAGE_MAP_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sources, numbers = zip(*index.pages) if index.pages else ((), ())
+    np.savez(path, page_of=index.page_of, sources=np.array(sources, dtype=str), pages=np.array(numbers, dtype="int64"))
+    logger.info(f"💾 Page map saved to {path}")
+
+
+def build_and_save_hierarchical(dimensions: int | None = None, use_titles: bool = False) -> Tuple[HierarchicalIndex, List[Dict]]:
+    """Build the page index + chunk index from the embedding store and save both with the page map."""
+    embeddings, metadatas = load_embeddings(EMBEDDINGS_PATH)
+    embeddings = normalize_embeddings(embeddings)
+    if dimensions:
+        embeddings = truncate_embeddings(embeddings, dimensions)
+    index = build_hierarchical_index(embeddings, metadatas, use_titles)
+    save_index(index.chunk_index, INDEX_PATH)
+    save_index(index.page_index, PAGE_INDEX_PATH)
+    save_page_map(index, PAGE_MAP_PATH)
+    return index, metadatas
+
+
+def load_hierarchical_index(
+    chunk_index_path: str = INDEX_PATH,
+    page_index_path: str = PAGE_INDEX_PATH,
+    map_path: str = PAGE_MAP_PATH,
+    page_probe: int = PAGE_PROBE,
+) -> HierarchicalIndex:
+    with np.load(map_path) as page_map:
+        pages = list(zip(page_map["sources"].tolist(), page_map["pages"].tolist()))
+        page_of = page_map["page_of"]
+    return HierarchicalIndex(
+        faiss.read_index(page_index_path), faiss.read_index(chunk_index_path), page_of, pages, page_probe
+    )
+
+
 if __name__ == "__main__":
-    index, metadatas = build_and_save()
+    parser = argparse.ArgumentParser(description="Build FAISS indexes / serve a shard")
+    parser.add_argument("--shards", type=int, help="Build N shards instead of a single index")
+    parser.add_argument("--shard-by", choices=["hash", "source"], default="hash")
+    parser.add_argument("--serve-shard", help="Serve this shard index file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--hierarchical", action="store_true", help="Also build the page-level index")
+    parser.add_argument("--page-titles", action="store_true", help="Add embedded page titles to page vectors")
+    parser.add_argument("--dimensions", type=int, default=INDEX_DIMENSIONS, help="Truncate vectors to this size (0: keep)")
+    parser.add_argument("--storage", choices=["float32", "float16", "int8"], default=INDEX_STORAGE)
+    parser.add_argument("--binary", action="store_true", help="Also build the two-stage binary index (INDEX_BINARY=1 serves it)")
+    args = parser.parse_args()
+
+    if args.serve_shard:
+        if not SHARD_AUTHKEY:
+            parser.error("--serve-shard needs SHARD_AUTHKEY in the environment (clients use the same key)")
+        serve_shard(args.serve_shard, (args.host, args.port))
+    elif args.shards:
+        build_and_save_shards(args.shards, args.shard_by)
+    elif args.hierarchical:
+        build_and_save_hierarchical(args.dimensions, use_titles=args.page_titles)
+    else:
+        index, metadatas = build_and_save(args.dimensions, args.storage)
+        if args.binary:
+            build_and_save_binary(args.dimensions)
@@ -1,23 +1,55 @@
-import fitz  # PyMuPDF
+# split_double_pages_pdfs.py
+# Splits double-page spreads of scanned reports into single pages. Spreads are
+# detected from the page aspect ratio; many PDFs (and page-range segments of large
+# ones) are processed in parallel, each output saved with garbage collection + deflate.
+#
+#   python src/split_double_pages_pdfs.py data/raw/sr_2022_cb_v.pdf --workers 8
+#   python src/split_double_pages_pdfs.py data/raw/*.pdf --segment-pages 100 --output-dir data/split
 
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def split_double_pages_vertically(pdf_path, output_path, avoid_pages=None):
+SPREAD_MIN_ASPECT = 1.2  # width / height; a portrait page is ~0.71, a spread of two ~1.41
+GARBAGE_LEVEL = 3  # PyMuPDF save(garbage=...): 3 also merges duplicate objects
+
+
+def is_spread(page, min_aspect: float = SPREAD_MIN_ASPECT) -> bool:
+    return page.rect.width / page.rect.height >= min_aspect
+
+
+def split_double_pages_vertically(
+    pdf_path,
+    output_path,
+    avoid_pages=None,
+    start=0,
+    end=None,
+    min_aspect=SPREAD_MIN_ASPECT,
+    garbage=GARBAGE_LEVEL,
+    deflate=True,
+):
     """
     Bir PDF'in içindeki sayfaları tam ortadan dikey olarak ikiye böler (soldaki ve sağdaki),
     avoid_pages içindekileri atlayarak yeni bir PDF oluşturur.
 
     :param pdf_path: Girdi PDF dosyasının yolu
     :param output_path: Çıktı PDF dosyasının yolu
-    :param avoid_pages: Bölünmeyecek sayfa indeksleri (0'dan başlar)
+    :param avoid_pages: Bölünmeyecek sayfa indeksleri (0'dan başlar). None ise
+        çift sayfalar en-boy oranından (>= min_aspect) otomatik bulunur.
+    :param start, end: Yalnızca [start, end) aralığındaki sayfaları işler
+    :return: Bölünen sayfa sayısı
     """
-    if avoid_pages is None:
-        avoid_pages = []
+    import fitz  # PyMuPDF
 
     input_pdf = fitz.open(pdf_path)
     output_pdf = fitz.open()
+    end = input_pdf.page_count if end is None else min(end, input_pdf.page_count)
+    split = 0
 
-    for i, page in enumerate(input_pdf):
-        if i in avoid_pages:
+    for i in range(start, end):
+        page = input_pdf[i]
+        keep = i in avoid_pages if avoid_pages is not None else not is_spread(page, min_aspect)
+        if keep:
             output_pdf.insert_pdf(input_pdf, from_page=i, to_page=i)
             continue
 
@@ -33,15 +65,84 @@ def split_double_pages_vertically(pdf_path, output_path, avoid_pages=None):
         right_rect = fitz.Rect(width / 2, 0, width, height)
         right_page = output_pdf.new_page(width=width / 2, height=height)
         right_page.show_pdf_page(right_page.rect, input_pdf, i, clip=right_rect)
+        split += 1
 
-    output_pdf.save(output_path)
+    output_pdf.save(output_path, garbage=garbage, deflate=deflate)
     output_pdf.close()
     input_pdf.close()
+    return split
 
 
-if __name__ == "__main__":
-    split_double_pages_vertically(
-        pdf_path=r"data\raw\sr_2022_cb_v.pdf",
-        output_path=r"data\raw\sr_2022_cb_v_split.pdf",
-        avoid_pages=[0, 16, 17],
+def plan_segments(pdf_path: str, output_dir: str | None = None, segment_pages: int | None = None) -> list[dict]:
+    """Split jobs of one PDF: the whole file, or consecutive page ranges of `segment_pages`."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    directory = output_dir or os.path.dirname(pdf_path)
+    if not segment_pages or segment_pages >= page_count:
+        return [{"pdf_path": pdf_path, "output_path": os.path.join(directory, f"{stem}_split.pdf")}]
+    return [
+        {
+            "pdf_path": pdf_path,
+            "output_path": os.path.join(directory, f"{stem}_split_p{start + 1}-{min(start + segment_pages, page_count)}.pdf"),
+            "start": start,
+            "end": start + segment_pages,
+        }
+        for start in range(0, page_count, segment_pages)
+    ]
+
+
+def _run_job(job: dict) -> tuple[str, int]:
+    return job["output_path"], split_double_pages_vertically(**job)
+
+
+def split_pdfs(
+    pdf_paths: list[str],
+    output_dir: str | None = None,
+    workers: int | None = None,
+    segment_pages: int | None = None,
+    **options,
+) -> list[tuple[str, int]]:
+    """Split many PDFs (and segments of large ones) across a process pool. Returns (output, spreads split)."""
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        dict(job, **options)
+        for pdf_path in pdf_paths
+        for job in plan_segments(pdf_path, output_dir, segment_pages)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_job, jobs))
+    for output_path, split in results:
+        print(f"✅ {output_path}: {split} spread(s) split")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split double-page spreads of PDFs into single pages")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--output-dir", help="Default: next to each input PDF")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--segment-pages", type=int, help="Split large PDFs in segments of N pages")
+    parser.add_argument("--min-aspect", type=float, default=SPREAD_MIN_ASPECT)
+    parser.add_argument("--avoid-pages", type=int, nargs="+", help="0-based pages never split (disables detection)")
+    parser.add_argument("--garbage", type=int, default=GARBAGE_LEVEL, choices=range(5))
+    parser.add_argument("--no-deflate", action="store_true")
+    args = parser.parse_args()
+
+    split_pdfs(
+        args.pdfs,
+        args.output_dir,
+        args.workers,
+        args.segment_pages,
+        avoid_pages=args.avoid_pages,
+        min_aspect=args.min_aspect,
+        garbage=args.garbage,
+        deflate=not args.no_deflate,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import hashlib
+import os
 import re
 
 
@@ -114,3 +116,55 @@ def analyze_global_metrics(page, page_label):
 def extract_impact_notes(impact_region):
     """Extract small-font note texts under the 'Impact' section."""
     return [clean_text(b[4]) for b in impact_region if b[5] < 9 and len(b[4]) > 20]
+
+
+def chunk_id(chunk: dict) -> str:
+    """Stable identifier of a chunk, derived from its source file, page, header (and split part)."""
+    source = os.path.basename(str(chunk.get("source", "")).replace("\\", "/"))
+    key = f"{source}|{chunk.get('page')}|{chunk.get('header', '')}"
+    if "part" in chunk:
+        key += f"|{chunk['part']}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(chunk: dict) -> str:
+    """Hash of the chunk content, used to detect changed chunks between ingestions."""
+    return hashlib.sha1(chunk.get("content", "").encode("utf-8")).hexdigest()
+
+
+def chunk_key(chunk: dict) -> str:
+    """
+    The chunk id plus its content hash. Ids alone are not unique (a page can hold two
+    "Key Metrics" chunks), so stores pair chunks and vectors by this key instead.
+    """
+    return f"{chunk_id(chunk)}:{content_hash(chunk)}"
+
+
+def record_key(record: dict) -> str:
+    """`chunk_key` of the chunk an embedding store record was made from."""
+    meta = record["metadata"]
+    return f"{meta.get('chunk_id')}:{meta.get('content_hash')}"
+
+
+def format_other_occurrences(chunk: dict) -> str:
+    """Citation suffix listing the other places a deduplicated chunk appears in."""
+    others = [
+        f"{o['source']} p.{o['page']}"
+        for o in chunk.get("occurrences", [])[1:]
+        if (o["source"], o["page"]) != (chunk.get("source"), chunk.get("page"))
+    ]
+    return f" | Also in: {', '.join(dict.fromkeys(others))}" if others else ""
+
+
+def load_qtest_questions(path: str = "QTEST.md") -> list[str]:
+    """Read the evaluation questions (`### N. ...` headings) from QTEST.md."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [m.group(1).strip() for m in re.finditer(r"^###\s+\d+\.\s+(.+)$", f.read(), re.M)]
+
+
+def build_context(retrieved: list[dict]) -> str:
+    """Join retrieved chunks into the LLM context, each prefixed by its location."""
+    return "\n\n".join(
+        f"[{c['main_title_of_page']} > {c['main_subtitle_of_page']} > {c['header']}] (Page {c['page']})\n{c['content']}"
+        for c in retrieved
+    )
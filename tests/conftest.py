@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Tests never need network access or an API key
+os.environ.setdefault("LLM_BACKEND", "offline")
+# ...and never write into the repository's log directories
+_LOG_DIR = tempfile.mkdtemp()
+os.environ.setdefault("QA_LOG_PATH", os.path.join(_LOG_DIR, "QA.jsonl"))
+os.environ.setdefault("CHUNK_LOG_PATH", os.path.join(_LOG_DIR, "pdf_chunk.log"))
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+from admission import AdmissionGate, Overloaded, SHED
+from fastapi.testclient import TestClient
+
+
+def test_gate_sheds_when_queue_is_full():
+    gate = AdmissionGate("test_full", max_concurrency=1, max_queue=0)
+    with gate.slot():
+        with pytest.raises(Overloaded) as exc:
+            with gate.slot():
+                pass
+    assert exc.value.status_code == 429
+    assert SHED.value(gate="test_full", reason="queue_full") == 1
+
+
+def test_gate_times_out_waiting_callers():
+    gate = AdmissionGate("test_timeout", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    with gate.slot():
+        with pytest.raises(Overloaded) as exc:
+            with gate.slot():
+                pass
+    assert exc.value.status_code == 503
+    assert gate.waiting == 0
+
+
+def test_gate_admits_queued_caller_once_slot_frees():
+    gate = AdmissionGate("test_queue", max_concurrency=1, max_queue=1, queue_timeout=2)
+    release = threading.Event()
+    admitted = []
+
+    def holder():
+        with gate.slot():
+            release.wait()
+
+    def waiter():
+        with gate.slot():
+            admitted.append(True)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    while gate.in_flight == 0:
+        time.sleep(0.001)
+    waiting = threading.Thread(target=waiter)
+    waiting.start()
+    while gate.waiting == 0:
+        time.sleep(0.001)
+    release.set()
+    waiting.join(2)
+    thread.join(2)
+    assert admitted == [True]
+
+
+def test_overloaded_becomes_retry_after_response(monkeypatch):
+    import app as app_module
+    import qa
+
+    def overloaded(*args, **kwargs):
+        raise Overloaded("completion", "queue_full", 429, retry_after=3)
+
+    monkeypatch.setattr(qa, "answer_question", overloaded)
+    response = TestClient(app_module.app).post("/ask", json={"question": "hi"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
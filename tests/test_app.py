@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from app import app
+
+client = TestClient(app)
+
+
+def test_health():
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_ask_runs_offline():
+    response = client.post("/ask", json={"question": "What is TradeWaltz?"})
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body["answer"], str) and body["answer"]
+    assert isinstance(body["sources"], list)
+
+
+def test_ask_reports_stage_timings_and_metrics():
+    response = client.post("/ask", json={"question": "What is TradeWaltz?"})
+    assert "embed;dur=" in response.headers["Server-Timing"]
+    assert "search;dur=" in response.headers["Server-Timing"]
+
+    metrics = client.get("/metrics").text
+    assert 'rag_stage_duration_seconds_count{stage="embed"}' in metrics
+    assert "# TYPE rag_low_similarity_fallbacks_total counter" in metrics
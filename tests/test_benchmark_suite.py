@@ -0,0 +1,20 @@
+from benchmark_suite import compare_to_baseline
+
+
+def test_compare_to_baseline_flags_only_real_regressions():
+    baseline = {"search.single_p50_ms@360": 1.0, "chunking.template.pages_per_sec": 100.0}
+    results = {"search.single_p50_ms@360": 1.1, "chunking.template.pages_per_sec": 70.0}
+
+    regressions = compare_to_baseline(results, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("chunking.template.pages_per_sec")
+
+
+def test_compare_to_baseline_ignores_noise_below_the_floor():
+    baseline = {"search.single_p50_ms@360": 0.01, "index.build_s@360": 0.0003, "index.rss_growth_mb@360": 0.0}
+    results = {"search.single_p50_ms@360": 0.02, "index.build_s@360": 0.001, "index.rss_growth_mb@360": 1.0}
+    assert compare_to_baseline(results, baseline, threshold=0.2) == []
+
+    results["index.rss_growth_mb@360"] = 40.0
+    regressions = compare_to_baseline(results, baseline, threshold=0.2)
+    assert [r.split(":")[0] for r in regressions] == ["index.rss_growth_mb@360"]
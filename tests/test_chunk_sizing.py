@@ -0,0 +1,60 @@
+from chunk_sizing import pack_chunks, split_chunk
+
+
+class WhitespaceEncoding:
+    """One token per word, enough to exercise the window arithmetic."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def test_split_chunk_overlaps_and_keeps_provenance():
+    chunk = {"source": "a.pdf", "page": 3, "header": "Substance",
+             "content": " ".join(f"w{i}" for i in range(25))}
+    pieces = split_chunk(chunk, max_tokens=10, overlap=2, encoding=WhitespaceEncoding())
+
+    assert [p["part"] for p in pieces] == [0, 1, 2]
+    assert all(p["parts"] == 3 and p["page"] == 3 for p in pieces)
+    assert pieces[0]["content"].split()[-2:] == pieces[1]["content"].split()[:2]
+    assert pieces[-1]["content"].split()[-1] == "w24"
+
+
+def test_pack_chunks_only_merges_within_page():
+    tiny = lambda page, header: {"source": "a.pdf", "page": page, "header": header, "content": "50 %"}
+    chunks = [tiny(1, "Key Metrics"), tiny(1, "Key Metrics"), tiny(1, "Social Issues"), tiny(2, "Key Metrics")]
+    packed = pack_chunks(chunks, min_tokens=5, max_tokens=20, encoding=WhitespaceEncoding())
+
+    assert [c["header"] for c in packed] == ["Key Metrics", "Social Issues", "Key Metrics"]
+    assert len(packed[0]["packed_from"]) == 2
+    assert "packed_from" not in packed[1] and "packed_from" not in packed[2]
+
+
+def test_pack_chunks_keeps_order_around_large_chunks():
+    chunk = lambda content: {"source": "a.pdf", "page": 1, "header": "Substance", "content": content}
+    large = chunk("one two three four five six")
+    packed = pack_chunks([chunk("a"), large, chunk("b")], min_tokens=5, max_tokens=20, encoding=WhitespaceEncoding())
+    assert [c["content"] for c in packed] == ["a", large["content"], "b"]
+
+
+class ByteEncoding:
+    """One token per UTF-8 byte, like byte-level BPE at its worst."""
+
+    def encode(self, text):
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens):
+        return bytes(tokens).decode("utf-8", errors="replace")
+
+    def decode_single_token_bytes(self, token):
+        return bytes([token])
+
+
+def test_split_chunk_never_cuts_a_multibyte_character():
+    chunk = {"source": "a.pdf", "page": 1, "header": "Substance", "content": "çğüşöı" * 10}
+    pieces = split_chunk(chunk, max_tokens=9, overlap=3, encoding=ByteEncoding())
+    assert len(pieces) > 1
+    assert all("\ufffd" not in p["content"] for p in pieces)
+    assert pieces[0]["content"].startswith("çğüş") and pieces[-1]["content"].endswith("öı")
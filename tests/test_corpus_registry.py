@@ -0,0 +1,40 @@
+import json
+
+import faiss
+import numpy as np
+from corpus_registry import CORPUS_EVICTIONS, CorpusPaths, CorpusRegistry
+
+
+def _write_corpus(directory, n):
+    directory.mkdir()
+    chunks_path, index_path = directory / "merged_chunks.jsonl", directory / "faiss_index.faiss"
+    chunks_path.write_text("".join(json.dumps({"content": f"chunk {i}"}) + "\n" for i in range(n)))
+    index = faiss.IndexFlatIP(64)
+    index.add(np.random.RandomState(0).rand(n, 64).astype("float32"))
+    faiss.write_index(index, str(index_path))
+    return CorpusPaths(str(chunks_path), str(index_path))
+
+
+def test_lru_eviction_under_memory_budget(tmp_path):
+    corpora = {name: _write_corpus(tmp_path / name, 1000) for name in ("a", "b", "c")}
+    one_corpus_mb = CorpusRegistry(dict(corpora)).get("a").resident_bytes / 1024 / 1024
+    registry = CorpusRegistry(corpora, budget_mb=2.5 * one_corpus_mb)
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # "b" is now the least recently used
+    evictions = CORPUS_EVICTIONS.value(corpus="b")
+    registry.get("c")
+
+    loaded = {s["corpus"] for s in registry.status() if s["loaded"]}
+    assert loaded == {"a", "c"}
+    assert CORPUS_EVICTIONS.value(corpus="b") == evictions + 1
+    assert registry.get("a").index.ntotal == 1000
+
+
+def test_unknown_corpus_is_404():
+    from fastapi.testclient import TestClient
+    from app import app
+
+    response = TestClient(app).post("/ask", json={"question": "hi", "corpus": "nope"})
+    assert response.status_code == 404
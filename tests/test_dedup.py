@@ -0,0 +1,18 @@
+from dedup import dedupe_chunks
+
+
+def test_near_duplicates_collapse_with_back_references():
+    text = "NTT DATA reduced the workload of trade operations by up to 50% using TradeWaltz across many partners in the region"
+    chunks = [
+        {"source": "sr_2020_cb_p.pdf", "page": 9, "header": "Substance", "content": text},
+        {"source": "sr_2022_cb_v_split.pdf", "page": 14, "header": "Substance", "content": text + "."},
+        {"source": "sr_2023_cb_v.pdf", "page": 6, "header": "Key Metrics", "content": "Accuracy of demand forecasting 90%"},
+    ]
+    canonical, report = dedupe_chunks(chunks)
+
+    assert report["input_chunks"] == 3
+    assert report["output_chunks"] == 2
+    assert [(o["source"], o["page"]) for o in canonical[0]["occurrences"]] == [
+        ("sr_2020_cb_p.pdf", 9),
+        ("sr_2022_cb_v_split.pdf", 14),
+    ]
@@ -0,0 +1,47 @@
+import os
+
+import fitz
+
+import draw_page_section_boxes as boxes
+
+
+def _make_pdf(path, n_pages):
+    doc = fitz.open()
+    for i in range(n_pages):
+        doc.new_page(width=300, height=200).insert_text((20, 40), f"page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+
+def test_pages_render_once_and_templates_reuse_the_cache(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "report.pdf")
+    _make_pdf(pdf_path, 4)
+    cache_dir = str(tmp_path / "cache")
+
+    images = boxes.render_pages(pdf_path, [1, 2, 3, 4], dpi=72, cache_dir=cache_dir, workers=2)
+    assert all(os.path.exists(path) for path in images.values())
+
+    def no_render(*args):
+        raise AssertionError("cached pages must not be rendered again")
+
+    monkeypatch.setattr(boxes, "_render_pages", no_render)
+    assert boxes.render_pages(pdf_path, [2, 4], dpi=72, cache_dir=cache_dir) == {2: images[2], 4: images[4]}
+
+    templates = {
+        "a": {"title": ((10, 10), (100, 50))},
+        "b": {"title": ((10, 10), (150, 60)), "body": ((10, 70), (290, 190))},
+    }
+    monkeypatch.setattr(boxes, "render_pages", lambda pdf, pages, dpi, workers: images)
+    written = boxes.draw_section_boxes_on_pages(pdf_path, [1, 3], templates, dpi=72, output_dir=str(tmp_path / "out"))
+    assert sorted(os.path.basename(p) for p in written) == [
+        "report_page1_a_sections.jpg", "report_page1_b_sections.jpg",
+        "report_page3_a_sections.jpg", "report_page3_b_sections.jpg",
+    ]
+
+
+def test_boxes_are_scaled_to_the_render_dpi():
+    from PIL import Image
+
+    img = boxes.draw_sections(Image.new("RGB", (300, 300), "white"), {"box": ((100, 100), (200, 200))}, scale=72 / 150)
+    assert img.getpixel((48, 60)) != (255, 255, 255)  # left edge at 100 * 72/150 = 48
+    assert img.getpixel((100, 60)) == (255, 255, 255)
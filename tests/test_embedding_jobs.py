@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import embedding_jobs
+from embedding_jobs import EmbeddingJob, IncompleteEmbeddingJob
+
+
+class FlakyBackend:
+    """Embeds like a 2-d backend, but fails on chosen texts or after a number of calls."""
+
+    def __init__(self, bad_texts=(), crash_after=None):
+        self.bad_texts = set(bad_texts)
+        self.crash_after = crash_after
+        self.embedded = []
+
+    def embed(self, texts, dimensions):
+        if self.crash_after is not None and len(self.embedded) >= self.crash_after:
+            raise KeyboardInterrupt  # the process dies mid-run
+        if self.bad_texts & set(texts):
+            raise RuntimeError("upstream 500")
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def _write_chunks(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"source": "r.pdf", "page": i, "header": "Substance", "content": f"chunk {i}"}) + "\n")
+
+
+def _job(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(embedding_jobs, "get_backend", lambda: backend)
+    return EmbeddingJob(str(tmp_path / "job"), str(tmp_path / "chunks.jsonl"), dimensions=2, batch_size=4)
+
+
+def test_resume_after_crash_skips_journaled_batches(tmp_path, monkeypatch):
+    _write_chunks(tmp_path / "chunks.jsonl", 10)
+    crashing = FlakyBackend(crash_after=8)
+    with pytest.raises(KeyboardInterrupt):
+        _job(tmp_path, monkeypatch, crashing).run()
+
+    # A half-written journal line, as left by a crash during a write
+    with open(tmp_path / "job" / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"key": "torn')
+
+    resumed = FlakyBackend()
+    job = _job(tmp_path, monkeypatch, resumed)
+    assert job.status()["done"] == 8
+    job.run()
+    assert resumed.embedded == ["chunk 8", "chunk 9"]
+
+    job.finalize(str(tmp_path / "embeddings.jsonl"))
+    with open(tmp_path / "embeddings.jsonl", encoding="utf-8") as f:
+        pages = [json.loads(line)["metadata"]["page"] for line in f]
+    assert pages == list(range(10))
+
+
+def test_failed_chunks_block_finalize_until_retried(tmp_path, monkeypatch):
+    _write_chunks(tmp_path / "chunks.jsonl", 6)
+    job = _job(tmp_path, monkeypatch, FlakyBackend(bad_texts={"chunk 2"}))
+    status = job.run()
+    assert (status["done"], status["failed"]) == (5, 1)
+
+    with open(tmp_path / "job" / "failed.jsonl", encoding="utf-8") as f:
+        queued = [json.loads(line) for line in f]
+    assert [(e["page"], e["attempts"]) for e in queued] == [(2, 1)]
+    assert "upstream 500" in queued[0]["error"]
+    with pytest.raises(IncompleteEmbeddingJob):
+        job.finalize(str(tmp_path / "embeddings.jsonl"))
+
+    healed = FlakyBackend()
+    job = _job(tmp_path, monkeypatch, healed)
+    assert job.retry()["failed"] == 0
+    assert healed.embedded == ["chunk 2"]
+    assert job.finalize(str(tmp_path / "embeddings.jsonl")) == 6
+
+
+def test_retry_resets_exhausted_attempts(tmp_path, monkeypatch):
+    _write_chunks(tmp_path / "chunks.jsonl", 3)
+    job = _job(tmp_path, monkeypatch, FlakyBackend(bad_texts={"chunk 1"}))
+    job.max_attempts = 2
+    job.run()
+    job.run()
+    assert job.status()["exhausted"] == 1
+    assert job.pending() == []  # plain runs leave it alone
+
+    healed = FlakyBackend()
+    job = _job(tmp_path, monkeypatch, healed)
+    job.max_attempts = 2
+    assert job.retry()["failed"] == 0
+    assert healed.embedded == ["chunk 1"]
+    assert job.finalize(str(tmp_path / "embeddings.jsonl")) == 3
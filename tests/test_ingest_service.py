@@ -0,0 +1,204 @@
+import os
+import time
+
+import fitz
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app as app_module
+from corpus_registry import CorpusPaths, CorpusRegistry
+from embedding import embedding_record
+from ingest_service import IngestService, commit_staged, source_name, stage_source, update_job
+from jsonl_io import read_jsonl, write_jsonl
+from llm_backend import get_backend
+
+
+def _make_pdf(path, topic, n_pages=3):
+    doc = fitz.open()
+    for i in range(n_pages):
+        page = doc.new_page(width=400, height=600)
+        page.insert_text((30, 50), f"{topic} case {i}", fontsize=16)
+        page.insert_text((30, 100), f"{topic} improves operations by {10 * (i + 1)}% in year {i}.", fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def _corpus(tmp_path, name="reports"):
+    directory = tmp_path / name
+    paths = CorpusPaths(str(directory / "merged_chunks.jsonl"), str(directory / "faiss_index.faiss"), str(directory / "bm25_index.bin"))
+    return CorpusRegistry({}), paths
+
+
+def _wait(service, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = service.queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish: {service.queue.get(job_id)}")
+
+
+def test_job_runs_in_the_background_and_publishes_the_corpus(tmp_path):
+    registry, paths = _corpus(tmp_path)
+    registry.register("reports", paths.chunks, paths.index, paths.lexical)  # empty until the first job
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    service = IngestService(registry, str(tmp_path / "ingest"), str(raw), workers=1, poll_s=0, resize=False)
+    pdf_a = str(raw / "tradewaltz.pdf")
+    _make_pdf(pdf_a, "TradeWaltz")
+    try:
+        job = service.submit(pdf_a, corpus="reports")
+        assert service.submit(pdf_a, corpus="reports")["id"] == job["id"]  # same content, same job
+        job = _wait(service, job["id"])
+        assert job["status"] == "done", job["error"]
+        assert (job["progress"], job["chunks"], job["corpus_chunks"]) == (1.0, 3, 3)
+        assert set(job["timings"]) == {"chunking", "embedding", "indexing", "publishing"}
+
+        corpus = registry.get("reports")
+        assert corpus.index.ntotal == len(corpus.chunks) == 3
+
+        # A second report is added next to the first; the loaded corpus is swapped in place
+        pdf_b = str(raw / "healthcare.pdf")
+        _make_pdf(pdf_b, "Healthcare", n_pages=2)
+        job_b = _wait(service, service.submit(pdf_b, corpus="reports")["id"])
+        assert job_b["status"] == "done", job_b["error"]
+        swapped = registry.get("reports")
+        assert swapped is not corpus
+        assert [c["source"] for c in swapped.chunks] == ["tradewaltz.pdf"] * 3 + ["healthcare.pdf"] * 2
+        assert swapped.index.ntotal == 5
+        assert len(service.queue.jobs()) == 2
+        assert not [n for n in os.listdir(tmp_path / "reports") if n.endswith(".staged")]
+    finally:
+        service.stop()
+
+
+def test_unfinished_jobs_resume_and_watcher_skips_known_files(tmp_path, monkeypatch):
+    registry, paths = _corpus(tmp_path, "default")
+    registry.register("default", paths.chunks, paths.index, paths.lexical)
+    os.makedirs(os.path.dirname(paths.chunks))
+    write_jsonl(paths.chunks, [{"content": "served", "page": 1, "source": "sr_2020_cb_p.pdf"}])
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _make_pdf(str(raw / "sr_2031_cb_v.pdf"), "Mobility")
+    _make_pdf(str(raw / "sr_2020_cb_p.pdf"), "Served")  # already in the corpus
+    (raw / "notes.txt").write_text("not a pdf")
+
+    service = IngestService(registry, str(tmp_path / "ingest"), str(raw), workers=1, poll_s=0, resize=False)
+    monkeypatch.setattr(service, "start", lambda watch=False: None)  # queue only, run nothing
+    queued = service.scan()
+    assert [(j["source"], j["layout"], j["corpus"]) for j in queued] == [("sr_2031_cb_v.pdf", "pages", "default")]
+    assert service.scan() == []  # unchanged files are not looked at again
+
+    # The API process died mid-job: a new service picks the job up again
+    update_job(service.queue.path(queued[0]["id"]), status="running", stage="embedding")
+    restarted = IngestService(registry, str(tmp_path / "ingest"), str(raw), workers=1, poll_s=0, resize=False)
+    assert [j["id"] for j in restarted.queue.recover()] == [queued[0]["id"]]
+    assert restarted.queue.get(queued[0]["id"])["status"] == "queued"
+
+    # Corrected reports: one ingested by a job is re-ingested, one built by the pipeline is not
+    monkeypatch.setattr(restarted, "start", lambda watch=False: None)
+    write_jsonl(paths.chunks, [{"content": "served", "page": 1, "source": name} for name in ("sr_2020_cb_p.pdf", "sr_2031_cb_v.pdf")])
+    for name in ("sr_2031_cb_v.pdf", "sr_2020_cb_p.pdf"):
+        _make_pdf(str(raw / name), "Corrected")
+        os.utime(raw / name, (time.time() - 60, time.time() - 60))
+    assert [j["source"] for j in restarted.scan()] == ["sr_2031_cb_v.pdf"]
+
+
+def test_publish_replaces_one_source_and_keeps_rows_aligned(tmp_path):
+    _, paths = _corpus(tmp_path)
+    backend = get_backend()
+
+    def chunks_of(source, texts):
+        return [{"content": t, "page": i + 1, "source": source, "header": "h"} for i, t in enumerate(texts)]
+
+    def records_of(chunks):
+        return [embedding_record(c, v) for c, v in zip(chunks, backend.embed([c["content"] for c in chunks]))]
+
+    old_a, b = chunks_of("a.pdf", ["alpha one", "alpha two"]), chunks_of("b.pdf", ["beta one"])
+    os.makedirs(os.path.dirname(paths.chunks))
+    write_jsonl(paths.chunks, old_a + b + [{"content": "", "page": 9, "source": "b.pdf"}])
+    write_jsonl(os.path.join(os.path.dirname(paths.chunks), "embeddings.jsonl"), records_of(b + old_a))
+
+    new_a = chunks_of("a.pdf", ["alpha revised", "alpha two", "alpha three"])
+    write_jsonl(str(tmp_path / "new_chunks.jsonl"), new_a)
+    write_jsonl(str(tmp_path / "new_embeddings.jsonl"), records_of(new_a))
+
+    total, staged = stage_source("a.pdf", str(tmp_path / "new_chunks.jsonl"), str(tmp_path / "new_embeddings.jsonl"), paths)
+    assert total == 4 and list(staged) == [paths.chunks, os.path.join(os.path.dirname(paths.chunks), "embeddings.jsonl"), paths.lexical, paths.index]
+    assert len(list(read_jsonl(paths.chunks))) == 4 and not os.path.exists(paths.index)  # served files untouched until commit
+    commit_staged(staged)
+    chunks = list(read_jsonl(paths.chunks))
+    assert [c["content"] for c in chunks] == ["beta one", "alpha revised", "alpha two", "alpha three"]
+
+    import faiss
+
+    index = faiss.read_index(paths.index)
+    vectors = np.array(backend.embed([c["content"] for c in chunks]), dtype="float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    _, ids = index.search(vectors, 1)
+    assert list(ids[:, 0]) == [0, 1, 2, 3]
+    assert os.path.exists(paths.lexical)
+
+
+def test_ingest_api_accepts_uploads_and_reports_jobs(tmp_path, monkeypatch):
+    registry, _ = _corpus(tmp_path)
+    service = IngestService(registry, str(tmp_path / "ingest"), str(tmp_path / "raw"), workers=1)
+    monkeypatch.setattr(service, "start", lambda watch=False: None)  # queue only, run nothing
+    monkeypatch.setattr(app_module, "ingestion", service)
+    client = TestClient(app_module.app)
+    assert client.get("/ingest/jobs").status_code == 403  # disabled without a token
+
+    monkeypatch.setattr(app_module, "INGEST_API_TOKEN", "s3cret")
+    assert client.get("/ingest/jobs").status_code == 401
+    client.headers["Authorization"] = "Bearer s3cret"
+
+    pdf_path = str(tmp_path / "upload.pdf")
+    _make_pdf(pdf_path, "Upload")
+    with open(pdf_path, "rb") as f:
+        response = client.post(
+            "/ingest?filename=sr_2024_cb_v.pdf&corpus=uploads", content=f.read(), headers={"Content-Type": "application/pdf"}
+        )
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], job["layout"], job["corpus"]) == ("queued", "2024", "uploads")
+    assert os.path.exists(tmp_path / "raw" / "sr_2024_cb_v.pdf")
+
+    # Re-uploading the same report is fine; other content under its name is refused
+    with open(pdf_path, "rb") as f:
+        assert client.post("/ingest?filename=sr_2024_cb_v.pdf&corpus=uploads", content=f.read()).json()["id"] == job["id"]
+    assert client.post("/ingest?filename=sr_2024_cb_v.pdf", content=b"%PDF-other").status_code == 409
+    assert sorted(os.listdir(tmp_path / "raw")) == ["sr_2024_cb_v.pdf"]
+
+    # ...unless it is sent as a correction, and nothing over the size limit is kept
+    corrected = str(tmp_path / "corrected.pdf")
+    _make_pdf(corrected, "Corrected")
+    with open(corrected, "rb") as f:
+        response = client.post("/ingest?filename=sr_2024_cb_v.pdf&corpus=uploads&replace=true", content=f.read())
+    assert response.status_code == 202 and response.json()["id"] != job["id"]
+    with open(corrected, "rb") as f, open(tmp_path / "raw" / "sr_2024_cb_v.pdf", "rb") as stored:
+        assert stored.read() == f.read()
+    monkeypatch.setattr(app_module, "INGEST_MAX_UPLOAD_MB", 0.001)
+    assert client.post("/ingest?filename=big.pdf", content=b"%PDF" + b"x" * 2048).status_code == 413
+    assert sorted(os.listdir(tmp_path / "raw")) == ["sr_2024_cb_v.pdf"]
+    corrected_job = response.json()
+
+    assert client.get(f"/ingest/jobs/{job['id']}").json()["id"] == job["id"]
+    assert {j["id"] for j in client.get("/ingest/jobs").json()["jobs"]} == {job["id"], corrected_job["id"]}
+    assert client.get("/ingest/jobs/nope").status_code == 404
+
+    raw_pdf = str(tmp_path / "raw" / "sr_2024_cb_v.pdf")
+    assert client.post("/ingest", json={"path": str(tmp_path / "raw" / "missing.pdf")}).status_code == 404
+    assert client.post("/ingest", json={"path": raw_pdf, "layout": "1999"}).status_code == 400
+    assert client.post("/ingest?filename=notes.txt", content=b"x").status_code == 400
+
+    # Server-side paths only from the watched folder, corpus names only as plain directory names
+    assert client.post("/ingest", json={"path": pdf_path}).status_code == 403
+    assert client.post("/ingest", json={"path": str(tmp_path / "raw" / ".." / "upload.pdf")}).status_code == 403
+    assert client.post("/ingest", json={"path": raw_pdf, "corpus": "../../etc"}).status_code == 400
+
+
+def test_split_reports_keep_their_source_name():
+    assert source_name("raw/sr_2022_cb_v.pdf", "2022") == "sr_2022_cb_v_split.pdf"
+    assert source_name("raw/sr_2022_cb_v_split.pdf", "2022") == "sr_2022_cb_v_split.pdf"  # already split
+    assert source_name("raw/sr_2023_cb_v.pdf", "2023") == "sr_2023_cb_v.pdf"
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from jsonl_io import InvalidRecord, read_chunks, read_jsonl, write_jsonl
+from merge_chunks import merge_chunk_files
+from test_chunk_sizing import WhitespaceEncoding
+
+
+def _chunk(page, header, content, source="r.pdf"):
+    return {"main_title_of_page": "", "main_subtitle_of_page": "", "header": header,
+            "content": content, "page": page, "source": source}
+
+
+def test_round_trip_keeps_unicode_and_validates_chunks(tmp_path):
+    path = str(tmp_path / "chunks.jsonl")
+    chunks = [_chunk(1, "Substance", "Üzgünüm — TradeWaltz®"), _chunk(2, "Impact", "50%")]
+    assert write_jsonl(path, iter(chunks)) == 2
+    assert list(read_chunks(path)) == chunks
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n" + json.dumps({"content": "no page", "source": "r.pdf"}) + "\n")
+    with pytest.raises(InvalidRecord, match=r"chunks.jsonl:4: missing `page`"):
+        list(read_chunks(path))
+    assert len(list(read_jsonl(path))) == 3  # unvalidated reads accept any record
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    path = str(tmp_path / "store.jsonl")
+    write_jsonl(path, [{"a": 1}])
+
+    def broken():
+        yield {"a": 2}
+        raise RuntimeError("crash mid-write")
+
+    with pytest.raises(RuntimeError):
+        write_jsonl(path, broken())
+    assert list(read_jsonl(path)) == [{"a": 1}]
+    assert [p.name for p in tmp_path.iterdir()] == ["store.jsonl"]
+
+
+def test_merge_is_a_page_ordered_k_way_merge_without_repeated_ids(tmp_path):
+    a, b, out = (str(tmp_path / name) for name in ("a.jsonl", "b.jsonl", "merged.jsonl"))
+    write_jsonl(a, [_chunk(1, "Substance", "one two three"), _chunk(3, "Impact", "seven")])
+    write_jsonl(b, [_chunk(1, "Substance", "one two three"), _chunk(2, "Substance", "four five")])
+
+    stats = merge_chunk_files([a, b], out, near_duplicates=False, encoding=WhitespaceEncoding())
+    merged = list(read_chunks(out))
+    assert [c["page"] for c in merged] == [1, 2, 3]
+    assert (stats["input_chunks"], stats["duplicate_ids"], stats["output_chunks"]) == (4, 1, 3)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    {"header": "Substance", "content": "TradeWaltz® is a blockchain trade platform for trade documents."},
+    {"header": "Key Metrics", "content": "Trade workload reduced by up to 50% with TradeWaltz."},
+    {"header": "Substance", "content": "PIG LABO supports breeding management in pig farming."},
+    {"header": "Impact", "content": "Farming data helps reduce feed costs by 3.5 percent."},
+]
+
+
+def test_tokenize_keeps_names_and_figures():
+    assert tokenize("TradeWaltz® cut work by 50% (3.5 days)") == ["tradewaltz", "cut", "work", "by", "50%", "3.5", "days"]
+
+
+def test_bm25_ranks_exact_terms_and_survives_save_load(tmp_path):
+    index = BM25Index.build(CHUNKS)
+    scores, ids = index.search("TradeWaltz workload 50%", k=3)
+    assert list(ids[:2]) == [1, 0]
+    assert np.all(np.diff(scores) <= 0)
+    assert len(index.search("unrelated hospital", k=3)[1]) == 0
+
+    path = tmp_path / "bm25_index.bin"
+    index.save(str(path))
+    loaded = BM25Index.load(str(path))
+    for query in ("pig farming", "feed costs 3.5", "trade"):
+        expected, loaded_result = index.search(query, 4), loaded.search(query, 4)
+        np.testing.assert_array_equal(expected[1], loaded_result[1])
+        np.testing.assert_allclose(expected[0], loaded_result[0])
+
+
+def test_stale_saved_index_is_rebuilt_for_the_loaded_chunks(tmp_path):
+    path = str(tmp_path / "bm25_index.bin")
+    BM25Index.build(CHUNKS).save(path)
+    assert BM25Index.load_for(CHUNKS, path).matches(CHUNKS)
+
+    edited = CHUNKS[:1] + [dict(CHUNKS[1], content="Trade workload reduced by 60%.")] + CHUNKS[2:]
+    assert not BM25Index.load(path).matches(edited)  # same size, other texts
+    assert list(BM25Index.load_for(edited, path).search("60%", k=1)[1]) == [1]
+    assert BM25Index.load_for(CHUNKS[:2], path).n_docs == 2
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[3, 1, 2], [1, 4, -1]], k=60)
+    assert [doc for doc, _ in fused] == [1, 3, 4, 2]
@@ -0,0 +1,26 @@
+import numpy as np
+from llm_backend import OfflineBackend, get_backend
+
+
+def test_offline_backend_is_configured_for_tests():
+    assert get_backend().name == "offline"
+
+
+def test_offline_embeddings_are_deterministic_and_meaningful():
+    backend = OfflineBackend()
+    a, b, c = np.array(
+        backend.embed(
+            ["TradeWaltz reduces trade workload", "trade workload with TradeWaltz", "pig farming in Japan"],
+            dimensions=256,
+        )
+    )
+    assert np.allclose(a, backend.embed(["TradeWaltz reduces trade workload"], dimensions=256)[0])
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > a @ c
+
+
+def test_offline_chat_answers_from_context():
+    answer = OfflineBackend().chat(
+        [{"role": "user", "content": "Context:\n[A > B > C] (Page 9)\nUp to 50% less workload.\n\nQuestion: How much?"}]
+    )
+    assert "50%" in answer
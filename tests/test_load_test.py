@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+from app import app
+from load_test import parse_server_timing, run_load, summarize
+
+
+def test_parse_server_timing():
+    assert parse_server_timing("embed;dur=12.5, search;dur=0.30") == {"embed": 12.5, "search": 0.3}
+    assert parse_server_timing(None) == {}
+
+
+def test_in_process_load_reports_percentiles_and_stages():
+    async def _run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await run_load(client, ["What is TradeWaltz?"] * 10, concurrency=4)
+
+    results, elapsed = asyncio.run(_run())
+    summary = summarize(results, elapsed)
+    assert summary["requests"] == 10
+    assert summary["error_rate"] == 0
+    assert summary["latency_ms"]["p50"] <= summary["latency_ms"]["p99"]
+    assert {"embed", "search"} <= set(summary["stages_ms"])
+
+
+def test_all_failed_requests_report_no_percentiles():
+    summary = summarize([{"status": 503, "latency_ms": 1.0, "stages": {}}] * 3, 1.0)
+    assert summary["error_rate"] == 1.0
+    assert summary["latency_ms"] == {"p50": None, "p95": None, "p99": None}
+
+
+def test_requests_waiting_for_a_slot_stop_at_the_deadline():
+    class SlowClient:
+        async def post(self, path, json):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200)
+
+    results, _ = asyncio.run(run_load(SlowClient(), ["q"] * 10, concurrency=1, duration=0.1))
+    assert len(results) == 1  # the rest were still queued when the time was up
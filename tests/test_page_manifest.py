@@ -0,0 +1,95 @@
+import fitz
+from page_manifest import build_manifest, diff_manifests, diff_chunks
+
+
+def _make_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+def test_only_revised_pages_are_reported(tmp_path):
+    pdf_path = str(tmp_path / "report.pdf")
+    _make_pdf(pdf_path, ["page one", "page two", "page three"])
+    old = build_manifest(pdf_path, [1, 2, 3])
+
+    _make_pdf(pdf_path, ["page one", "page two (corrected)", "page three"])
+    new = build_manifest(pdf_path, [1, 2, 3])
+
+    assert diff_manifests(old, new) == ([2], [])
+    assert diff_manifests(new, new) == ([], [])
+
+
+def test_diff_chunks_detects_changed_and_removed():
+    old = [
+        {"source": "a.pdf", "page": 2, "header": "Substance", "content": "old"},
+        {"source": "a.pdf", "page": 2, "header": "Key Metrics", "content": "50%"},
+    ]
+    new = [
+        {"source": "a.pdf", "page": 2, "header": "Substance", "content": "new"},
+    ]
+    changed, removed = diff_chunks(old, new)
+    assert [c["content"] for c in changed] == ["new"]
+    assert len(removed) == 1
+
+
+def test_diff_chunks_pairs_chunks_sharing_an_id():
+    # Two "Key Metrics" chunks on one page have the same chunk id
+    old = [
+        {"source": "a.pdf", "page": 2, "header": "Key Metrics", "content": "50%"},
+        {"source": "a.pdf", "page": 2, "header": "Key Metrics", "content": "12 sites"},
+    ]
+    new = [
+        {"source": "a.pdf", "page": 2, "header": "Key Metrics", "content": "12 sites"},
+        {"source": "a.pdf", "page": 2, "header": "Key Metrics", "content": "55%"},
+    ]
+    changed, removed = diff_chunks(old, new)
+    assert [c["content"] for c in changed] == ["55%"]
+    assert removed == []
+
+    changed, removed = diff_chunks(old, new[:1])
+    assert changed == [] and len(removed) == 1
+
+
+def test_reingest_keeps_chunks_embeddings_and_index_aligned(tmp_path):
+    import faiss
+    import numpy as np
+
+    from corpus_registry import CorpusPaths
+    from ingest_service import chunk_plain_pages
+    from jsonl_io import read_jsonl
+    from merge_chunks import merged_chunks
+    from page_manifest import reingest_pdf
+    from utils import chunk_key, record_key
+
+    paths = CorpusPaths(str(tmp_path / "merged_chunks.jsonl"), str(tmp_path / "faiss_index.faiss"), "")
+    chunk_files = [str(tmp_path / "chunks_a.jsonl"), str(tmp_path / "chunks_b.jsonl")]
+    pdfs = [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+    _make_pdf(pdfs[0], ["Title A\nfirst page of a", "Title A\nsecond page of a"])
+    _make_pdf(pdfs[1], ["Title B\nonly page of b"])
+
+    def reingest(pdf, chunks_path):
+        return reingest_pdf(
+            pdf, [1, 2] if pdf == pdfs[0] else [1], chunk_plain_pages, chunks_path, paths,
+            chunk_files=chunk_files, manifest_path=chunks_path + ".manifest.json", resize=False,
+        )
+
+    reingest(pdfs[0], chunk_files[0])
+    reingest(pdfs[1], chunk_files[1])
+    _make_pdf(pdfs[0], ["Title A\nfirst page of a", "Title A\nsecond page of a, corrected"])
+    stats = reingest(pdfs[0], chunk_files[0])
+    assert stats["changed_pages"] == [2] and stats["embedded"] == 1
+
+    chunks = list(read_jsonl(paths.chunks))
+    records = list(read_jsonl(str(tmp_path / "embeddings.jsonl")))
+    index = faiss.read_index(paths.index)
+    assert [c["content"] for c in chunks] == [c["content"] for c in merged_chunks(chunk_files, resize=False)]
+    assert "second page of a, corrected" in [c["content"] for c in chunks]
+    assert [chunk_key(c) for c in chunks] == [record_key(r) for r in records]
+    assert index.ntotal == len(chunks)
+    vectors = np.array([r["embedding"] for r in records], dtype="float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(index.reconstruct_n(0, index.ntotal), vectors, atol=1e-5)
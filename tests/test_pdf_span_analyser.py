@@ -0,0 +1,46 @@
+import json
+
+import fitz
+
+from pdf_span_analyser import format_report, profile_pdf
+
+BLACK, BLUE = (0, 0, 0), (0, 0, 1)
+
+
+def _make_report(path, n_pages):
+    doc = fitz.open()
+    for i in range(n_pages):
+        page = doc.new_page(width=600, height=800)
+        page.insert_text((40, 60), f"Case study {i}", fontsize=20, color=BLUE)
+        for line in range(8):
+            page.insert_text((40, 200 + 20 * line), f"Body text line {line} of page {i}.", fontsize=9, color=BLACK)
+        page.insert_text((40, 780), str(i + 1), fontsize=7, color=BLACK)
+    doc.save(path)
+    doc.close()
+
+
+def test_profile_clusters_spans_and_suggests_rules(tmp_path):
+    pdf_path, out = str(tmp_path / "report.pdf"), str(tmp_path / "profile.json")
+    _make_report(pdf_path, 6)
+
+    profile = profile_pdf(pdf_path, workers=2, output_path=out)
+    assert profile["pages"] == 6 and profile["body_size"] == 9.0
+    by_role = {c["role"]: c for c in profile["clusters"]}
+
+    body, title = by_role["body"], by_role["title"]
+    assert (body["spans"], body["pages"], body["color"]) == (48, 6, 0)
+    assert body["rule"].startswith('8.5 < s["size"] < 9.5 and s["color"] == 0')
+    assert (title["size"], title["color_hex"], title["pages"]) == (20.0, "#0000ff", 6)
+    assert title["y_bands"][0] == 6 and title["samples"][0].startswith("Case study")
+    assert by_role["minor"]["y_bands"][-1] == 6  # page numbers sit in the bottom band
+
+    # The suggested rule is a valid filter over span dicts and keeps exactly the titles
+    doc = fitz.open(pdf_path)
+    spans = [
+        {"size": s["size"], "color": s["color"], "font": s["font"], "x0": s["bbox"][0], "y0": s["bbox"][1]}
+        for page in doc for b in page.get_text("dict")["blocks"] for l in b["lines"] for s in l["spans"]
+    ]
+    assert sum(eval(title["rule"], {"s": s}) for s in spans) == 6
+
+    assert json.load(open(out))["clusters"][0]["role"] == "body"
+    assert "title" in format_report(profile)
@@ -0,0 +1,26 @@
+import os
+
+from profiling import profile_block, should_profile
+
+
+def test_should_profile_modes():
+    assert not should_profile({"x-profile": "1"}, mode="off")
+    assert should_profile({"x-profile": "1"}, mode="header")
+    assert not should_profile({}, mode="header")
+    assert should_profile(None, mode="all")
+
+
+def test_profile_block_writes_stats_and_peak_memory(tmp_path):
+    with profile_block("ask", "req/1", directory=str(tmp_path)) as prefix:
+        data = [list(range(1000)) for _ in range(50)]
+    assert data and prefix is not None
+    assert os.path.exists(f"{prefix}.prof")
+    with open(f"{prefix}.txt", encoding="utf-8") as f:
+        assert f.readline().startswith("tracemalloc peak:")
+    assert "/" not in os.path.basename(prefix)
+
+
+def test_profile_block_skips_concurrent_capture(tmp_path):
+    with profile_block("outer", "1", directory=str(tmp_path)):
+        with profile_block("inner", "2", directory=str(tmp_path)) as inner:
+            assert inner is None
@@ -0,0 +1,95 @@
+import numpy as np
+from llm_backend import get_backend
+from metrics import RequestTimings
+from qa import answer_question, format_sources
+from retriever import build_faiss_index
+
+
+def _corpus():
+    chunks = [
+        {"main_title_of_page": "Trade", "main_subtitle_of_page": "", "header": "Key Metrics",
+         "content": "TradeWaltz reduces trade workload by up to 50%", "page": 9, "source": "sr_2020_cb_p.pdf"},
+        {"main_title_of_page": "Farming", "main_subtitle_of_page": "", "header": "Substance",
+         "content": "PIG LABO supports breeding management in pig farming", "page": 12, "source": "sr_2020_cb_p.pdf"},
+    ]
+    vectors = np.array(get_backend().embed([c["content"] for c in chunks], dimensions=256), dtype="float32")
+    return chunks, build_faiss_index(vectors)
+
+
+def test_answer_question_times_every_stage():
+    chunks, index = _corpus()
+    timings = RequestTimings()
+    result = answer_question("TradeWaltz trade workload reduces by", chunks, index, timings, top_k=2)
+
+    assert not result["fallback"]
+    assert result["retrieved"][0]["page"] == 9
+    assert set(timings.stages) == {"embed", "search", "prompt", "completion"}
+
+
+def test_answer_question_falls_back_on_low_similarity():
+    chunks, index = _corpus()
+    result = answer_question("Hastane randevu sistemi nasıl çalışır?", chunks, index, top_k=2)
+    assert result["fallback"]
+    assert result["retrieved"] == []
+
+
+def test_extractive_fast_path_skips_the_llm():
+    from qa import EXTRACTIVE, extractive_answer
+
+    chunk = {"header": "Key Metrics", "main_title_of_page": "TradeWaltz trade platform",
+             "content": "Reduction in trade workload Up to 50% compared to existing systems",
+             "page": 9, "source": "sr_2020_cb_p.pdf"}
+    question = "How much was the trade workload reduced with TradeWaltz?"
+
+    answer = extractive_answer(question, chunk, similarity=0.9)
+    assert "50%" in answer and "page 9" in answer
+    assert extractive_answer(question, chunk, similarity=0.6) is None
+    assert extractive_answer(question, dict(chunk, header="Substance"), similarity=0.9) is None
+    assert extractive_answer("Why is TradeWaltz important?", chunk, similarity=0.9) is None
+    # Terms matching only the page title do not count towards the overlap
+    assert extractive_answer("How much did the TradeWaltz platform grow?", chunk, similarity=0.9) is None
+
+    index = build_faiss_index(np.array(get_backend().embed([chunk["content"]], dimensions=256), dtype="float32"))
+    timings = RequestTimings()
+    hits = EXTRACTIVE.value(outcome="hit")
+    result = answer_question(chunk["content"] + " how much", [chunk], index, timings, top_k=1, fast_path=True)
+    assert result["extractive"]
+    assert "completion" not in timings.stages
+    assert EXTRACTIVE.value(outcome="hit") == hits + 1
+
+
+def test_lexical_fast_path_skips_the_embedding():
+    from lexical import BM25Index
+
+    chunks, index = _corpus()
+    timings = RequestTimings()
+    result = answer_question(
+        "TradeWaltz workload", chunks, index, timings, top_k=2,
+        lexical=BM25Index.build(chunks), lexical_fast_path=True,
+    )
+    assert result["retrieved"][0]["page"] == 9
+    assert "embed" not in timings.stages and "lexical" in timings.stages
+    # No dense similarity was computed: nothing claims one, nothing is extracted on it
+    assert result["max_similarity"] is None and set(result["similarities"]) == {None}
+    assert not result["extractive"]
+    assert format_sources(result["retrieved"], result["similarities"])[0].endswith("| Lexical match")
+
+    hybrid = RequestTimings()
+    result = answer_question("breeding in pig farming", chunks, index, hybrid, top_k=2, lexical=BM25Index.build(chunks))
+    assert result["retrieved"][0]["page"] == 12
+    assert {"embed", "lexical", "fuse"} <= set(hybrid.stages)
+
+
+def test_batch_mode_embeds_only_questions_the_lexical_fast_path_cannot_answer(monkeypatch):
+    import qa
+    from lexical import BM25Index
+
+    chunks, index = _corpus()
+    embedded = []
+    real_embed = qa.embed_questions
+    monkeypatch.setattr(qa, "embed_questions", lambda questions, d: embedded.extend(questions) or real_embed(questions, d))
+
+    questions = ["TradeWaltz workload", "What does the company do for animals?"]
+    results = {q: r for _, q, r, _ in qa.answer_questions(questions, chunks, index, top_k=2, lexical=BM25Index.build(chunks), lexical_fast_path=True)}
+    assert embedded == ["What does the company do for animals?"]
+    assert results["TradeWaltz workload"]["retrieved"][0]["page"] == 9
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from qa_log import BackgroundJSONLWriter
+
+
+def test_records_are_written_in_background(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    writer = BackgroundJSONLWriter(path, max_bytes=0, rotate_when="")
+    for i in range(10):
+        writer.write({"question": f"q{i}"})
+    writer.flush()
+
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["question"] for line in f] == [f"q{i}" for i in range(10)]
+    writer.close()
+
+
+def test_size_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    writer = BackgroundJSONLWriter(path, max_bytes=200, rotate_when="", backup_count=2)
+    for i in range(5):
+        writer.write({"question": "x" * 250, "i": i})
+        writer.flush()
+    writer.close()
+
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+
+
+def test_size_rotation_without_backups_truncates(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    writer = BackgroundJSONLWriter(path, max_bytes=200, rotate_when="", backup_count=0)
+    for i in range(3):
+        writer.write({"question": "x" * 250, "i": i})
+        writer.flush()
+    writer.close()
+
+    assert os.listdir(tmp_path) == ["QA.jsonl"]
+    assert os.path.getsize(path) == 0
+
+
+def test_time_rollover_happens_before_the_next_batch(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"question": "yesterday"}) + "\n")
+    yesterday = time.time() - 86400
+    os.utime(path, (yesterday, yesterday))
+
+    writer = BackgroundJSONLWriter(path, max_bytes=0, rotate_when="D", backup_count=5)
+    writer.write({"question": "today"})
+    writer.flush()
+    writer.close()
+
+    backup = f"{path}.{datetime.fromtimestamp(yesterday):%Y-%m-%d}"
+    with open(backup, encoding="utf-8") as f:
+        assert [json.loads(line)["question"] for line in f] == ["yesterday"]
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["question"] for line in f] == ["today"]
+
+
+def test_size_rotation_twice_in_one_period_keeps_both_backups(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    writer = BackgroundJSONLWriter(path, max_bytes=200, rotate_when="D", backup_count=5)
+    for i in range(3):
+        writer.write({"question": "x" * 250, "i": i})
+        writer.flush()
+    writer.close()
+
+    backup = f"{path}.{datetime.now():%Y-%m-%d}"
+    assert len(os.listdir(tmp_path)) == 4  # the log and three backups of today
+    kept = []
+    for name in (backup, f"{backup}.1", f"{backup}.2"):
+        with open(name, encoding="utf-8") as f:
+            kept += [json.loads(line)["i"] for line in f]
+    assert kept == [0, 1, 2]
+
+
+def test_writer_survives_a_failed_batch(tmp_path):
+    path = str(tmp_path / "QA.jsonl")
+    writer = BackgroundJSONLWriter(path, max_bytes=0, rotate_when="")
+    writer.flush()
+    writer._file.close()  # the next write fails
+    writer.write({"question": "lost"})
+    writer.flush()
+    writer.write({"question": "kept"})
+    writer.flush()
+    assert writer.failed == 1 and writer._thread.is_alive()
+    writer.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["question"] for line in f] == ["kept"]
@@ -1,5 +1,24 @@
 import pytest
-from retriever import build_and_save
+import numpy as np
+from retriever import (
+    BinaryRerankIndex,
+    ShardedIndex,
+    binary_paths_for,
+    build_and_save,
+    build_binary_index,
+    build_faiss_index,
+    build_hierarchical_index,
+    build_shards,
+    load_hierarchical_index,
+    load_search_index,
+    save_binary,
+    save_index,
+    save_page_map,
+    serve_shard,
+    start_local_shard_workers,
+    normalize_embeddings,
+    truncate_embeddings,
+)
 import faiss
 
 def test_build_and_save_returns_index():
@@ -7,3 +26,141 @@ def test_build_and_save_returns_index():
     assert isinstance(index, faiss.IndexFlatIP)
     assert isinstance(metadata, list)
     assert len(metadata) > 0
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_reduced_quantized_index_finds_itself(storage):
+    embeddings = normalize_embeddings(np.random.RandomState(0).rand(200, 1536).astype("float32"))
+    reduced = truncate_embeddings(embeddings, 256)
+    index = build_faiss_index(reduced, storage)
+
+    assert index.d == 256
+    np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+    _, ids = index.search(reduced[:10], 1)
+    assert list(ids[:, 0]) == list(range(10))
+
+
+def test_binary_rerank_matches_exact_top_k():
+    rng = np.random.RandomState(1)
+    embeddings = normalize_embeddings(rng.randn(2000, 256).astype("float32"))
+    queries = normalize_embeddings(embeddings[:20] + 0.1 * rng.randn(20, 256).astype("float32"))
+
+    exact = build_faiss_index(embeddings, "float32")
+    two_stage = BinaryRerankIndex(build_binary_index(embeddings), embeddings, overfetch=20)
+
+    _, expected = exact.search(queries, 5)
+    distances, found = two_stage.search(queries, 5)
+    assert found.shape == (20, 5)
+    assert list(found[:, 0]) == list(expected[:, 0])
+    assert np.all(np.diff(distances, axis=1) <= 0)
+
+
+def test_binary_index_is_served_only_when_up_to_date(tmp_path):
+    import os
+
+    embeddings = normalize_embeddings(np.random.RandomState(2).randn(100, 64).astype("float32"))
+    index_path = str(tmp_path / "faiss_index.faiss")
+    save_index(build_faiss_index(embeddings), index_path)
+    assert isinstance(load_search_index(index_path, binary=True), faiss.Index)  # nothing built yet
+
+    save_binary(embeddings, *binary_paths_for(index_path))
+    assert binary_paths_for(index_path) == (str(tmp_path / "faiss_index_binary.faiss"), str(tmp_path / "embeddings_f32.npy"))
+    two_stage = load_search_index(index_path, binary=True)
+    assert isinstance(two_stage, BinaryRerankIndex) and two_stage.ntotal == 100
+    assert isinstance(load_search_index(index_path, binary=False), faiss.Index)
+
+    later = os.path.getmtime(index_path) + 10
+    os.utime(index_path, (later, later))  # float index rebuilt after the binary one
+    assert isinstance(load_search_index(index_path, binary=True), faiss.Index)
+
+
+@pytest.mark.parametrize("by", ["hash", "source"])
+def test_sharded_search_matches_single_index(tmp_path, by):
+    rng = np.random.RandomState(2)
+    embeddings = normalize_embeddings(rng.randn(600, 64).astype("float32"))
+    metadatas = [{"chunk_id": f"c{i}", "source": f"report_{i % 7}.pdf"} for i in range(600)]
+    paths = []
+    for i, shard in enumerate(build_shards(embeddings, metadatas, 3, by)):
+        paths.append(str(tmp_path / f"shard_{i}.faiss"))
+        save_index(shard, paths[-1])
+
+    processes, addresses = start_local_shard_workers(paths)
+    try:
+        sharded = ShardedIndex(addresses)
+        assert (sharded.d, sharded.ntotal) == (64, 600)
+        expected_d, expected_i = build_faiss_index(embeddings).search(embeddings[:15], 5)
+        distances, ids = sharded.search(embeddings[:15], 5)
+        np.testing.assert_array_equal(ids, expected_i)
+        np.testing.assert_allclose(distances, expected_d, rtol=1e-5)
+        sharded.close()
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+def test_sharded_search_pads_like_faiss_when_k_exceeds_the_corpus(tmp_path):
+    embeddings = normalize_embeddings(np.random.RandomState(3).randn(4, 16).astype("float32"))
+    metadatas = [{"chunk_id": f"c{i}"} for i in range(4)]
+    paths = []
+    for i, shard in enumerate(build_shards(embeddings, metadatas, 2)):
+        paths.append(str(tmp_path / f"shard_{i}.faiss"))
+        save_index(shard, paths[-1])
+
+    processes, addresses = start_local_shard_workers(paths)
+    try:
+        sharded = ShardedIndex(addresses)
+        expected_d, expected_i = build_faiss_index(embeddings).search(embeddings[:3], 10)
+        distances, ids = sharded.search(embeddings[:3], 10)
+        assert ids.shape == distances.shape == (3, 10)
+        np.testing.assert_array_equal(ids, expected_i)
+        assert np.all(np.isneginf(distances[:, 4:]))
+        sharded.close()
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+def test_shard_refuses_public_address_without_key(tmp_path):
+    with pytest.raises(ValueError, match="SHARD_AUTHKEY"):
+        serve_shard(str(tmp_path / "missing.faiss"), ("0.0.0.0", 0))
+
+
+def test_hierarchical_search_probes_pages_then_chunks(tmp_path):
+    rng = np.random.RandomState(3)
+    centers = normalize_embeddings(rng.randn(40, 64).astype("float32"))
+    page_of = np.repeat(np.arange(40), 5)
+    rng.shuffle(page_of)  # chunks of a page need not be contiguous
+    embeddings = normalize_embeddings(centers[page_of] + 0.3 * rng.randn(200, 64).astype("float32"))
+    metadatas = [
+        {"source": f"report_{p % 4}.pdf", "page": int(p), "main_title_of_page": f"Case {p}"} for p in page_of
+    ]
+    queries = normalize_embeddings(embeddings[:20] + 0.05 * rng.randn(20, 64).astype("float32"))
+
+    index = build_hierarchical_index(embeddings, metadatas, page_probe=4)
+    assert (index.d, index.ntotal, index.page_index.ntotal) == (64, 200, 40)
+    _, expected = build_faiss_index(embeddings).search(queries, 3)
+    distances, found = index.search(queries, 3)
+    assert list(found[:, 0]) == list(expected[:, 0])
+    assert np.all(np.diff(distances, axis=1) <= 0)
+
+    # Only chunks of the probed pages are scored; a single page caps the results at its size
+    _, one_page = index.search(queries[:1], 10, page_probe=1)
+    assert list(one_page[0, 5:]) == [-1] * 5
+    assert len({int(page_of[i]) for i in one_page[0, :5]}) == 1
+
+    groups = index.search_pages(queries[:1], 6)[0]
+    assert groups[0]["page"] == ("report_%d.pdf" % (page_of[0] % 4), int(page_of[0]))
+    assert groups[0]["hits"][0][0] == 0
+    assert sum(len(g["hits"]) for g in groups) == 6
+    assert [g["score"] for g in groups] == sorted((g["score"] for g in groups), reverse=True)
+
+    chunk_path, page_path, map_path = (str(tmp_path / name) for name in ("c.faiss", "p.faiss", "map.npz"))
+    save_index(index.chunk_index, chunk_path)
+    save_index(index.page_index, page_path)
+    save_page_map(index, map_path)
+    loaded = load_hierarchical_index(chunk_path, page_path, map_path, page_probe=4)
+    assert loaded.pages == index.pages
+    np.testing.assert_array_equal(loaded.search(queries, 3)[1], found)
+
+    titled = build_hierarchical_index(embeddings, metadatas, use_titles=True)
+    assert titled.page_index.ntotal == 40
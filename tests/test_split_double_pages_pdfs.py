@@ -0,0 +1,44 @@
+import fitz
+
+from split_double_pages_pdfs import split_double_pages_vertically, split_pdfs
+
+
+def _make_pdf(path, sizes):
+    doc = fitz.open()
+    for i, (width, height) in enumerate(sizes):
+        doc.new_page(width=width, height=height).insert_text((20, 40), f"page {i}")
+    doc.save(path)
+    doc.close()
+
+
+def _page_widths(path):
+    with fitz.open(path) as doc:
+        return [round(page.rect.width) for page in doc]
+
+
+def test_spreads_are_detected_from_aspect_ratio(tmp_path):
+    pdf_path, out = str(tmp_path / "report.pdf"), str(tmp_path / "out.pdf")
+    _make_pdf(pdf_path, [(595, 842), (1190, 842), (1190, 842), (595, 842)])
+
+    assert split_double_pages_vertically(pdf_path, out) == 2
+    assert _page_widths(out) == [595, 595, 595, 595, 595, 595]
+
+    # An explicit avoid list still wins over detection
+    split_double_pages_vertically(pdf_path, out, avoid_pages=[0, 2, 3])
+    assert _page_widths(out) == [595, 595, 595, 1190, 595]
+
+
+def test_many_pdfs_split_in_parallel_segments(tmp_path):
+    paths = []
+    for name in ("a", "b"):
+        paths.append(str(tmp_path / f"{name}.pdf"))
+        _make_pdf(paths[-1], [(595, 842)] + [(1190, 842)] * 4)
+
+    results = split_pdfs(paths, str(tmp_path / "split"), workers=2, segment_pages=2)
+    outputs = sorted(p.rsplit("/", 1)[-1] for p, _ in results)
+    assert outputs == [
+        "a_split_p1-2.pdf", "a_split_p3-4.pdf", "a_split_p5-5.pdf",
+        "b_split_p1-2.pdf", "b_split_p3-4.pdf", "b_split_p5-5.pdf",
+    ]
+    assert sum(split for _, split in results) == 8
+    assert len(_page_widths(str(tmp_path / "split" / "a_split_p1-2.pdf"))) == 3
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+HEAVY = ("faiss", "fitz", "openai", "tiktoken", "tqdm")
+# The CLIs load an index right away; the API only with the first question
+HEAVY_FOR = {"app": HEAVY + ("numpy",)}
+
+# Import-time budget (seconds) per entry point. Generous on purpose: the heavy
+# module check below is what catches regressions deterministically.
+BUDGETS = {
+    "query": 0.5,  # CLI
+    "app": 1.5,  # API
+    "rag_pipeline": 0.5,
+    "pdf_chunker_by_template": 0.3,
+    "pdf_2020_chunker_by_span_analysis": 0.3,
+    "pdf_2024_chunker_by_span_analysis": 0.3,
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}}))
+"""
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_entry_point_import_is_cheap(module, tmp_path):
+    env = dict(os.environ, PYTHONPATH=SRC, LLM_BACKEND="offline")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    probe = json.loads(out.strip().splitlines()[-1])
+
+    assert not set(HEAVY_FOR.get(module, HEAVY)) & set(probe["modules"])
+    assert os.listdir(tmp_path) == []  # no directories or log files created at import
+    assert probe["seconds"] < BUDGETS[module]